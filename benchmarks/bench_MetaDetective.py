@@ -0,0 +1,565 @@
+#!/usr/bin/env python3
+"""Reproducible benchmarks for MetaDetective.
+
+Generates a synthetic corpus (PDF, DOCX and JPEG files with controlled metadata and GPS
+coordinates) and a local website serving it, then times metadata extraction, the display
+renderers, the exports, the crawler and the startup of the command. Results can be saved
+as a baseline and later runs compared against it to spot regressions.
+
+Usage:
+    python3 benchmarks/bench_MetaDetective.py
+    python3 benchmarks/bench_MetaDetective.py --save-baseline benchmarks/baseline.json
+    python3 benchmarks/bench_MetaDetective.py --compare benchmarks/baseline.json
+"""
+import argparse
+import contextlib
+import copy
+import functools
+import io
+import json
+import os
+import platform
+import py_compile
+import random
+import shutil
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from argparse import Namespace
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, "src", "MetaDetective", "MetaDetective.py")
+sys.path.insert(0, ROOT)
+
+from src.MetaDetective import MetaDetective  # noqa: E402
+
+SEED = 4869
+
+AUTHORS = ["Conan Edogawa", "Ran Mouri", "Kogoro Mouri", "Ai Haibara", "Heiji Hattori", "Shinichi Kudo", "Jodie Starling"]
+COMPANIES = ["Black Organization", "Mouri Detective Agency", "Teitan High School", "FBI"]
+TOOLS = ["Microsoft Word", "LibreOffice Writer", "Adobe Acrobat", "pdfTeX-1.40"]
+CAMERAS = [("Canon", "Canon EOS 5D"), ("NIKON CORPORATION", "NIKON D750"), ("Apple", "iPhone 12")]
+PLACES = [(35.681236, 139.767125), (48.858370, 2.294481), (40.689247, -74.044502), (-33.856784, 151.215297)]
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '<Override PartName="/docProps/core.xml" ContentType="application/vnd.openxmlformats-package.core-properties+xml"/>'
+    '<Override PartName="/docProps/app.xml" ContentType="application/vnd.openxmlformats-officedocument.extended-properties+xml"/>'
+    '</Types>'
+)
+ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>'
+    '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/package/2006/relationships/metadata/core-properties" Target="docProps/core.xml"/>'
+    '<Relationship Id="rId3" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/extended-properties" Target="docProps/app.xml"/>'
+    '</Relationships>'
+)
+DOCUMENT = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+    '<w:body><w:p><w:r><w:t>{text}</w:t></w:r></w:p></w:body></w:document>'
+)
+CORE = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" '
+    'xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:dcterms="http://purl.org/dc/terms/" '
+    'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">'
+    '<dc:title>{title}</dc:title><dc:creator>{author}</dc:creator><cp:lastModifiedBy>{modifier}</cp:lastModifiedBy>'
+    '<dcterms:created xsi:type="dcterms:W3CDTF">{date}</dcterms:created>'
+    '<dcterms:modified xsi:type="dcterms:W3CDTF">{date}</dcterms:modified>'
+    '</cp:coreProperties>'
+)
+APP = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties">'
+    '<Application>{tool}</Application><Company>{company}</Company></Properties>'
+)
+PAGE = "<html><head><title>{title}</title></head><body>\n{links}\n</body></html>\n"
+
+
+def to_dms(value: float, positive: str, negative: str) -> Tuple[int, int, float, str]:
+    """
+    Split decimal degrees into degrees, minutes, seconds and hemisphere.
+
+    Args:
+        value (float): Coordinate in decimal degrees.
+        positive (str): Hemisphere of positive values ('N' or 'E').
+        negative (str): Hemisphere of negative values ('S' or 'W').
+
+    Returns:
+        Tuple[int, int, float, str]: Degrees, minutes, seconds and hemisphere.
+    """
+    direction = positive if value >= 0 else negative
+    value = abs(value)
+    degrees = int(value)
+    minutes = int((value - degrees) * 60)
+    seconds = round((value - degrees - minutes / 60) * 3600, 2)
+    return degrees, minutes, seconds, direction
+
+
+def format_dms(value: float, positive: str, negative: str) -> str:
+    """Format decimal degrees the way exiftool prints GPS coordinates."""
+    degrees, minutes, seconds, direction = to_dms(value, positive, negative)
+    return f"{degrees} deg {minutes}' {seconds:.2f}\" {direction}"
+
+
+def pdf_string(value: str) -> bytes:
+    """Encode a text value as a PDF literal string."""
+    escaped = value.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return b"(" + escaped.encode("latin-1", "replace") + b")"
+
+
+def make_pdf(record: Dict[str, str], padding: int) -> bytes:
+    """
+    Build a PDF with a classic xref table, an Info dictionary and a padding stream.
+
+    Args:
+        record (Dict[str, str]): Metadata of the document.
+        padding (int): Size of the content stream, to control the file size.
+
+    Returns:
+        bytes: The PDF file.
+    """
+    info = b"<< /Title %s /Author %s /Creator %s /Producer %s /CreationDate (D:%s) >>" % (
+        pdf_string(record["Title"]), pdf_string(record["Author"]), pdf_string(record["Creator Tool"]),
+        pdf_string(record["Producer"]), record["Create Date"].replace(":", "").replace(" ", "").encode())
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", b"<< /Type /Pages /Kids [] /Count 0 >>",
+               b"<< /Length %d >>\nstream\n" % padding + b"0" * padding + b"\nendstream", info]
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        pdf += b"%010d 00000 n \n" % offset
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R /Info 4 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(pdf)
+
+
+def make_docx(record: Dict[str, str], padding: int) -> bytes:
+    """
+    Build a DOCX package with core and extended properties.
+
+    Args:
+        record (Dict[str, str]): Metadata of the document.
+        padding (int): Length of the document text, to control the file size.
+
+    Returns:
+        bytes: The DOCX file.
+    """
+    date = record["Create Date"].replace(":", "-", 2).replace(" ", "T") + "Z"
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", CONTENT_TYPES)
+        archive.writestr("_rels/.rels", ROOT_RELS)
+        archive.writestr("word/document.xml", DOCUMENT.format(text=random.Random(padding).randbytes(padding).hex()))
+        archive.writestr("docProps/core.xml", CORE.format(title=record["Title"], author=record["Author"],
+                                                          modifier=record["Last Modified By"], date=date))
+        archive.writestr("docProps/app.xml", APP.format(tool=record["Creator Tool"], company=record["Company"]))
+    return buffer.getvalue()
+
+
+def tiff_ifd(entries: List[Tuple[int, int, int, bytes]], offset: int) -> bytes:
+    """
+    Pack a little-endian TIFF IFD, followed by the values that do not fit in its entries.
+
+    Args:
+        entries (List[Tuple[int, int, int, bytes]]): (tag, type, count, packed value) of each entry.
+        offset (int): Position of the IFD from the start of the TIFF header.
+
+    Returns:
+        bytes: The IFD and its value area.
+    """
+    data_offset = offset + 2 + 12 * len(entries) + 4
+    ifd = bytearray(struct.pack("<H", len(entries)))
+    data = bytearray()
+    for tag, value_type, count, value in sorted(entries):
+        if len(value) <= 4:
+            ifd += struct.pack("<HHI", tag, value_type, count) + value.ljust(4, b"\0")
+        else:
+            ifd += struct.pack("<HHII", tag, value_type, count, data_offset + len(data))
+            data += value + b"\0" * (len(value) % 2)
+    ifd += struct.pack("<I", 0)
+    return bytes(ifd + data)
+
+
+def make_jpeg(record: Dict[str, str], latitude: float, longitude: float, padding: int) -> bytes:
+    """
+    Build a JPEG holding an EXIF segment with camera and GPS tags.
+
+    The image data itself is a comment placeholder: only the metadata matters here.
+
+    Args:
+        record (Dict[str, str]): Metadata of the picture.
+        latitude (float): GPS latitude in decimal degrees.
+        longitude (float): GPS longitude in decimal degrees.
+        padding (int): Size of the placeholder, to control the file size.
+
+    Returns:
+        bytes: The JPEG file.
+    """
+    def ascii_entry(tag: int, value: str) -> Tuple[int, int, int, bytes]:
+        encoded = value.encode() + b"\0"
+        return tag, 2, len(encoded), encoded
+
+    def rational_entry(tag: int, value: float, positive: str, negative: str) -> Tuple[int, int, int, bytes]:
+        degrees, minutes, seconds, _ = to_dms(value, positive, negative)
+        return tag, 5, 3, struct.pack("<6I", degrees, 1, minutes, 1, int(round(seconds * 100)), 100)
+
+    gps = [(0x0000, 1, 4, bytes([2, 3, 0, 0])),
+           ascii_entry(0x0001, "N" if latitude >= 0 else "S"), rational_entry(0x0002, latitude, "N", "S"),
+           ascii_entry(0x0003, "E" if longitude >= 0 else "W"), rational_entry(0x0004, longitude, "E", "W")]
+    ifd0 = [ascii_entry(0x010F, record["Make"]), ascii_entry(0x0110, record["Camera Model Name"]),
+            ascii_entry(0x0131, record["Software"]), ascii_entry(0x013B, record["Author"])]
+    gps_offset = 8 + len(tiff_ifd(ifd0 + [(0x8825, 4, 1, b"\0\0\0\0")], 8))
+    tiff = b"II*\0" + struct.pack("<I", 8) + tiff_ifd(ifd0 + [(0x8825, 4, 1, struct.pack("<I", gps_offset))], 8)
+    tiff += tiff_ifd(gps, gps_offset)
+
+    exif = b"Exif\0\0" + tiff
+    comment = b"0" * min(padding, 65533)
+    app1 = b"\xff\xe1" + struct.pack(">H", len(exif) + 2) + exif
+    com = b"\xff\xfe" + struct.pack(">H", len(comment) + 2) + comment
+    return b"\xff\xd8" + app1 + com + b"\xff\xd9"
+
+
+def make_records(count: int, rng: random.Random) -> List[Dict[str, str]]:
+    """
+    Generate metadata records shaped like the output of get_metadata.
+
+    Every third record is a picture with GPS coordinates, the others alternate between PDF and DOCX documents.
+
+    Args:
+        count (int): Number of records.
+        rng (random.Random): Seeded random generator.
+
+    Returns:
+        List[Dict[str, str]]: The records, with their "File Name".
+    """
+    records = []
+    for index in range(count):
+        author = rng.choice(AUTHORS)
+        date = f"20{rng.randint(10, 23)}:{rng.randint(1, 12):02d}:{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00"
+        extension = ("pdf", "docx", "jpg")[index % 3]
+        record = {"File Name": f"file{index:05d}.{extension}", "Author": author, "Create Date": date}
+        if extension == "jpg":
+            latitude, longitude = rng.choice(PLACES)
+            make, model = rng.choice(CAMERAS)
+            record.update({"Make": make, "Camera Model Name": model, "Software": f"Firmware {rng.randint(1, 9)}.0",
+                           "GPS Position": f"{format_dms(latitude, 'N', 'S')}, {format_dms(longitude, 'E', 'W')}"})
+            record["Formatted GPS Position"] = MetaDetective.parse_exiftool_output(
+                f"GPS Position : {record['GPS Position']}", ["GPS Position"])["Formatted GPS Position"]
+            record["_coordinates"] = (latitude, longitude)
+        else:
+            record.update({"Title": f"Case report {index}", "Creator": author, "Creator Tool": rng.choice(TOOLS),
+                           "Producer": rng.choice(TOOLS), "Company": rng.choice(COMPANIES),
+                           "Last Modified By": rng.choice(AUTHORS),
+                           "Hyperlinks": f"https://example.com/case/{index % 50}, mailto:{author.split()[0].lower()}@example.com"})
+        records.append(record)
+    return records
+
+
+def build_corpus(directory: str, count: int, file_size: int, rng: random.Random) -> List[Dict[str, str]]:
+    """
+    Write the synthetic files and a manifest of their metadata.
+
+    Args:
+        directory (str): Directory receiving the files.
+        count (int): Number of files.
+        file_size (int): Approximate size of each file in bytes.
+        rng (random.Random): Seeded random generator.
+
+    Returns:
+        List[Dict[str, str]]: The metadata records of the files, as written to manifest.json.
+    """
+    os.makedirs(directory, exist_ok=True)
+    records = make_records(count, rng)
+    for record in records:
+        path = os.path.join(directory, record["File Name"])
+        if path.endswith(".pdf"):
+            content = make_pdf(record, file_size)
+        elif path.endswith(".docx"):
+            content = make_docx(record, file_size // 2)
+        else:
+            content = make_jpeg(record, *record.pop("_coordinates"), file_size)
+        with open(path, "wb") as f:
+            f.write(content)
+
+    with open(os.path.join(directory, "manifest.json"), "w") as f:
+        json.dump(records, f, indent=1)
+    return records
+
+
+def build_site(directory: str, files: List[str], fanout: int, depth: int, links_per_page: int) -> int:
+    """
+    Write a tree of HTML pages linking to each other and to the corpus files.
+
+    Args:
+        directory (str): Root of the site; the corpus files are expected under "files/".
+        files (List[str]): Names of the corpus files.
+        fanout (int): Number of child pages linked from each page.
+        depth (int): Depth of the page tree below the index page.
+        links_per_page (int): Number of file links on each page.
+
+    Returns:
+        int: Number of pages written.
+    """
+    pages = 0
+    file_cycle = iter(files * (1 + (fanout ** (depth + 1)) * links_per_page // max(len(files), 1)))
+    level = [""]
+    for current_depth in range(depth + 1):
+        next_level = []
+        for prefix in level:
+            children = [f"{prefix}p{child}/" for child in range(fanout)] if current_depth < depth else []
+            links = [f'<a href="/{child}index.html">{child}</a>' for child in children]
+            links += [f'<a href="/files/{next(file_cycle)}">document</a>' for _ in range(links_per_page)]
+            os.makedirs(os.path.join(directory, prefix), exist_ok=True)
+            with open(os.path.join(directory, prefix, "index.html"), "w") as f:
+                f.write(PAGE.format(title=prefix or "home", links="\n".join(links)))
+            pages += 1
+            next_level.extend(children)
+        level = next_level
+    return pages
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    """Static file handler that does not log requests."""
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+@contextlib.contextmanager
+def serve(directory: str):
+    """
+    Serve a directory over HTTP on a random local port.
+
+    Args:
+        directory (str): Directory to serve.
+
+    Yields:
+        str: Base URL of the site.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(QuietHandler, directory=directory))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def crawl(url: str, depth: int, threads: int, download_dir: Optional[str] = None) -> Tuple[int, int]:
+    """
+    Crawl a site with the scraping workers, as the --scraping mode does, without rate limiting.
+
+    Args:
+        url (str): Site URL.
+        depth (int): Depth of links to follow.
+        threads (int): Number of worker threads.
+        download_dir (Optional[str], optional): Directory receiving the files; scan only when None. Defaults to None.
+
+    Returns:
+        Tuple[int, int]: Number of URLs processed and number of unique files found.
+    """
+    rate_limiter = MetaDetective.RateLimiter(10 ** 9, 10 ** 9)
+    file_stats = {}
+    seen = MetaDetective.crawl_site(url, MetaDetective.CrawlFrontier(), rate_limiter, file_stats, depth, threads,
+                                    download_dir=download_dir, scan=download_dir is None)
+
+    if download_dir:
+        return len(seen), len(os.listdir(download_dir))
+    return len(seen), sum(len(found) for found in file_stats.values())
+
+
+def measure(function: Callable[[], Any], repeat: int, setup: Optional[Callable[[], Any]] = None) -> Dict[str, float]:
+    """
+    Time a function several times, discarding its output.
+
+    Args:
+        function (Callable[[], Any]): Function to time; it receives the result of setup when one is given.
+        repeat (int): Number of runs.
+        setup (Optional[Callable[[], Any]], optional): Untimed preparation run before each call. Defaults to None.
+
+    Returns:
+        Dict[str, float]: Minimum, median and maximum durations in seconds.
+    """
+    durations = []
+    for _ in range(repeat):
+        argument = setup() if setup else None
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            function(argument) if setup else function()
+            durations.append(time.perf_counter() - start)
+    return {"min": min(durations), "median": statistics.median(durations), "max": max(durations)}
+
+
+def run_benchmarks(options: Namespace, workdir: str) -> Dict[str, Dict[str, float]]:
+    """
+    Build the corpus and the site, then run every benchmark.
+
+    Args:
+        options (Namespace): Command-line options.
+        workdir (str): Directory receiving the corpus and the site.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Timings of each benchmark, with the number of items processed.
+    """
+    rng = random.Random(options.seed)
+    site = os.path.join(workdir, "site")
+    corpus = os.path.join(site, "files")
+    files = build_corpus(corpus, options.files, options.file_size, rng)
+    pages = build_site(site, [record["File Name"] for record in files], options.fanout, options.depth, options.links)
+    records = make_records(options.records, rng)
+    for record in records:
+        record.pop("_coordinates", None)
+    for record in records:
+        if "Formatted GPS Position" in record:
+            MetaDetective.GEOCODE_CACHE[tuple(record["Formatted GPS Position"].split(", "))] = "Synthetic address"
+
+    results = {}
+
+    def add(name: str, items: int, timings: Dict[str, float]) -> None:
+        timings["items"] = items
+        timings["items_per_second"] = items / timings["median"] if timings["median"] else 0.0
+        results[name] = timings
+        print(f"{name:<24} {timings['median'] * 1000:>10.2f} ms  {timings['items_per_second']:>12.1f} items/s  ({items} items)")
+
+    # Compile the module's bytecode first, as installing the package does, so that startup_import measures the
+    # imports whatever PYTHONDONTWRITEBYTECODE says. The script run by startup_help is compiled on every run.
+    py_compile.compile(SCRIPT)
+    add("startup_import", 1, measure(lambda: subprocess.run([sys.executable, "-c", "import src.MetaDetective.MetaDetective"],
+                                                            cwd=ROOT, check=True), options.repeat))
+    add("startup_help", 1, measure(lambda: subprocess.run([sys.executable, SCRIPT, "--help"], capture_output=True, check=True),
+                                   options.repeat))
+
+    paths = [os.path.join(corpus, record["File Name"]) for record in files]
+    if shutil.which("exiftool"):
+        add("get_metadata", len(paths), measure(lambda: [MetaDetective.get_metadata(path, MetaDetective.FIELDS) for path in paths], options.repeat))
+    else:
+        print(f"{'get_metadata':<24} skipped (exiftool is not installed)")
+    add("native_metadata", len(paths), measure(lambda: [MetaDetective.get_native_metadata(path, MetaDetective.FIELDS)
+                                                        for path in paths], options.repeat))
+    add("plan_extraction", len(paths), measure(lambda: MetaDetective.plan_extraction(paths, options.threads), options.repeat))
+    if shutil.which("exiftool"):
+        add("extract_files_jobs", len(paths), measure(lambda: MetaDetective.extract_files(paths, options.threads), options.repeat))
+
+    add("metadata_records", len(records), measure(lambda: [MetaDetective.MetadataRecord(record) for record in records], options.repeat))
+    records = [MetaDetective.MetadataRecord(record) for record in records]
+
+    singular = Namespace(display="singular", format="concise", export=None)
+    formatted = Namespace(display="singular", format="formatted", export=None)
+    every = Namespace(display="all", format=None, export=None)
+
+    def fresh() -> List[Dict[str, str]]:
+        return copy.deepcopy(records)
+
+    add("display_singular", len(records), measure(lambda data: MetaDetective.display_singular_metadata(data, singular, []), options.repeat, fresh))
+    add("display_formatted", len(records), measure(lambda data: MetaDetective.display_singular_metadata(data, formatted, []), options.repeat, fresh))
+    add("display_all", len(records), measure(lambda data: MetaDetective.display_all_metadata(data, []), options.repeat, fresh))
+    add("display_ignore", len(records), measure(lambda data: MetaDetective.display_singular_metadata(data, singular, ["^Kogoro", "example"]), options.repeat, fresh))
+    add("export_html_singular", len(records), measure(lambda data: MetaDetective.export_metadata_to_html(singular, data, []), options.repeat, fresh))
+    add("export_html_all", len(records), measure(lambda data: MetaDetective.export_metadata_to_html(every, data, []), options.repeat, fresh))
+    add("export_html_pages", len(records), measure(lambda data: [page for page in MetaDetective.export_metadata_to_html_pages(
+        every, data, [], "bench", 500)], options.repeat, fresh))
+    add("export_txt_singular", len(records), measure(lambda data: MetaDetective.export_metadata_to_txt(singular, data, []), options.repeat, fresh))
+    add("export_txt_all", len(records), measure(lambda data: MetaDetective.export_metadata_to_txt(every, data, []), options.repeat, fresh))
+
+    with serve(site) as url:
+        add("crawl_scan", pages, measure(lambda: crawl(url, options.depth, options.threads), options.repeat))
+        add("crawl_download", pages, measure(lambda directory: crawl(url, options.depth, options.threads, directory),
+                                             options.repeat, lambda: tempfile.mkdtemp(dir=workdir)))
+
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Compare median timings against a baseline.
+
+    Args:
+        results (Dict[str, Dict[str, float]]): Timings of the current run.
+        baseline (Dict[str, Any]): Content of a baseline file.
+        threshold (float): Slowdown, in percent, above which a benchmark is reported as a regression.
+
+    Returns:
+        List[str]: Names of the benchmarks that regressed.
+    """
+    regressions = []
+    print("\nComparison with the baseline (median):")
+    for name, timings in results.items():
+        reference = baseline.get("results", {}).get(name)
+        if not reference:
+            print(f"{name:<24} no baseline")
+            continue
+        change = (timings["median"] / reference["median"] - 1) * 100 if reference["median"] else 0.0
+        regressed = change > threshold
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<24} {change:>+8.1f}%{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark MetaDetective on a synthetic corpus and a local website.")
+    parser.add_argument("--files", type=int, default=60, help="Number of files in the corpus.")
+    parser.add_argument("--file-size", type=int, default=16 * 1024, help="Approximate size of each file in bytes.")
+    parser.add_argument("--records", type=int, default=2000, help="Number of metadata records given to the renderers and exports.")
+    parser.add_argument("--fanout", type=int, default=4, help="Number of child pages linked from each page of the site.")
+    parser.add_argument("--depth", type=int, default=3, help="Depth of the site, also used as crawl depth.")
+    parser.add_argument("--links", type=int, default=3, help="Number of file links on each page.")
+    parser.add_argument("--threads", type=int, default=4, help="Number of crawler threads, and of extraction threads (extract_files_jobs).")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of runs of each benchmark.")
+    parser.add_argument("--seed", type=int, default=SEED, help="Seed of the corpus generator.")
+    parser.add_argument("--workdir", help="Directory receiving the corpus and the site (kept). A temporary directory by default.")
+    parser.add_argument("--save-baseline", metavar="FILE", help="Write the results to this baseline file.")
+    parser.add_argument("--compare", metavar="FILE", help="Compare the results with this baseline file.")
+    parser.add_argument("--threshold", type=float, default=20.0, help="Slowdown in percent reported as a regression (--compare).")
+    options = parser.parse_args()
+
+    workdir = options.workdir or tempfile.mkdtemp(prefix="metadetective-bench-")
+    try:
+        results = run_benchmarks(options, workdir)
+    finally:
+        if not options.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {name: value for name, value in vars(options).items()
+                       if name not in ("workdir", "save_baseline", "compare", "threshold")},
+        "results": results,
+    }
+
+    if options.save_baseline:
+        with open(options.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline written to {options.save_baseline}")
+
+    if options.compare:
+        with open(options.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("parameters") != report["parameters"]:
+            print("\nWARNING: The baseline was recorded with different parameters.")
+        if compare(results, baseline, options.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,26 +6,44 @@ Created By  : Franck FERMAN @franckferman
 Created Date: 27/08/23
 Version     : 1.0.9 (09/11/23)
 """
+from __future__ import annotations
 
 import argparse
+import atexit
+import codecs
+import contextlib
 import datetime
-import hashlib
-import http.client
+import functools
+import gzip
+import io
+import itertools
 import json
+import mmap
 import os
 import queue
 import re
+import shutil
+import stat
+import struct
 import subprocess
 import sys
 import threading
 import time
-import urllib.request
+import urllib.parse
+import zlib
 from argparse import Namespace
-from collections import defaultdict
-from html.parser import HTMLParser
-from typing import Any, Dict, List, Optional, Set, Tuple
-from urllib.parse import urlparse, urljoin, quote
+from collections import defaultdict, deque
+from collections.abc import ItemsView, Mapping, MutableMapping
+from typing import TYPE_CHECKING, Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+from urllib.parse import parse_qs, quote, urljoin, urlparse
 
+if TYPE_CHECKING:
+    import cProfile
+    import logging
+    import urllib.request
+
+# Heavy modules only some modes need (http.client, urllib.request, html.parser, hashlib, xml, ...)
+# are imported by the functions using them, which keeps startup fast for analysis runs.
 
 BANNER = r"""
 ___  ___     _       ______     _            _   _     	 	 _==\/==_
@@ -37,13 +55,13 @@ ___  ___     _       ______     _            _   _     	 	 _==\/==_
 """
 
 FIELDS = [
-    "File Name", "Title", "Creator", "Author", "Last Modified By", "Create Date", "Modify Date",
+    "File Name", "Message From", "Message Subject", "Message Date", "Title", "Creator", "Author", "Last Modified By", "Create Date", "Modify Date",
     "Hyperlinks", "Company", "Creator Tool", "Producer", "Software", "Camera Model Name", "Image Description",
     "Make", "Camera ID", "Camera Type 2", "Serial Number", "Internal Serial Number", "GPS Status", "GPS Altitude",
     "GPS Latitude", "GPS Longitude", "GPS Position", "Formatted GPS Position", "Address", "Map Link"
 ]
 UNIQUE_FIELDS = [
-    "Creator", "Author", "Last Modified By", "Hyperlinks", "Creator Tool",
+    "Message From", "Creator", "Author", "Last Modified By", "Hyperlinks", "Creator Tool",
     "Producer", "Software", "Camera Model Name", "Image Description", "Make",
     "Camera ID", "GPS Position", "Formatted GPS Position", "Map Link"
 ]
@@ -60,6 +78,8 @@ EXTENSIONS = [
 
 EXIFTOOL_NOT_INSTALLED = "Error: exiftool is not installed. Please install it to continue."
 EXIFTOOL_EXECUTION_ERROR = "Error: exiftool encountered an error."
+EXIFTOOL_CACHE_FILE = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+                                   "MetaDetective", "exiftool.json")
 
 NOMINATIM_HOST = "nominatim.openstreetmap.org"
 USER_AGENT = 'MetaDetective/1.0.9'
@@ -172,25 +192,878 @@ CSS_STYLE = """
     </style>
 """
 
+# Stylesheet of the paged reports (--html-page-size): no web font, animation nor hover effect, so that
+# pages open offline and at once, and entries out of view are not laid out (content-visibility).
+LIGHT_CSS_STYLE = """
+    <style>
+    body {
+        font-family: 'Helvetica', 'Arial', sans-serif;
+        color: #EAEAEA;
+        background-color: #171717;
+        padding: 20px;
+        margin: 0;
+    }
+
+    .header {
+        background-color: #333;
+        padding: 10px 0;
+        text-align: center;
+        border-radius: 5px;
+        margin-bottom: 20px;
+    }
+
+    .metadata-entry {
+        background-color: #1E1E1E;
+        padding: 15px;
+        border-radius: 5px;
+        margin-bottom: 15px;
+        content-visibility: auto;
+        contain-intrinsic-size: auto 250px;
+    }
+
+    p {
+        margin: 5px 0;
+    }
+
+    h3 {
+        color: #BBB;
+        border-bottom: 1px solid #444;
+        padding-bottom: 10px;
+    }
+
+    hr {
+        border: 0;
+        border-top: 1px solid #333;
+        margin-top: 10px;
+    }
+
+    a:link, a:visited {
+        color: #BBB;
+    }
+
+    .pages {
+        text-align: center;
+        color: #BBB;
+    }
+    </style>
+"""
+
 NOMINATIM_SEARCH_URL = "https://nominatim.openstreetmap.org/ui/search.html?q="
 
 SENTINEL = None
 
+# Fields whose values repeat across files (tools, organizations, people, devices), interned in MetadataRecord.
+# The others (names, dates, titles, positions, serial numbers) mostly differ for every file and would only
+# grow STRING_TABLE.
+INTERNED_FIELDS = {
+    "Message From", "Creator", "Author", "Last Modified By", "Company", "Creator Tool", "Producer", "Software",
+    "Camera Model Name", "Make", "Camera Type 2", "GPS Status"
+}
+
+GEOCODE_CACHE: Dict[Tuple[str, str], str] = {}
+GEOCODE_CACHE_LOCK = threading.Lock()
+# Number of addresses kept in GEOCODE_CACHE, the least recently used being dropped first.
+GEOCODE_CACHE_SIZE = 10000
+
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PROGRESS_INTERVAL = 0.25
+
+DEFAULT_MAX_PAGE_SIZE = 5 * 1024 * 1024
+READ_CHUNK_SIZE = 64 * 1024
+
+DEFAULT_PIPELINE_QUEUE_SIZE = 64
+
+FRONTIER_DEPTH_WEIGHT = 1.0
+FRONTIER_YIELD_WEIGHT = 0.5
+FRONTIER_MAX_YIELD = 10
+FRONTIER_HINT_BONUS = 3.0
+FRONTIER_PATH_HINTS = (
+    "/doc", "/download", "/media/", "/files/", "/uploads/", "/attachments/",
+    "/publications/", "/resources/", "/reports/", "/assets/", "/pdf"
+)
+
+WELL_KNOWN_SITEMAPS = ["/sitemap.xml", "/sitemap_index.xml", "/sitemap.xml.gz"]
+MAX_SITEMAPS = 1000
+
+REMOTE_HEAD_SIZE = 128 * 1024
+REMOTE_TAIL_SIZE = 64 * 1024
+REMOTE_OBJECT_SIZE = 4 * 1024
+REMOTE_ZIP_HEADER_SLACK = 1024
+ZIP_EXTENSIONS = {"docx", "xlsx", "xlsm", "pptx", "odt", "odp", "odf", "key"}
+REMOTE_TAIL_EXTENSIONS = ZIP_EXTENSIONS | {"pdf", "mp4", "mov"}
+ZIP_METADATA_MEMBERS = {"docProps/core.xml", "docProps/app.xml", "docProps/custom.xml", "meta.xml"}
+
+NATIVE_EXTRACTION = True
+FILE_TIMEOUT = 0.0
+DEADLINE: Optional[float] = None
+OFFICE_EXTENSIONS = {"docx", "xlsx", "xlsm", "pptx", "odt", "odp", "odf"}
+OFFICE_MAX_MEMBER_SIZE = 1024 * 1024
+# Element local names of each metadata part and the fields they fill. Names match exiftool's
+# output where it is in FIELDS; ODF authorship goes to the nearest FIELDS entry. Application names are
+# left out: exiftool reports them as "Application" or "Generator", which FIELDS does not list.
+OFFICE_METADATA_PARTS = {
+    "docProps/core.xml": {"title": "Title", "creator": "Creator", "lastModifiedBy": "Last Modified By",
+                          "created": "Create Date", "modified": "Modify Date"},
+    "docProps/app.xml": {"Company": "Company"},
+    "meta.xml": {"title": "Title", "initial-creator": "Author", "creator": "Creator", "creation-date": "Create Date",
+                 "date": "Modify Date"},
+}
+
+PDF_TAIL_SIZE = 64 * 1024
+PDF_MAX_OBJECT_SIZE = 64 * 1024
+XMP_MAX_SIZE = 1024 * 1024
+# PDF Info keys that exiftool renames; the other keys are printed with spaces between their words.
+PDF_INFO_FIELDS = {"CreationDate": "Create Date", "ModDate": "Modify Date"}
+# XMP property local names and the fields they fill, where the PDF Info dictionary or EXIF has none.
+XMP_FIELDS = {"title": "Title", "creator": "Creator", "CreatorTool": "Creator Tool", "Producer": "Producer",
+              "CreateDate": "Create Date", "ModifyDate": "Modify Date"}
+XMP_SIGNATURE = b"http://ns.adobe.com/xap/1.0/\0"
+
+EXIF_EXTENSIONS = {"jpg", "jpeg", "tif", "tiff"}
+NATIVE_EXTENSIONS = OFFICE_EXTENSIONS | EXIF_EXTENSIONS | {"pdf"}
+# Tags of IFD0 and of the Exif IFD, with the names exiftool prints for them.
+EXIF_TAGS = {0x010E: "Image Description", 0x010F: "Make", 0x0110: "Camera Model Name", 0x0131: "Software",
+             0x0132: "Modify Date", 0x9004: "Create Date", 0xA431: "Serial Number"}
+EXIF_IFD_POINTER = 0x8769
+# Maker notes are vendor-specific and only exiftool decodes them. exif_tags reports their presence under
+# MAKER_NOTE_FIELD, so that pictures holding them are left to exiftool when one of these fields is requested.
+MAKER_NOTE_TAG = 0x927C
+MAKER_NOTE_FIELD = "Maker Note"
+MAKER_NOTE_FIELDS = {"Camera ID", "Camera Type 2", "Internal Serial Number"}
+GPS_IFD_POINTER = 0x8825
+GPS_STATUS = {"A": "Measurement Active", "V": "Measurement Void"}
+TIFF_TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 7: 1, 9: 4, 10: 8}
+TIFF_MAX_ENTRIES = 1024
+
+ARCHIVE_SEPARATOR = "!/"
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+ARCHIVE_MEMBER_MEMORY_SIZE = 64 * 1024 * 1024
+# Uncompressed size of the members listed by list_archive_members, by virtual path (see estimate_extraction_cost).
+ARCHIVE_MEMBER_SIZES: Dict[str, int] = {}
+MBOX_EXTENSIONS = (".mbox", ".mbx")
+MAIL_EXTENSIONS = (".eml", ".email", ".emlx") + MBOX_EXTENSIONS
+
+# Extraction costs are estimated in bytes read: each file costs the overhead (exiftool startup, headers),
+# and the size of the files with a native reader counts for a fraction only, since just their metadata is read.
+PLAN_FILE_OVERHEAD = 256 * 1024
+PLAN_NATIVE_FACTOR = 0.05
+PLAN_LARGE_FILE_COST = 16 * 1024 * 1024
+PLAN_TASKS_PER_JOB = 4
+
+DEDUPE_PARTIAL_SIZE = 64 * 1024
+# Groups of files with the same content found by --dedupe, each in file order, listed in the report.
+DUPLICATE_GROUPS: List[List[str]] = []
+
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_LEASE_TIMEOUT = 300.0
+DISTRIBUTED_MAX_ATTEMPTS = 3
+DISTRIBUTED_POLL_INTERVAL = 1.0
+DISTRIBUTED_CONNECT_ATTEMPTS = 10
+
+DEFAULT_SERVE_WORKERS = 4
+SERVE_MAX_UPLOAD_SIZE = 256 * 1024 * 1024
+# Number of quarantined files remembered by a long-running --serve process.
+SERVE_QUARANTINE_SIZE = 1000
+
 
 def show_banner() -> None:
     """Print the banner."""
     print(BANNER)
 
 
-def check_exiftool_installed() -> None:
-    """Verify exiftool installation and exit the program if absent or on execution error."""
+def check_exiftool_installed() -> str:
+    """
+    Verify exiftool installation and exit the program if absent or on execution error.
+
+    The version reported by an exiftool binary is cached in EXIFTOOL_CACHE_FILE, keyed by the
+    binary's path, size and modification time, so "exiftool -ver" only runs when it changes.
+
+    Returns:
+        str: The exiftool version.
+    """
+    path = shutil.which("exiftool")
+    key = None
+    if path:
+        try:
+            info = os.stat(path)
+            key = f"{os.path.realpath(path)}:{info.st_size}:{info.st_mtime_ns}"
+            with open(EXIFTOOL_CACHE_FILE) as f:
+                cache = json.load(f)
+            if key in cache:
+                return cache[key]
+        except (OSError, ValueError):
+            pass
+
     try:
-        subprocess.run(["exiftool", "-ver"], capture_output=True, check=True, text=True)
+        result = subprocess.run(["exiftool", "-ver"], capture_output=True, check=True, text=True)
     except FileNotFoundError:
         sys.exit(EXIFTOOL_NOT_INSTALLED)
     except subprocess.CalledProcessError:
         sys.exit(EXIFTOOL_EXECUTION_ERROR)
 
+    version = result.stdout.strip()
+    if key:
+        try:
+            os.makedirs(os.path.dirname(EXIFTOOL_CACHE_FILE), exist_ok=True)
+            with open(EXIFTOOL_CACHE_FILE, "w") as f:
+                json.dump({key: version}, f)
+        except OSError:
+            pass
+    return version
+
+
+class LazyLogger:
+    """
+    Stand-in for a logger, importing logging and creating the logger on first use.
+
+    logging alone takes a noticeable share of the startup time, which runs printing no message
+    (e.g. --help) do without.
+    """
+
+    def __init__(self, name: str) -> None:
+        """
+        Initialize a LazyLogger instance.
+
+        name (str): Name of the logger.
+        """
+        self.name = name
+        self.lock = threading.Lock()
+        self.logger: Optional[logging.Logger] = None
+
+    def get(self) -> logging.Logger:
+        """
+        Return the logger, creating it with a NullHandler on first use.
+
+        Returns:
+            logging.Logger: The logger.
+        """
+        with self.lock:
+            if self.logger is None:
+                import logging
+
+                self.logger = logging.getLogger(self.name)
+                self.logger.addHandler(logging.NullHandler())
+            return self.logger
+
+    def __getattr__(self, name: str) -> Any:
+        """Forward the other attributes (info, warning, handlers, ...) to the logger."""
+        return getattr(self.logger or self.get(), name)
+
+
+# Messages (progress, errors) go through this logger. The command line prints them (see progress_handler);
+# programs using MetaDetective as a library (see Engine) configure logging as they see fit.
+LOGGER = LazyLogger("MetaDetective")
+
+
+class Metrics:
+    """Thread-safe registry of counters, gauges and histograms describing a run."""
+
+    def __init__(self) -> None:
+        """Initialize an empty Metrics registry."""
+        self.started = time.monotonic()
+        self.counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = defaultdict(float)
+        self.gauges: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self.histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], List[float]] = {}
+        self.lock = threading.Lock()
+
+    def increment(self, name: str, value: float = 1, **labels: str) -> None:
+        """
+        Add a value to a counter.
+
+        Args:
+            name (str): Name of the counter.
+            value (float): Value to add.
+            **labels (str): Labels distinguishing the series, e.g. host="example.com".
+        """
+        with self.lock:
+            self.counters[(name, tuple(sorted(labels.items())))] += value
+
+    def set_gauge(self, name: str, value: float, **labels: str) -> None:
+        """
+        Set a gauge to its current value.
+
+        Args:
+            name (str): Name of the gauge.
+            value (float): Current value.
+            **labels (str): Labels distinguishing the series.
+        """
+        with self.lock:
+            self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """
+        Record a value in a histogram with the METRICS_BUCKETS boundaries.
+
+        Args:
+            name (str): Name of the histogram.
+            value (float): Observed value, in seconds for durations.
+            **labels (str): Labels distinguishing the series.
+        """
+        with self.lock:
+            # Layout: one cumulative count per bucket, then +Inf count and sum.
+            histogram = self.histograms.setdefault((name, tuple(sorted(labels.items()))), [0.0] * (len(METRICS_BUCKETS) + 2))
+            for index, bound in enumerate(METRICS_BUCKETS):
+                if value <= bound:
+                    histogram[index] += 1
+            histogram[-2] += 1
+            histogram[-1] += value
+
+    @contextlib.contextmanager
+    def timer(self, name: str, **labels: str) -> Iterator[None]:
+        """
+        Time the enclosed block and record its duration in a histogram.
+
+        Args:
+            name (str): Name of the histogram.
+            **labels (str): Labels distinguishing the series.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def counter_total(self, name: str) -> float:
+        """Return the sum of a counter over all of its label values."""
+        with self.lock:
+            return sum(value for (key, _), value in self.counters.items() if key == name)
+
+    def histogram_total(self, name: str) -> Tuple[float, float]:
+        """Return the number of observations and their sum for a histogram over all of its label values."""
+        with self.lock:
+            matching = [histogram for (key, _), histogram in self.histograms.items() if key == name]
+        return sum(h[-2] for h in matching), sum(h[-1] for h in matching)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Return the metrics as a JSON serializable dictionary.
+
+        Returns:
+            Dict[str, Any]: Elapsed time, counters, gauges and histograms, each series holding its labels.
+        """
+        with self.lock:
+            return {
+                "elapsed_seconds": time.monotonic() - self.started,
+                "counters": [{"name": name, "labels": dict(labels), "value": value}
+                             for (name, labels), value in sorted(self.counters.items())],
+                "gauges": [{"name": name, "labels": dict(labels), "value": value}
+                           for (name, labels), value in sorted(self.gauges.items())],
+                "histograms": [{"name": name, "labels": dict(labels),
+                                "buckets": dict(zip([str(b) for b in METRICS_BUCKETS] + ["+Inf"], h[:-1])),
+                                "count": h[-2], "sum": h[-1]}
+                               for (name, labels), h in sorted(self.histograms.items())],
+            }
+
+    def to_prometheus(self) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics, each name prefixed with "metadetective_".
+        """
+        def escape(value: str) -> str:
+            return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+        def series(name: str, labels: Dict[str, str]) -> str:
+            if not labels:
+                return f"metadetective_{name}"
+            rendered = ",".join(f'{key}="{escape(str(value))}"' for key, value in labels.items())
+            return f"metadetective_{name}{{{rendered}}}"
+
+        snapshot = self.snapshot()
+        lines = ["# TYPE metadetective_elapsed_seconds gauge", f"metadetective_elapsed_seconds {snapshot['elapsed_seconds']}"]
+        declared: Set[str] = set()
+        for kind, entries in (("counter", snapshot["counters"]), ("gauge", snapshot["gauges"])):
+            for entry in entries:
+                if entry["name"] not in declared:
+                    declared.add(entry["name"])
+                    lines.append(f"# TYPE metadetective_{entry['name']} {kind}")
+                lines.append(f"{series(entry['name'], entry['labels'])} {entry['value']}")
+        for entry in snapshot["histograms"]:
+            if entry["name"] not in declared:
+                declared.add(entry["name"])
+                lines.append(f"# TYPE metadetective_{entry['name']} histogram")
+            for bound, count in entry["buckets"].items():
+                lines.append(f"{series(entry['name'] + '_bucket', {**entry['labels'], 'le': bound})} {count}")
+            lines.append(f"{series(entry['name'] + '_count', entry['labels'])} {entry['count']}")
+            lines.append(f"{series(entry['name'] + '_sum', entry['labels'])} {entry['sum']}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """Return a one-line human readable summary of the run."""
+        elapsed = time.monotonic() - self.started
+        requests = self.counter_total("http_requests_total")
+        wire_bytes = self.counter_total("http_bytes_total")
+        html_bytes = self.counter_total("html_wire_bytes_total")
+        content_bytes = self.counter_total("html_content_bytes_total")
+        files, exiftool_time = self.histogram_total("exiftool_seconds")
+        with self.lock:
+            depth = sum(value for (name, _), value in self.gauges.items() if name == "queue_depth")
+        ratio = content_bytes / html_bytes if html_bytes else 1.0
+        return (f"[metrics] {elapsed:.1f}s | {requests:.0f} requests ({requests / elapsed if elapsed else 0:.1f}/s) | "
+                f"{wire_bytes / 1024:.0f} KiB received | HTML compression {ratio:.1f}x | queued {depth:.0f} | "
+                f"{files:.0f} files extracted ({exiftool_time / files if files else 0:.3f}s avg) | "
+                f"geocode cache hits {self.counter_total('geocode_cache_hits_total'):.0f}")
+
+    def write(self, path: str, output_format: str = "json") -> None:
+        """
+        Write the metrics to a file.
+
+        Args:
+            path (str): Path of the file to write.
+            output_format (str): 'json' or 'prometheus'.
+        """
+        with open(path, "w") as f:
+            if output_format == "prometheus":
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.snapshot(), f, indent=2)
+
+
+METRICS = Metrics()
+
+
+class MetricsReporter:
+    """Background thread printing a live metrics summary to stderr at a fixed interval."""
+
+    def __init__(self, interval: float):
+        """
+        Initialize a MetricsReporter instance.
+
+        interval (float): Number of seconds between two summaries.
+        """
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            print(METRICS.summary(), file=sys.stderr)
+
+    def start(self) -> None:
+        """Start printing summaries."""
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Stop printing summaries."""
+        self.stopped.set()
+
+
+def finish_metrics(args: Namespace, reporter: Optional[MetricsReporter] = None) -> None:
+    """
+    Print the final metrics summary to stderr and write the metrics file, as requested in the arguments.
+
+    Args:
+        args (Namespace): The parsed command-line arguments (metrics options).
+        reporter (Optional[MetricsReporter]): The live reporter to stop, if any.
+    """
+    if reporter:
+        reporter.stop()
+    if args.metrics_interval or args.metrics_file:
+        print(METRICS.summary(), file=sys.stderr)
+    if args.metrics_file:
+        METRICS.write(args.metrics_file, args.metrics_format)
+
+
+class Profiler:
+    """Per-stage timers of a run, with optional cProfile and tracemalloc captures."""
+
+    def __init__(self) -> None:
+        """Initialize a disabled Profiler; stages cost a single attribute check until start() is called."""
+        self.enabled = False
+        self.cpu = False
+        self.memory = False
+        self.started = time.perf_counter()
+        # Layout: stage name -> [calls, seconds, traced memory delta in bytes].
+        self.stages: Dict[str, List[float]] = {}
+        self.profiles: List[cProfile.Profile] = []
+        self.lock = threading.Lock()
+
+    def start(self, captures: List[str]) -> None:
+        """
+        Enable the stage timers and the requested captures.
+
+        Args:
+            captures (List[str]): Captures to run on top of the timers: 'cprofile' and/or 'memory'.
+        """
+        import cProfile
+        import tracemalloc
+
+        self.enabled = True
+        self.cpu = "cprofile" in captures
+        self.memory = "memory" in captures
+        self.started = time.perf_counter()
+        if self.memory:
+            tracemalloc.start()
+        if self.cpu:
+            profile = cProfile.Profile()
+            self.profiles.append(profile)
+            profile.enable()
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Time the enclosed block as part of a pipeline stage.
+
+        Stages may run in several threads and be nested (enrichment happens while rendering),
+        so their times add up per stage and can exceed the wall time.
+
+        Args:
+            name (str): Name of the stage (discovery, extraction, enrichment, rendering, export, crawl).
+        """
+        if not self.enabled:
+            yield
+            return
+        import tracemalloc
+
+        memory_before = tracemalloc.get_traced_memory()[0] if self.memory else 0
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            memory_delta = tracemalloc.get_traced_memory()[0] - memory_before if self.memory else 0
+            METRICS.observe("stage_seconds", elapsed, stage=name)
+            with self.lock:
+                totals = self.stages.setdefault(name, [0, 0.0, 0])
+                totals[0] += 1
+                totals[1] += elapsed
+                totals[2] += memory_delta
+
+    def wrap(self, target: Callable) -> Callable:
+        """
+        Return a thread target running under its own cProfile profile when CPU profiling is on.
+
+        cProfile only follows the thread that enabled it, so each worker thread needs its own profile.
+        Where the interpreter allows a single active profiler, workers run unprofiled.
+
+        Args:
+            target (Callable): The thread target.
+
+        Returns:
+            Callable: The wrapped target, or target itself when CPU profiling is off.
+        """
+        if not self.cpu:
+            return target
+
+        def run(*args, **kwargs):
+            import cProfile
+
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                return target(*args, **kwargs)
+            with self.lock:
+                self.profiles.append(profile)
+            try:
+                return target(*args, **kwargs)
+            finally:
+                profile.disable()
+
+        return run
+
+    def report(self) -> str:
+        """
+        Return the per-stage breakdown, followed by the memory statistics when tracemalloc ran.
+
+        Returns:
+            str: The breakdown as a text table.
+        """
+        import tracemalloc
+
+        wall = time.perf_counter() - self.started
+        memory_header = f" {'Memory KiB'.rjust(12)}" if self.memory else ""
+        lines = [f"Profile: {wall:.3f}s wall time (nested and concurrent stages overlap)",
+                 f"{'Stage'.ljust(12)} {'Calls'.rjust(8)} {'Seconds'.rjust(10)} {'% wall'.rjust(8)}{memory_header}"]
+        with self.lock:
+            stages = sorted(self.stages.items(), key=lambda item: -item[1][1])
+        for name, (calls, seconds, memory_delta) in stages:
+            memory_column = f" {memory_delta / 1024:>12.0f}" if self.memory else ""
+            lines.append(f"{name.ljust(12)} {calls:>8.0f} {seconds:>10.3f} {seconds / wall * 100 if wall else 0:>7.1f}%{memory_column}")
+        if self.memory and tracemalloc.is_tracing():
+            peak = tracemalloc.get_traced_memory()[1]
+            lines.append(f"Peak traced memory: {peak / 1024:.0f} KiB")
+            lines.append("Top allocations:")
+            lines.extend(f"    {line}" for line in tracemalloc.take_snapshot().statistics("lineno")[:10])
+        return "\n".join(lines)
+
+    def finish(self, path_prefix: str) -> None:
+        """
+        Stop the captures, print the breakdown to stderr and write it with the collected profiles.
+
+        Args:
+            path_prefix (str): Path without extension of the files to write: the breakdown
+                goes to "<path_prefix>.txt" and the merged cProfile data to "<path_prefix>.pstats".
+        """
+        import pstats
+        import tracemalloc
+
+        if self.profiles:
+            self.profiles[0].disable()
+        breakdown = self.report()
+        if self.memory:
+            tracemalloc.stop()
+        print(breakdown, file=sys.stderr)
+
+        with open(f"{path_prefix}.txt", "w") as f:
+            f.write(breakdown + "\n")
+        if self.profiles:
+            stats = pstats.Stats(self.profiles[0])
+            for profile in self.profiles[1:]:
+                stats.add(profile)
+            stats.dump_stats(f"{path_prefix}.pstats")
+            print(f"Profile written to {path_prefix}.pstats (open with: python3 -m pstats {path_prefix}.pstats)", file=sys.stderr)
+
+
+PROFILER = Profiler()
+
+
+def finish_profile(args: Namespace) -> None:
+    """
+    Write the profile of the run, as requested in the arguments.
+
+    Args:
+        args (Namespace): The parsed command-line arguments (profile options).
+    """
+    if args.profile is None:
+        return
+    path_prefix = args.profile_out
+    if not path_prefix:
+        timestamp = datetime.datetime.now().strftime('%Y_%m_%d-%H_%M_%S')
+        path_prefix = os.path.join(args.out, f"MetaDetective_Profile-{timestamp}")
+    PROFILER.finish(path_prefix)
+
+
+class ProgressReporter:
+    """Single-line progress display (files/s, bytes/s, queue depth, ETA) for interactive terminals.
+
+    Events only bump counters; one background thread redraws the line every PROGRESS_INTERVAL
+    seconds, so the cost of reporting does not grow with the event rate. The reporter stays
+    inactive when stdout is not a TTY, and everything is then printed as usual.
+    """
+
+    def __init__(self, interval: float = PROGRESS_INTERVAL):
+        """
+        Initialize an inactive ProgressReporter.
+
+        interval (float): Number of seconds between two redraws.
+        """
+        self.interval = interval
+        self.active = False
+        self.stream = sys.stdout
+        self.total = 0
+        self.queue_depth: Optional[Callable[[], int]] = None
+        self.files = self.extracted = self.pages = self.bytes = 0
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+        self.output_lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self, total: int = 0, queue_depth: Optional[Callable[[], int]] = None,
+              stream: Optional[BinaryIO] = None) -> None:
+        """
+        Start displaying progress, unless the stream is not a terminal.
+
+        Args:
+            total (int): Number of files expected, used for the ETA (0 when unknown).
+            queue_depth (Optional[Callable[[], int]]): Function returning the number of queued items.
+            stream: Stream receiving the progress line. Defaults to sys.stdout.
+        """
+        stream = stream or sys.stdout
+        if self.active or not stream.isatty():
+            return
+        self.stream = stream
+        self.total = total
+        self.queue_depth = queue_depth
+        self.files = self.extracted = self.pages = self.bytes = 0
+        self.started = time.monotonic()
+        self.stopped.clear()
+        self.active = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def update(self, files: int = 0, nbytes: int = 0, pages: int = 0, extracted: int = 0) -> None:
+        """
+        Count processed items.
+
+        Args:
+            files (int): Files analyzed, downloaded or found.
+            nbytes (int): Bytes read or downloaded.
+            pages (int): Pages crawled.
+            extracted (int): Files whose metadata was extracted while crawling.
+        """
+        if not self.active:
+            return
+        with self.lock:
+            self.files += files
+            self.bytes += nbytes
+            self.pages += pages
+            self.extracted += extracted
+
+    def render(self) -> str:
+        """Return the progress line for the counters at this instant."""
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        with self.lock:
+            files, extracted, pages, nbytes = self.files, self.extracted, self.pages, self.bytes
+        depth = self.queue_depth() if self.queue_depth else 0
+
+        parts = [f"{pages} pages"] if pages else []
+        parts.append(f"{files}/{self.total} files" if self.total else f"{files} files")
+        if extracted:
+            parts.append(f"{extracted} extracted")
+        parts.append(f"{files / elapsed:.1f} files/s")
+        parts.append(f"{nbytes / elapsed / (1024 * 1024):.2f} MiB/s")
+        if self.queue_depth:
+            parts.append(f"queued {depth}")
+
+        if self.total and files:
+            remaining = (self.total - files) / (files / elapsed)
+        elif self.queue_depth and pages:
+            remaining = depth / (pages / elapsed)
+        else:
+            remaining = None
+        parts.append(f"ETA {datetime.timedelta(seconds=int(remaining))}" if remaining is not None else "ETA --:--:--")
+        return "[progress] " + " | ".join(parts)
+
+    def _draw(self) -> None:
+        line = self.render()[:max(shutil.get_terminal_size().columns - 1, 20)]
+        with self.output_lock:
+            self.stream.write(f"\r{line}\033[K")
+            self.stream.flush()
+
+    def _run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            self._draw()
+
+    def info(self, message: str) -> None:
+        """Print a per-item message, dropped while the progress line stands in for it."""
+        if not self.active:
+            print(message)
+
+    def log(self, message: str) -> None:
+        """Print a message above the progress line."""
+        if not self.active:
+            print(message)
+            return
+        with self.output_lock:
+            self.stream.write(f"\r\033[K{message}\n")
+            self.stream.flush()
+
+    @contextlib.contextmanager
+    def pause(self) -> Iterator[None]:
+        """Clear the progress line and keep it from being redrawn while the enclosed block prints."""
+        if not self.active:
+            yield
+            return
+        with self.output_lock:
+            self.stream.write("\r\033[K")
+            self.stream.flush()
+            yield
+
+    def stop(self) -> None:
+        """Draw the final progress line and stop the display."""
+        if not self.active:
+            return
+        self.stopped.set()
+        self.thread.join()
+        self._draw()
+        self.stream.write("\n")
+        self.stream.flush()
+        self.active = False
+
+
+PROGRESS = ProgressReporter()
+
+
+@functools.lru_cache(maxsize=None)
+def progress_handler() -> type:
+    """
+    Build the logging handler printing the messages of LOGGER on the command line.
+
+    The class is built on first use, so that logging is only imported once it is needed (see LazyLogger).
+
+    Returns:
+        type: A logging.Handler subclass.
+    """
+    import logging
+
+    class ProgressHandler(logging.Handler):
+        """Logging handler printing the messages of LOGGER on the command line, as "LEVEL: message".
+
+        Warnings and errors are printed above the progress line; per-item information is dropped
+        while the progress line stands in for it (see ProgressReporter.log and ProgressReporter.info).
+        """
+
+        def emit(self, record: logging.LogRecord) -> None:
+            """Print a log record through PROGRESS."""
+            try:
+                message = f"{record.levelname}: {record.getMessage()}"
+                if record.levelno >= logging.WARNING:
+                    PROGRESS.log(message)
+                else:
+                    PROGRESS.info(message)
+            except Exception:
+                self.handleError(record)
+
+    return ProgressHandler
+
+
+class MeteredStream:
+    """Readable stream wrapper counting the bytes read into the http_bytes_total metric."""
+
+    def __init__(self, stream: BinaryIO, kind: str):
+        """
+        Initialize a MeteredStream instance.
+
+        stream (BinaryIO): The stream to wrap, typically an HTTP response.
+        kind (str): The kind label of the counted bytes.
+        """
+        self.stream = stream
+        self.kind = kind
+
+    def read(self, size: int = -1) -> bytes:
+        """Read from the wrapped stream and count the bytes returned."""
+        data = self.stream.read(size)
+        METRICS.increment("http_bytes_total", len(data), kind=self.kind)
+        return data
+
+
+def open_url(request: Union[str, urllib.request.Request], kind: str):
+    """
+    Open a URL while recording request count, status code and per-host latency metrics.
+
+    Args:
+        request (Union[str, urllib.request.Request]): The URL or request to open.
+        kind (str): What the request is for (page, download, range, sitemap, ...).
+
+    Returns:
+        The response returned by urllib.request.urlopen.
+
+    Raises:
+        urllib.error.URLError: If there's an issue with opening the URL.
+    """
+    import urllib.request
+
+    url = request.full_url if isinstance(request, urllib.request.Request) else request
+    host = urlparse(url).netloc
+    start = time.perf_counter()
+    try:
+        response = urllib.request.urlopen(request)
+        status = str(getattr(response, "status", ""))
+        return response
+    except urllib.error.HTTPError as e:
+        status = str(e.code)
+        raise
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        METRICS.increment("http_requests_total", kind=kind, status=status)
+        METRICS.observe("http_request_seconds", time.perf_counter() - start, host=host)
+
 
 def dms_to_dd(degrees: int, minutes: int, seconds: float, direction: str) -> float:
     """
@@ -251,36 +1124,22 @@ def parse_dms(dms_str: str) -> Optional[Tuple[int, int, float, str]]:
     raise ValueError(f"Invalid DMS format: {dms_str}")
 
 
-def get_metadata(file_path: str, fields: List[str]) -> dict:
+def parse_exiftool_output(output: str, fields: List[str]) -> Dict[str, str]:
     """
-    Retrieve specified metadata fields from a file using exiftool.
+    Parse the output of exiftool and keep the specified metadata fields.
 
     Args:
-        file_path (str): Path of the file to analyze.
+        output (str): The text printed by exiftool.
         fields (List[str]): List of metadata fields to extract.
 
     Returns:
-        dict: Dictionary containing the extracted metadata.
-
-    Raises:
-        subprocess.CalledProcessError: If there's an error executing exiftool.
-        UnicodeDecodeError: If there's an error decoding the exiftool output.
+        Dict[str, str]: Dictionary containing the extracted metadata, with a
+        "Formatted GPS Position" in decimal degrees when GPS data is present.
     """
-    try:
-        exiftool_output = subprocess.run(["exiftool", file_path], capture_output=True, text=True, check=True)
-    except subprocess.CalledProcessError as e:
-        print(f"Error executing exiftool: {e}")
-        print()
-        return {}
-    except UnicodeDecodeError as e:
-        print(f"Error decoding output for file {file_path}: {e}")
-        print()
-        return {}
-
     field_set = set(fields)
     metadata = {}
 
-    for line in exiftool_output.stdout.splitlines():
+    for line in output.splitlines():
         if ":" not in line:
             continue
         key, value = line.split(":", 1)
@@ -288,93 +1147,1545 @@ def get_metadata(file_path: str, fields: List[str]) -> dict:
         if key in field_set and value.strip():
             metadata[key] = value.strip()
 
-    lat_dd, lon_dd = None, None
-    gps_position = metadata.get("GPS Position", None)
-    if gps_position:
-        lat_str, lon_str = gps_position.split(", ")
-        lat_dd = dms_to_dd(*parse_dms(lat_str))
-        lon_dd = dms_to_dd(*parse_dms(lon_str))
-    else:
-        gps_lat = metadata.get("GPS Latitude", None)
-        gps_lon = metadata.get("GPS Longitude", None)
-        if gps_lat and gps_lon:
-            lat_dd = dms_to_dd(*parse_dms(gps_lat))
-            lon_dd = dms_to_dd(*parse_dms(gps_lon))
+    format_gps_position(metadata)
+    return metadata
+
+
+def format_gps_position(metadata: Dict[str, str]) -> None:
+    """
+    Add the "Formatted GPS Position" field, in decimal degrees, to metadata holding GPS coordinates.
+
+    Args:
+        metadata (Dict[str, str]): The metadata, with exiftool's "GPS Position" or "GPS Latitude"
+                                   and "GPS Longitude" fields. It is modified in-place.
+
+    Raises:
+        ValueError: If the coordinates are not in the DMS format printed by exiftool.
+    """
+    lat_dd, lon_dd = None, None
+    gps_position = metadata.get("GPS Position", None)
+    if gps_position:
+        lat_str, lon_str = gps_position.split(", ")
+        lat_dd = dms_to_dd(*parse_dms(lat_str))
+        lon_dd = dms_to_dd(*parse_dms(lon_str))
+    else:
+        gps_lat = metadata.get("GPS Latitude", None)
+        gps_lon = metadata.get("GPS Longitude", None)
+        if gps_lat and gps_lon:
+            lat_dd = dms_to_dd(*parse_dms(gps_lat))
+            lon_dd = dms_to_dd(*parse_dms(gps_lon))
+
+    if lat_dd is not None and lon_dd is not None:
+        metadata["Formatted GPS Position"] = f"{lat_dd:.6f}, {lon_dd:.6f}"
+
+
+def exif_date(value: str) -> str:
+    """
+    Convert an ISO 8601 date-time to the notation exiftool prints, e.g. "2023-09-01T10:00:00Z" to "2023:09:01 10:00:00Z".
+
+    Args:
+        value (str): The ISO 8601 date-time.
+
+    Returns:
+        str: The date-time in exiftool notation, or value unchanged if it is not an ISO 8601 date-time.
+    """
+    match = re.match(r"(\d{4})-(\d{2})-(\d{2})T(.+)", value)
+    return f"{match[1]}:{match[2]}:{match[3]} {match[4]}" if match else value
+
+
+def get_office_metadata(source: Union[str, BinaryIO], fields: List[str], name: Optional[str] = None) -> Optional[Dict[str, str]]:
+    """
+    Read the metadata of an OOXML (docx, xlsx, pptx) or ODF (odt, odp) document without exiftool.
+
+    Only the small XML parts holding the document properties (docProps/core.xml, docProps/app.xml
+    and meta.xml) are decompressed and parsed.
+
+    Args:
+        source (Union[str, BinaryIO]): Path of the document, or a seekable binary stream holding it.
+        fields (List[str]): List of metadata fields to extract.
+        name (Optional[str]): Name reported in the "File Name" field. Defaults to the base name of source.
+
+    Returns:
+        Optional[Dict[str, str]]: Dictionary containing the extracted metadata, or None if the document
+        holds none of the metadata parts or cannot be read, so that exiftool can take over.
+    """
+    import zipfile
+    from xml.etree import ElementTree
+
+    metadata = {"File Name": name or os.path.basename(source)}
+    found = False
+    try:
+        with zipfile.ZipFile(source) as archive:
+            for part, tags in OFFICE_METADATA_PARTS.items():
+                try:
+                    info = archive.getinfo(part)
+                except KeyError:
+                    continue
+                if info.file_size > OFFICE_MAX_MEMBER_SIZE:
+                    return None
+                root = ElementTree.fromstring(archive.read(info))
+                found = True
+
+                for element in root.iter():
+                    tag = element.tag.rsplit("}", 1)[-1]
+                    if tag == "HLinks":
+                        # Each hyperlink is a group of six variants, the fifth holding the address.
+                        variants = [variant[0].text or "" for variant in element.iter() if variant.tag.endswith("}variant") and len(variant)]
+                        links = [link for link in variants[4::6] if link]
+                        if links:
+                            metadata["Hyperlinks"] = ", ".join(links)
+                        continue
+                    field = tags.get(tag)
+                    value = (element.text or "").strip()
+                    if field and value and field not in metadata:
+                        metadata[field] = exif_date(value) if field.endswith(" Date") else value
+    except (OSError, EOFError, RuntimeError, ValueError, zipfile.BadZipFile, zlib.error, ElementTree.ParseError):
+        return None
+
+    if not found:
+        return None
+    return {field: value for field, value in metadata.items() if field in fields}
+
+
+def pdf_literal(data: bytes, start: int) -> Tuple[bytes, int]:
+    """
+    Decode the PDF literal string opening at the given position, e.g. b"(Ai \\(Haibara\\))".
+
+    Args:
+        data (bytes): The raw PDF data.
+        start (int): Position of the opening parenthesis.
+
+    Returns:
+        Tuple[bytes, int]: The string with its escape sequences decoded, and the position following it.
+
+    Raises:
+        ValueError: If the string is not terminated.
+    """
+    escapes = {ord("n"): b"\n", ord("r"): b"\r", ord("t"): b"\t", ord("b"): b"\b", ord("f"): b"\f"}
+    value = bytearray()
+    depth = 0
+    position = start
+    while position < len(data):
+        char = data[position]
+        if char == 0x5C:
+            position += 1
+            escape = data[position] if position < len(data) else 0
+            octal = re.match(rb"[0-7]{1,3}", data[position:position + 3])
+            if octal:
+                value.append(int(octal.group(), 8) & 0xFF)
+                position += len(octal.group()) - 1
+            elif escape in escapes:
+                value += escapes[escape]
+            elif escape == 0x0D and data[position + 1:position + 2] == b"\n":
+                position += 1
+            elif escape != 0x0A:
+                value.append(escape)
+        elif char == 0x28:
+            depth += 1
+            if depth > 1:
+                value.append(char)
+        elif char == 0x29:
+            depth -= 1
+            if not depth:
+                return bytes(value), position + 1
+            value.append(char)
+        else:
+            value.append(char)
+        position += 1
+    raise ValueError("Unterminated PDF string.")
+
+
+def pdf_text(value: bytes) -> str:
+    """
+    Decode a PDF text string, encoded in UTF-16BE or UTF-8 with a byte order mark, or in PDFDocEncoding.
+
+    Args:
+        value (bytes): The raw string.
+
+    Returns:
+        str: The decoded text.
+    """
+    if value.startswith(codecs.BOM_UTF16_BE):
+        return value[2:].decode("utf-16-be", "replace")
+    if value.startswith(codecs.BOM_UTF8):
+        return value[3:].decode("utf-8", "replace")
+    return value.decode("latin-1")
+
+
+def pdf_value(data: bytes, start: int) -> Tuple[Union[bytes, int, None], int]:
+    """
+    Read the value of a PDF dictionary entry, when it is a string or an indirect reference.
+
+    Args:
+        data (bytes): The raw PDF data.
+        start (int): Position of the value.
+
+    Returns:
+        Tuple[Union[bytes, int, None], int]: The raw string, the referenced object number, or None
+        for any other kind of value, and the position following the value.
+    """
+    match = re.compile(rb"\s*(?:(\()|<([0-9A-Fa-f\s]*)>|(\d+)\s+\d+\s+R\b)").match(data, start)
+    if not match:
+        return None, start
+    if match.group(1):
+        return pdf_literal(data, match.start(1))
+    if match.group(2) is not None:
+        digits = re.sub(rb"\s", b"", match.group(2))
+        return bytes.fromhex((digits + b"0" * (len(digits) % 2)).decode()), match.end()
+    return int(match.group(3)), match.end()
+
+
+def pdf_date(value: str) -> str:
+    """
+    Convert a PDF date to the notation exiftool prints, e.g. "D:20230831185300+02'00'" to "2023:08:31 18:53:00+02:00".
+
+    Args:
+        value (str): The PDF date.
+
+    Returns:
+        str: The date in exiftool notation, or value unchanged if it is not a PDF date.
+    """
+    match = re.match(r"(?:D:)?(\d{4})(\d\d)?(\d\d)?(\d\d)?(\d\d)?(\d\d)?(?:([Zz])|([+-]\d\d)'?(\d\d)?)?", value.strip())
+    if not match:
+        return value
+    year, month, day, hour, minute, second, utc, offset, offset_minutes = match.groups()
+    date = f"{year}:{month or '01'}:{day or '01'} {hour or '00'}:{minute or '00'}:{second or '00'}"
+    if utc:
+        return date + "Z"
+    if offset:
+        return f"{date}{offset}:{offset_minutes or '00'}"
+    return date
+
+
+def pdf_object(data: bytes, offsets: Dict[int, int], number: Optional[int]) -> bytes:
+    """
+    Read the body of an indirect PDF object, up to its "endobj" or "stream" keyword.
+
+    Args:
+        data (bytes): The raw PDF data.
+        offsets (Dict[int, int]): Mapping of object numbers to byte offsets.
+        number (Optional[int]): The object number.
+
+    Returns:
+        bytes: The object body, or b"" if the object is not found at its offset.
+    """
+    offset = offsets.get(number, -1)
+    if offset < 0:
+        return b""
+    chunk = data[offset:offset + PDF_MAX_OBJECT_SIZE]
+    match = re.match(rb"\s*%d\s+\d+\s+obj" % number, chunk)
+    if not match:
+        return b""
+    end = re.compile(rb"endobj|stream\r?\n").search(chunk, match.end())
+    return chunk[match.end():end.start() if end else len(chunk)]
+
+
+def xmp_metadata(packet: bytes) -> Dict[str, str]:
+    """
+    Read the XMP properties listed in XMP_FIELDS from an XMP packet.
+
+    Args:
+        packet (bytes): The XMP packet.
+
+    Returns:
+        Dict[str, str]: The fields found, with exiftool's date notation. Empty if the packet cannot be parsed.
+    """
+    from xml.etree import ElementTree
+
+    try:
+        root = ElementTree.fromstring(bytes(packet).strip(b"\0\t\r\n "))
+    except ElementTree.ParseError:
+        return {}
+
+    metadata: Dict[str, str] = {}
+    for element in root.iter():
+        # Properties are either attributes of rdf:Description, or elements holding text or an rdf:Seq/Alt/Bag of rdf:li.
+        properties = list(element.attrib.items())
+        if element.tag.rsplit("}", 1)[-1] in XMP_FIELDS:
+            items = [item.text.strip() for item in element.iter() if item.tag.endswith("}li") and item.text and item.text.strip()]
+            properties.append((element.tag, ", ".join(items) or (element.text or "").strip()))
+        for name, value in properties:
+            field = XMP_FIELDS.get(name.rsplit("}", 1)[-1])
+            if field and value and field not in metadata:
+                metadata[field] = exif_date(value) if field.endswith(" Date") else value
+    return metadata
+
+
+def get_pdf_metadata(data: bytes, fields: List[str], name: str) -> Optional[Dict[str, str]]:
+    """
+    Read the metadata of a PDF file without exiftool.
+
+    Only the trailer, the cross-reference sections it points to, the Info dictionary and the XMP
+    packet of the document catalog are read, so a memory-mapped file is never read in full.
+
+    Args:
+        data (bytes): The PDF, as bytes or a memory map.
+        fields (List[str]): List of metadata fields to extract.
+        name (str): Name reported in the "File Name" field.
+
+    Returns:
+        Optional[Dict[str, str]]: Dictionary containing the extracted metadata, or None if the file is
+        encrypted or its cross-reference sections or Info dictionary cannot be read, so that exiftool can take over.
+    """
+    startxref = data.rfind(b"startxref", max(0, len(data) - PDF_TAIL_SIZE))
+    match = re.match(rb"startxref\s+(\d+)", data[startxref:startxref + 32]) if startxref >= 0 else None
+    if not match:
+        return None
+
+    try:
+        offsets: Dict[int, int] = {}
+        trailer = b""
+        pending, visited = [int(match.group(1))], set()
+        while pending:
+            position = pending.pop(0)
+            if position in visited or not 0 <= position < len(data):
+                continue
+            visited.add(position)
+            if data[position:position + 4] == b"xref":
+                section, dictionary = pdf_xref_table(data, position)
+            else:
+                dictionary, content = pdf_stream(data, position)
+                section = pdf_xref_stream(dictionary, content)
+            if not dictionary:
+                return None
+            for number, offset in section.items():
+                offsets.setdefault(number, offset)
+            trailer = trailer or dictionary
+            pending += [int(value) for value in re.findall(rb"/(?:XRefStm|Prev)\s+(\d+)", dictionary)]
+
+        if re.search(rb"/Encrypt\b", trailer):
+            return None
+
+        metadata = {"File Name": name}
+        info_number = pdf_reference(trailer, b"Info")
+        info = pdf_object(data, offsets, info_number)
+        if info_number is not None and not info:
+            return None
+
+        position = 0
+        key_pattern = re.compile(rb"/([^\s/<>\[\]()]+)")
+        while True:
+            key = key_pattern.search(info, position)
+            if not key:
+                break
+            value, position = pdf_value(info, key.end())
+            position = max(position, key.end())
+            if isinstance(value, int):
+                value, _ = pdf_value(pdf_object(data, offsets, value), 0)
+            if not isinstance(value, bytes):
+                continue
+            tag = re.sub(rb"#([0-9A-Fa-f]{2})", lambda escape: bytes([int(escape.group(1), 16)]), key.group(1)).decode("utf-8", "replace")
+            field = PDF_INFO_FIELDS.get(tag, re.sub(r"(?<=[a-z])(?=[A-Z])", " ", tag))
+            text = pdf_text(value).strip("\0 \t\r\n")
+            if text and field not in metadata:
+                metadata[field] = pdf_date(text) if field.endswith(" Date") else text
+
+        try:
+            root = pdf_object(data, offsets, pdf_reference(trailer, b"Root"))
+            packet_offset = offsets.get(pdf_reference(root, b"Metadata"), -1)
+            if packet_offset >= 0:
+                for field, value in xmp_metadata(pdf_stream(data, packet_offset, offsets)[1]).items():
+                    metadata.setdefault(field, value)
+        except (ValueError, zlib.error):
+            pass
+    except (ValueError, IndexError, OverflowError, zlib.error):
+        return None
+
+    if info_number is None and len(metadata) == 1:
+        return None
+    return {field: value for field, value in metadata.items() if field in fields}
+
+
+def format_dms(value: float, direction: str) -> str:
+    """
+    Format a coordinate the way exiftool prints it, e.g. 50.819053 and 'N' as "50 deg 49' 8.59\" N".
+
+    Args:
+        value (float): Absolute value of the coordinate, in decimal degrees.
+        direction (str): Hemisphere identifier ('N', 'S', 'E', 'W').
+
+    Returns:
+        str: The coordinate in DMS notation.
+    """
+    degrees = int(value)
+    minutes = int((value - degrees) * 60)
+    seconds = round((value - degrees) * 3600 - minutes * 60, 2)
+    if seconds >= 60:
+        seconds, minutes = 0.0, minutes + 1
+    if minutes >= 60:
+        minutes, degrees = 0, degrees + 1
+    return f"{degrees} deg {minutes}' {seconds:.2f}\" {direction}"
+
+
+def tiff_ifd(data: bytes, offset: int, order: str, tags: Set[int]) -> Dict[int, Tuple[int, bytes]]:
+    """
+    Read the given tags from a TIFF image file directory.
+
+    Args:
+        data (bytes): The TIFF structure, starting with its byte order mark.
+        offset (int): Offset of the directory within data.
+        order (str): struct byte order, '<' or '>'.
+        tags (Set[int]): Tags to read. The values of the other tags, e.g. thumbnails, are never read.
+
+    Returns:
+        Dict[int, Tuple[int, bytes]]: Mapping of the tags found to their TIFF type and raw value.
+
+    Raises:
+        ValueError: If the directory lies outside data or is implausibly large.
+    """
+    try:
+        count, = struct.unpack_from(order + "H", data, offset)
+        if count > TIFF_MAX_ENTRIES:
+            raise ValueError("Invalid TIFF directory.")
+        entries = {}
+        for index in range(count):
+            tag, kind, number, value = struct.unpack_from(order + "HHI4s", data, offset + 2 + 12 * index)
+            size = TIFF_TYPE_SIZES.get(kind, 0) * number
+            if tag not in tags or not size:
+                continue
+            if size > 4:
+                pointer, = struct.unpack(order + "I", value)
+                value = data[pointer:pointer + size]
+            if len(value) >= size:
+                entries[tag] = (kind, value[:size])
+        return entries
+    except struct.error as e:
+        raise ValueError("Invalid TIFF directory.") from e
+
+
+def exif_tags(tiff: bytes) -> Dict[str, str]:
+    """
+    Read the camera, date and GPS tags of an EXIF (TIFF) structure.
+
+    Args:
+        tiff (bytes): The TIFF structure, starting with its byte order mark.
+
+    Returns:
+        Dict[str, str]: The fields found, named and formatted as exiftool prints them, with MAKER_NOTE_FIELD
+        when the picture holds maker notes.
+
+    Raises:
+        ValueError: If the structure is not valid TIFF.
+    """
+    order = {b"II": "<", b"MM": ">"}.get(bytes(tiff[:2]))
+    if not order:
+        raise ValueError("Invalid TIFF header.")
+
+    def number(entry: Optional[Tuple[int, bytes]], position: int = 0) -> Optional[float]:
+        if not entry:
+            return None
+        kind, value = entry
+        if kind in (5, 10):
+            numerator, denominator = struct.unpack_from(order + ("II" if kind == 5 else "ii"), value, position * 8)
+            return numerator / denominator if denominator else None
+        return struct.unpack_from(order + {1: "B", 7: "B", 3: "H", 4: "I", 9: "i"}.get(kind, "B"), value)[0]
+
+    def text(entry: Optional[Tuple[int, bytes]]) -> str:
+        return entry[1].split(b"\0", 1)[0].decode("utf-8", "replace").strip() if entry and entry[0] in (2, 7) else ""
+
+    offset, = struct.unpack_from(order + "I", tiff, 4)
+    ifd = tiff_ifd(tiff, offset, order, set(EXIF_TAGS) | {EXIF_IFD_POINTER, GPS_IFD_POINTER, MAKER_NOTE_TAG})
+    if EXIF_IFD_POINTER in ifd:
+        ifd.update(tiff_ifd(tiff, int(number(ifd[EXIF_IFD_POINTER])), order, set(EXIF_TAGS) | {MAKER_NOTE_TAG}))
+    metadata = {EXIF_TAGS[tag]: text(entry) for tag, entry in ifd.items() if tag in EXIF_TAGS and text(entry)}
+    if MAKER_NOTE_TAG in ifd:
+        metadata[MAKER_NOTE_FIELD] = "(present)"
+
+    if GPS_IFD_POINTER in ifd:
+        gps = tiff_ifd(tiff, int(number(ifd[GPS_IFD_POINTER])), order, {0x0001, 0x0002, 0x0003, 0x0004, 0x0005, 0x0006, 0x0009})
+        coordinates = []
+        for reference, tag in ((0x0001, 0x0002), (0x0003, 0x0004)):
+            entry = gps.get(tag)
+            values = [number(entry, index) for index in range(3)] if entry and len(entry[1]) >= 24 else []
+            if text(gps.get(reference)) and values and None not in values:
+                coordinates.append(format_dms(values[0] + values[1] / 60 + values[2] / 3600, text(gps.get(reference))))
+        if len(coordinates) == 2:
+            metadata["GPS Latitude"], metadata["GPS Longitude"] = coordinates
+            metadata["GPS Position"] = ", ".join(coordinates)
+        altitude = number(gps.get(0x0006))
+        if altitude is not None:
+            below = number(gps.get(0x0005)) == 1
+            metadata["GPS Altitude"] = f"{int(altitude * 10) / 10:g} m {'Below' if below else 'Above'} Sea Level"
+        if text(gps.get(0x0009)) in GPS_STATUS:
+            metadata["GPS Status"] = GPS_STATUS[text(gps.get(0x0009))]
+    return metadata
+
+
+def get_exif_metadata(data: bytes, fields: List[str], name: str) -> Optional[Dict[str, str]]:
+    """
+    Read the metadata of a JPEG or TIFF picture without exiftool.
+
+    JPEG segments are walked up to the image data, and only the EXIF and XMP segments are read. For
+    TIFF files, only the image file directories are read. A memory-mapped file is never read in full.
+
+    Args:
+        data (bytes): The picture, as bytes or a memory map.
+        fields (List[str]): List of metadata fields to extract.
+        name (str): Name reported in the "File Name" field.
+
+    Returns:
+        Optional[Dict[str, str]]: Dictionary containing the extracted metadata, with a "Formatted GPS Position"
+        when GPS data is present, or None if the picture cannot be parsed, or holds maker notes while one of
+        MAKER_NOTE_FIELDS is requested, so that exiftool can take over.
+    """
+    metadata = {"File Name": name}
+    try:
+        if data[:2] == b"\xff\xd8":
+            position = 2
+            while position + 4 <= len(data):
+                marker, length = struct.unpack_from(">HH", data, position)
+                if marker == 0xFFFF:
+                    position += 1
+                    continue
+                if marker >> 8 != 0xFF or length < 2:
+                    return None
+                if marker in (0xFFDA, 0xFFD9):
+                    break
+                if marker == 0xFFE1:
+                    segment = data[position + 4:position + 2 + length]
+                    if segment.startswith(b"Exif\0\0"):
+                        for field, value in exif_tags(segment[6:]).items():
+                            metadata.setdefault(field, value)
+                    elif segment.startswith(XMP_SIGNATURE):
+                        for field, value in xmp_metadata(segment[len(XMP_SIGNATURE):]).items():
+                            metadata.setdefault(field, value)
+                position += 2 + length
+        elif data[:4] in (b"II*\0", b"MM\0*"):
+            metadata.update(exif_tags(data))
+        else:
+            return None
+
+        if MAKER_NOTE_FIELD in metadata and MAKER_NOTE_FIELDS.intersection(fields):
+            return None
+        metadata = {field: value for field, value in metadata.items() if field in fields}
+        format_gps_position(metadata)
+    except (ValueError, OverflowError, struct.error):
+        return None
+    return metadata
+
+
+def get_native_metadata(source: Union[str, bytes], fields: List[str], name: Optional[str] = None) -> Optional[Dict[str, str]]:
+    """
+    Read the metadata of an office document, a PDF, a JPEG or a TIFF file without exiftool.
+
+    Files are memory-mapped, so that only the pages holding the metadata are read from disk.
+
+    Args:
+        source (Union[str, bytes]): Path of the file, or its content.
+        fields (List[str]): List of metadata fields to extract.
+        name (Optional[str]): Name reported in the "File Name" field. Defaults to the base name of source.
+
+    Returns:
+        Optional[Dict[str, str]]: Dictionary containing the extracted metadata, or None if the file type
+        has no native reader or the file cannot be read, so that exiftool can take over.
+    """
+    name = name or os.path.basename(source)
+    extension = os.path.splitext(name)[1].lstrip('.').lower()
+    if extension in OFFICE_EXTENSIONS:
+        return get_office_metadata(source if isinstance(source, str) else io.BytesIO(source), fields, name)
+    if extension not in NATIVE_EXTENSIONS:
+        return None
+
+    reader = get_pdf_metadata if extension == "pdf" else get_exif_metadata
+    if not isinstance(source, str):
+        return reader(source, fields, name)
+
+    try:
+        with open(source, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return reader(data, fields, name)
+    except (OSError, ValueError):
+        return None
+
+
+class Quarantine:
+    """
+    Thread-safe list of the files left out of the analysis, with the reason why.
+
+    Files on which exiftool exceeds its time budget (see extraction_timeout), and files not reached
+    before the global deadline, are recorded here and listed at the end of the report.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None) -> None:
+        """
+        Initialize an empty Quarantine instance.
+
+        max_entries (Optional[int]): Number of files remembered, the oldest being forgotten first.
+            Defaults to None (every file, as the report lists them all).
+        """
+        self.entries: List[Tuple[str, str]] = []
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of quarantined files."""
+        return len(self.entries)
+
+    def add(self, path: str, reason: str) -> None:
+        """
+        Quarantine a file.
+
+        Args:
+            path (str): Path or name of the file.
+            reason (str): Why the file was not analyzed.
+        """
+        with self.lock:
+            self.entries.append((path, reason))
+            self._trim()
+        METRICS.increment("quarantined_files_total")
+        LOGGER.warning(f"Quarantined {path}: {reason}")
+
+    def extend(self, paths: Iterable[str], reason: str) -> None:
+        """
+        Quarantine several files for the same reason, with a single warning.
+
+        Args:
+            paths (Iterable[str]): Paths or names of the files.
+            reason (str): Why the files were not analyzed.
+        """
+        paths = list(paths)
+        if not paths:
+            return
+        with self.lock:
+            self.entries.extend((path, reason) for path in paths)
+            self._trim()
+        METRICS.increment("quarantined_files_total", len(paths))
+        LOGGER.warning(f"Quarantined {len(paths)} files: {reason}")
+
+    def items(self, start: int = 0) -> List[Tuple[str, str]]:
+        """
+        Return the quarantined files.
+
+        Args:
+            start (int): Number of entries to skip, e.g. the length of the list before a batch.
+
+        Returns:
+            List[Tuple[str, str]]: (path, reason) pairs, in quarantine order.
+        """
+        with self.lock:
+            return self.entries[start:]
+
+    def clear(self) -> None:
+        """Forget the quarantined files."""
+        with self.lock:
+            self.entries.clear()
+
+    def _trim(self) -> None:
+        """Forget the oldest files beyond max_entries."""
+        if self.max_entries is not None and len(self.entries) > self.max_entries:
+            del self.entries[:len(self.entries) - self.max_entries]
+
+
+QUARANTINE = Quarantine()
+
+
+def extraction_timeout() -> Optional[float]:
+    """
+    Return the time exiftool may spend on the next file.
+
+    Returns:
+        Optional[float]: FILE_TIMEOUT, capped by the time left before DEADLINE, or None without limit.
+    """
+    timeouts = [FILE_TIMEOUT] if FILE_TIMEOUT > 0 else []
+    if DEADLINE is not None:
+        timeouts.append(max(DEADLINE - time.monotonic(), 0.01))
+    return min(timeouts) if timeouts else None
+
+
+def kill_after(process: subprocess.Popen, timeout: Optional[float]) -> Optional[threading.Timer]:
+    """
+    Start a timer killing a process once its time budget is exceeded.
+
+    Args:
+        process (subprocess.Popen): The process to watch.
+        timeout (Optional[float]): Seconds before the process is killed, or None to leave it running.
+
+    Returns:
+        Optional[threading.Timer]: The started timer, to cancel once the process has answered,
+        and whose "expired" attribute tells whether it fired; None without timeout.
+    """
+    if timeout is None:
+        return None
+
+    def expire() -> None:
+        timer.expired = True
+        process.kill()
+
+    timer = threading.Timer(timeout, expire)
+    timer.expired = False
+    timer.daemon = True
+    timer.start()
+    return timer
+
+
+class ExifTool:
+    """exiftool process kept running across files (-stay_open), which saves its startup on every file.
+
+    Files are passed through an argument file read from the standard input, and the output of
+    each file ends with a "{ready}" line. The process is started on first use and restarted if it dies,
+    including when it is killed for exceeding the time budget of a file.
+    """
+
+    def __init__(self, executable: str = "exiftool"):
+        """
+        Initialize an ExifTool instance.
+
+        executable (str): Name or path of the exiftool executable.
+        """
+        self.executable = executable
+        self.process: Optional[subprocess.Popen] = None
+        self.lock = threading.Lock()
+
+    def execute(self, *args: str, timeout: Optional[float] = None) -> str:
+        """
+        Run exiftool with the given arguments in the running process.
+
+        Args:
+            *args (str): The arguments, one per line of the argument file (e.g. a file path).
+            timeout (Optional[float]): Seconds after which the process is killed, to be restarted on the next call.
+
+        Returns:
+            str: The output of exiftool, error messages included. The "Error:" lines, which exiftool
+            prints instead of exiting with an error, are also logged.
+
+        Raises:
+            subprocess.CalledProcessError: If the exiftool process exits before answering.
+            subprocess.TimeoutExpired: If the process was killed for exceeding the timeout.
+            UnicodeDecodeError: If there's an error decoding the exiftool output.
+        """
+        with self.lock:
+            if self.process is not None and self.process.poll() is not None:
+                self._release()
+            if self.process is None:
+                self.process = subprocess.Popen([self.executable, "-stay_open", "True", "-@", "-"],
+                                                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            try:
+                self.process.stdin.write(b"".join(os.fsencode(arg) + b"\n" for arg in args) + b"-execute\n")
+                self.process.stdin.flush()
+            except OSError:
+                pass
+            lines = []
+            timer = kill_after(self.process, timeout)
+            try:
+                for line in iter(self.process.stdout.readline, b""):
+                    if line.rstrip() == b"{ready}":
+                        output = b"".join(lines).decode()
+                        for error in re.findall(r"^Error: (.*?)\s*$", output, re.MULTILINE):
+                            LOGGER.error(f"Error executing exiftool: {error}")
+                        return output
+                    lines.append(line)
+            finally:
+                if timer is not None:
+                    timer.cancel()
+            returncode = self.process.wait()
+            if timer is not None and timer.expired:
+                raise subprocess.TimeoutExpired([self.executable, *args], timeout)
+            raise subprocess.CalledProcessError(returncode, [self.executable, *args])
+
+    def execute_bytes(self, data: bytes, suffix: str = "", timeout: Optional[float] = None) -> str:
+        """
+        Run exiftool on in-memory content, through a private temporary file deleted right after.
+
+        Args:
+            data (bytes): The content to analyze.
+            suffix (str): Extension of the temporary file, e.g. ".pdf", which some formats need.
+            timeout (Optional[float]): Seconds after which the process is killed (see execute).
+
+        Returns:
+            str: The output of exiftool, error messages included.
+        """
+        import tempfile
+
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            return self.execute(path, timeout=timeout)
+        finally:
+            os.unlink(path)
+
+    def close(self) -> None:
+        """Stop the exiftool process."""
+        with self.lock:
+            if self.process is None:
+                return
+            try:
+                self.process.stdin.write(b"-stay_open\nFalse\n")
+                self.process.stdin.flush()
+                self.process.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+                self.process.wait()
+            self._release()
+
+    def _release(self) -> None:
+        """Close the pipes of the exited process."""
+        for pipe in (self.process.stdin, self.process.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+        self.process = None
+
+
+def get_metadata(file_path: str, fields: List[str], exiftool: Optional[ExifTool] = None,
+                 archives: Optional[ArchiveCache] = None) -> dict:
+    """
+    Retrieve specified metadata fields from a file using exiftool.
+
+    Office documents, PDF, JPEG and TIFF files are read natively first (see get_native_metadata),
+    exiftool being used when they cannot be parsed. Virtual "archive!/member" paths are read
+    from their archive or mail store (see get_archive_member_metadata and get_attachment_metadata).
+    exiftool is killed when it exceeds its time budget (see extraction_timeout), and the file quarantined.
+
+    Args:
+        file_path (str): Path of the file to analyze.
+        fields (List[str]): List of metadata fields to extract.
+        exiftool (Optional[ExifTool]): Running exiftool process to use, instead of starting one for the file.
+        archives (Optional[ArchiveCache]): The cache of open archives, for virtual paths. Defaults to ARCHIVES.
+
+    Returns:
+        dict: Dictionary containing the extracted metadata.
+
+    Raises:
+        subprocess.CalledProcessError: If there's an error executing exiftool.
+        UnicodeDecodeError: If there's an error decoding the exiftool output.
+    """
+    archive_member = split_archive_path(file_path) if ARCHIVE_SEPARATOR in file_path else None
+    if archive_member:
+        reader = get_attachment_metadata if is_mail_store(archive_member[0]) else get_archive_member_metadata
+        return reader(*archive_member, fields, archives)
+
+    if NATIVE_EXTRACTION and os.path.splitext(file_path)[1].lstrip('.').lower() in NATIVE_EXTENSIONS:
+        with METRICS.timer("native_seconds"):
+            metadata = get_native_metadata(file_path, fields)
+        if metadata is not None:
+            return metadata
+
+    timeout = extraction_timeout()
+    try:
+        with METRICS.timer("exiftool_seconds", source="path"):
+            if exiftool is not None and "\n" not in file_path:
+                output = exiftool.execute(file_path, timeout=timeout)
+            else:
+                output = subprocess.run(["exiftool", file_path], capture_output=True, text=True, check=True,
+                                        timeout=timeout).stdout
+    except subprocess.TimeoutExpired:
+        QUARANTINE.add(file_path, f"exiftool did not answer within {round(timeout, 1):g} seconds")
+        return {}
+    except subprocess.CalledProcessError as e:
+        LOGGER.error(f"Error executing exiftool: {e}")
+        return {}
+    except UnicodeDecodeError as e:
+        LOGGER.error(f"Error decoding output for file {file_path}: {e}")
+        return {}
+
+    return parse_exiftool_output(output, fields)
+
+
+def get_metadata_from_bytes(data: Union[bytes, BinaryIO], fields: List[str], name: str = "-",
+                            exiftool: Optional[ExifTool] = None) -> dict:
+    """
+    Retrieve specified metadata fields from in-memory content, piped into exiftool's standard input.
+
+    Streams (e.g. an HTTP response) are copied to exiftool chunk by chunk, so the content
+    never has to be held in memory in full nor written to disk. As in get_metadata, content on which
+    exiftool exceeds its time budget is quarantined under its name.
+
+    Args:
+        data (Union[bytes, BinaryIO]): The content to analyze, as bytes or a readable binary stream.
+        fields (List[str]): List of metadata fields to extract.
+        name (str): Name reported in the "File Name" field, since exiftool has none for its standard input.
+        exiftool (Optional[ExifTool]): Running exiftool process to use for bytes, through a temporary file
+            (see ExifTool.execute_bytes), instead of starting one.
+
+    Returns:
+        dict: Dictionary containing the extracted metadata.
+    """
+    if NATIVE_EXTRACTION and isinstance(data, (bytes, bytearray)) and os.path.splitext(name)[1].lstrip('.').lower() in NATIVE_EXTENSIONS:
+        with METRICS.timer("native_seconds"):
+            metadata = get_native_metadata(bytes(data), fields, name)
+        if metadata is not None:
+            return metadata
+
+    timeout = extraction_timeout()
+    try:
+        with METRICS.timer("exiftool_seconds", source="stdin"):
+            if exiftool is not None and isinstance(data, (bytes, bytearray, memoryview)):
+                output = exiftool.execute_bytes(bytes(data), os.path.splitext(name)[1], timeout=timeout).encode()
+            elif isinstance(data, (bytes, bytearray, memoryview)):
+                completed = subprocess.run(["exiftool", "-"], input=bytes(data), capture_output=True, check=True,
+                                           timeout=timeout)
+                output = completed.stdout
+                METRICS.increment("exiftool_stdin_bytes_total", len(data))
+            else:
+                process = subprocess.Popen(["exiftool", "-"], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                           stderr=subprocess.DEVNULL)
+                copied: List[int] = []
+                writer = threading.Thread(target=lambda: copied.append(copy_stream(data, process.stdin)))
+                writer.start()
+                timer = kill_after(process, timeout)
+                output = process.stdout.read()
+                process.stdout.close()
+                writer.join()
+                if timer is not None:
+                    timer.cancel()
+                METRICS.increment("exiftool_stdin_bytes_total", sum(copied))
+                if process.wait():
+                    if timer is not None and timer.expired:
+                        raise subprocess.TimeoutExpired(["exiftool", "-"], timeout)
+                    raise subprocess.CalledProcessError(process.returncode, ["exiftool", "-"])
+    except subprocess.TimeoutExpired:
+        QUARANTINE.add(name, f"exiftool did not answer within {round(timeout, 1):g} seconds")
+        return {}
+    except (subprocess.CalledProcessError, OSError, UnicodeDecodeError) as e:
+        LOGGER.error(f"Error executing exiftool on {name}: {e}")
+        return {}
+
+    metadata = parse_exiftool_output(output.decode("utf-8", "replace"), fields)
+    metadata.pop("File Name", None)
+    if "File Name" in fields:
+        metadata = {"File Name": name, **metadata}
+    return metadata
+
+
+class StringTable:
+    """
+    Per-run table of interned strings and record layouts.
+
+    Values such as producer names, companies or authors repeat across thousands of files:
+    the table lets every record share a single copy of each of them, and of each ordered
+    set of field names.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty StringTable instance."""
+        self.strings: Dict[str, str] = {}
+        self.layouts: Dict[Tuple[str, ...], Dict[str, int]] = {}
+
+    def intern(self, value: str) -> str:
+        """
+        Return the shared copy of a string.
+
+        Args:
+            value (str): The string to intern.
+
+        Returns:
+            str: The first string equal to value seen by the table.
+        """
+        return self.strings.setdefault(value, value)
+
+    def layout(self, fields: Tuple[str, ...]) -> Dict[str, int]:
+        """
+        Return the shared layout of an ordered set of fields.
+
+        Args:
+            fields (Tuple[str, ...]): The field names, in order.
+
+        Returns:
+            Dict[str, int]: Mapping of each field to the position of its value.
+        """
+        layout = self.layouts.get(fields)
+        if layout is None:
+            layout = self.layouts.setdefault(fields, {self.intern(field): index for index, field in enumerate(fields)})
+        return layout
+
+
+STRING_TABLE = StringTable()
+
+
+class RecordItemsView(ItemsView):
+    """Items view of a MetadataRecord, iterating over its layout and values side by side."""
+
+    def __iter__(self) -> Iterator[Tuple[str, Any]]:
+        return zip(self._mapping._layout, self._mapping._values)
+
+
+class MetadataRecord(MutableMapping):
+    """
+    Compact, dict-like metadata of one file.
+
+    The field names are kept once per layout in STRING_TABLE and the values in a tuple,
+    the values of INTERNED_FIELDS being interned. Records support the same read and write access as the
+    dictionaries returned by get_metadata, and keep their field order.
+    """
+
+    __slots__ = ("_layout", "_values")
+
+    def __init__(self, metadata: Optional[Mapping[str, Any]] = None) -> None:
+        """
+        Initialize a MetadataRecord instance.
+
+        metadata (Optional[Mapping[str, Any]]): The metadata of the file, e.g. as returned by get_metadata.
+        """
+        metadata = metadata or {}
+        self._layout = STRING_TABLE.layout(tuple(metadata))
+        self._values = tuple(self._intern(field, value) for field, value in metadata.items())
+
+    @staticmethod
+    def _intern(field: str, value: Any) -> Any:
+        """Intern value, if it belongs to a field whose values repeat across files."""
+        return STRING_TABLE.intern(value) if isinstance(value, str) and field in INTERNED_FIELDS else value
+
+    def __getitem__(self, field: str) -> Any:
+        return self._values[self._layout[field]]
+
+    def __setitem__(self, field: str, value: Any) -> None:
+        value = self._intern(field, value)
+        index = self._layout.get(field)
+        if index is None:
+            self._layout = STRING_TABLE.layout((*self._layout, field))
+            self._values = (*self._values, value)
+        else:
+            self._values = self._values[:index] + (value,) + self._values[index + 1:]
+
+    def __delitem__(self, field: str) -> None:
+        index = self._layout[field]
+        self._layout = STRING_TABLE.layout(tuple(name for name in self._layout if name != field))
+        self._values = self._values[:index] + self._values[index + 1:]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._layout)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, field: object) -> bool:
+        return field in self._layout
+
+    def get(self, field: str, default: Any = None) -> Any:
+        index = self._layout.get(field)
+        return default if index is None else self._values[index]
+
+    def items(self) -> ItemsView[str, Any]:
+        return RecordItemsView(self)
+
+    def __repr__(self) -> str:
+        return f"MetadataRecord({dict(self)!r})"
+
+    def __reduce__(self):
+        return MetadataRecord, (dict(self),)
+
+
+def copy_stream(source: BinaryIO, destination: BinaryIO) -> int:
+    """
+    Copy a binary stream into another one chunk by chunk, then close the destination.
+
+    A destination closed by the reader (e.g. exiftool exiting early) ends the copy silently.
+
+    Args:
+        source (BinaryIO): The stream to read from.
+        destination (BinaryIO): The stream to write to.
+
+    Returns:
+        int: Number of bytes copied.
+    """
+    copied = 0
+    try:
+        while True:
+            chunk = source.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            destination.write(chunk)
+            copied += len(chunk)
+    except (BrokenPipeError, ValueError):
+        pass
+    finally:
+        try:
+            destination.close()
+        except BrokenPipeError:
+            pass
+    return copied
+
+
+def fetch_metadata_from_url(url: str, fields: List[str]) -> dict:
+    """
+    Retrieve specified metadata fields from a remote file without writing it to disk.
+
+    The response body is streamed straight into exiftool.
+
+    Args:
+        url (str): The URL of the file to analyze.
+        fields (List[str]): List of metadata fields to extract.
+
+    Returns:
+        dict: Dictionary containing the extracted metadata. "File Name" holds the URL.
+    """
+    import urllib.request
+
+    try:
+        request = urllib.request.Request(quote(url, safe=":/?&=%"), headers={'User-Agent': USER_AGENT})
+        with open_url(request, "stream") as response:
+            metadata = get_metadata_from_bytes(MeteredStream(response, "stream"), fields, url)
+        LOGGER.info(f"Analyzed {url} in memory.")
+        return metadata
+    except Exception as e:
+        LOGGER.error(f"Failed to analyze {url}. Reason: {e}")
+        return {}
+
+
+def matches_any_pattern(value: str, patterns: List[str]) -> bool:
+    """
+    Check if a string matches any of the provided patterns.
+
+    Args:
+        value (str): The string to check.
+        patterns (List[str]): List of patterns to check against.
+
+    Returns:
+        bool: True if the value matches any of the patterns, False otherwise.
+
+    Raises:
+        re.error: If one of the patterns is not a valid regular expression.
+    """
+    return any(pattern.search(value) for pattern in compile_patterns(tuple(patterns)))
+
+
+@functools.lru_cache(maxsize=64)
+def compile_patterns(patterns: Tuple[str, ...]) -> List[re.Pattern]:
+    """
+    Compile ignore patterns, once for each set of patterns.
+
+    Args:
+        patterns (Tuple[str, ...]): The patterns, matched case-insensitively.
+
+    Returns:
+        List[re.Pattern]: The compiled patterns.
+    """
+    return [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+
+
+def valid_directory(path: str) -> str:
+    """
+    Validate directory path.
+
+    Args:
+        path (str): The directory path to validate.
+
+    Returns:
+        str: The valid directory path.
+
+    Raises:
+        argparse.ArgumentTypeError: If the directory path is invalid or doesn't exist.
+    """
+    if not os.path.exists(path):
+        raise argparse.ArgumentTypeError(f"Directory path '{path}' does not exist.")
+
+    if not os.path.isdir(path):
+        raise argparse.ArgumentTypeError(f"Path '{path}' is not a directory.")
+
+    return path
+
+
+def filter_files_by_extension(files: List[str], extensions: List[str]) -> List[str]:
+    """
+    Filter a list of files to return only those that match the provided extensions.
+
+    Args:
+        files (List[str]): The list of file paths to filter.
+        extensions (List[str]): A list of file extensions to filter by.
+
+    Returns:
+        List[str]: A filtered list of file paths with only the specified extensions.
+
+    Raises:
+        TypeError: If the inputs are not lists or if the elements within those lists are not strings.
+    """
+    if not isinstance(files, list) or not all(isinstance(f, str) for f in files):
+        raise TypeError("The 'files' argument must be a list of strings.")
+
+    if not isinstance(extensions, list) or not all(isinstance(ext, str) for ext in extensions):
+        raise TypeError("The 'extensions' argument must be a list of strings.")
+
+    ext_set = set(extensions)
+    return [file for file in files if file.endswith(tuple(ext_set))]
+
+
+def is_archive(path: str) -> bool:
+    """
+    Check if a path names a zip or tar archive whose members can be analyzed.
+
+    Args:
+        path (str): The path to check.
+
+    Returns:
+        bool: True if the path has one of the ARCHIVE_EXTENSIONS, False otherwise.
+    """
+    return path.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def split_archive_path(path: str) -> Optional[Tuple[str, str]]:
+    """
+    Split a virtual archive member or mail attachment path, e.g. "leak.zip!/docs/report.pdf".
+
+    Args:
+        path (str): The path to split.
+
+    Returns:
+        Optional[Tuple[str, str]]: The path of the archive and the name of the member, or None
+        if the path does not designate a member of an existing archive or mail store.
+    """
+    position = path.find(ARCHIVE_SEPARATOR)
+    while position >= 0:
+        archive = path[:position]
+        if (is_archive(archive) or is_mail_store(archive)) and os.path.isfile(archive):
+            return archive, path[position + len(ARCHIVE_SEPARATOR):]
+        position = path.find(ARCHIVE_SEPARATOR, position + 1)
+    return None
+
+
+def open_archive(path: str) -> Any:
+    """
+    Open an archive or a mail store.
+
+    Args:
+        path (str): Path of the archive or mail store.
+
+    Returns:
+        Union[zipfile.ZipFile, tarfile.TarFile, mailbox.mbox, Dict[int, email.message.EmailMessage]]: The open archive.
+
+    Raises:
+        OSError, zipfile.BadZipFile, tarfile.TarError, mailbox.Error: If the archive cannot be opened.
+    """
+    import tarfile
+    import zipfile
+
+    if is_mail_store(path):
+        return open_mail_store(path)
+    return zipfile.ZipFile(path) if path.lower().endswith(".zip") else tarfile.open(path)
+
+
+def open_archive_member(archive: Any, member: str) -> Tuple[int, BinaryIO]:
+    """
+    Open a member of a zip or tar archive.
+
+    Tar members are looked up by reading the archive up to them, so that a compressed tar archive
+    is not decompressed in full to find its first members.
+
+    Args:
+        archive (Union[zipfile.ZipFile, tarfile.TarFile]): The open archive.
+        member (str): Name of the member within the archive.
+
+    Returns:
+        Tuple[int, BinaryIO]: The uncompressed size of the member and a stream of its content.
+
+    Raises:
+        KeyError: If the archive has no such member.
+    """
+    import zipfile
+
+    if isinstance(archive, zipfile.ZipFile):
+        info = archive.getinfo(member)
+        return info.file_size, archive.open(info)
+    info = next((info for info in archive if info.name == member and info.isfile()), None)
+    if info is None:
+        raise KeyError(f"There is no item named {member!r} in the archive")
+    return info.size, archive.extractfile(info)
+
+
+class ArchiveCache:
+    """
+    Keep the archive or mail store being analyzed open between the analysis of its members.
+
+    Members are listed and analyzed in archive order, so keeping the last archive open lets
+    compressed tar archives be decompressed in a forward pass rather than once per member,
+    and the attachments of a message be decoded from a single parse of the message. Threads
+    analyzing different archives at the same time each use a cache of their own (see extract_files).
+    """
+
+    def __init__(self) -> None:
+        """Initialize an ArchiveCache instance, with no archive open."""
+        self.lock = threading.RLock()
+        self.path: Optional[str] = None
+        self.archive: Any = None
+        self.parsed: Optional[Tuple[int, Any]] = None
+
+    @contextlib.contextmanager
+    def open(self, path: str) -> Iterator[Any]:
+        """
+        Open an archive, or reuse it if it is the one already open, holding the lock while it is used.
+
+        Args:
+            path (str): Path of the archive or mail store.
+
+        Yields:
+            Union[zipfile.ZipFile, tarfile.TarFile, mailbox.mbox, Dict[int, email.message.EmailMessage]]: The open archive.
+
+        Raises:
+            OSError, zipfile.BadZipFile, tarfile.TarError, mailbox.Error: If the archive cannot be opened.
+        """
+        with self.lock:
+            if self.path != path:
+                self.close()
+                self.archive = open_archive(path)
+                self.path = path
+            yield self.archive
+
+    def message(self, key: int) -> Any:
+        """
+        Return a message of the open mail store, parsing it only if it differs from the last one returned.
+
+        Args:
+            key (int): Key of the message in the store.
+
+        Returns:
+            email.message.EmailMessage: The parsed message.
+
+        Raises:
+            KeyError: If the store has no such message.
+        """
+        with self.lock:
+            if self.parsed is None or self.parsed[0] != key:
+                self.parsed = (key, self.archive[key])
+            return self.parsed[1]
+
+    def close(self) -> None:
+        """Close the open archive, if any."""
+        with self.lock:
+            if hasattr(self.archive, "close"):
+                self.archive.close()
+            self.path = self.archive = self.parsed = None
+
+
+ARCHIVES = ArchiveCache()
+
+
+def list_archive_members(path: str, extensions: List[str]) -> List[str]:
+    """
+    List the regular files of a zip or tar archive as virtual "archive!/member" paths.
+
+    Args:
+        path (str): Path of the archive.
+        extensions (List[str]): Extensions of the members to keep, or ['all'].
+
+    Returns:
+        List[str]: The virtual paths of the members, in archive order. Empty if the archive cannot be read.
+    """
+    import lzma
+    import tarfile
+    import zipfile
+
+    try:
+        with ARCHIVES.open(path) as archive:
+            if isinstance(archive, zipfile.ZipFile):
+                sizes = {info.filename: info.file_size for info in archive.infolist() if not info.is_dir()}
+            else:
+                sizes = {info.name: info.size for info in archive.getmembers() if info.isfile()}
+    except (OSError, EOFError, zlib.error, lzma.LZMAError, zipfile.BadZipFile, tarfile.TarError) as e:
+        LOGGER.error(f"Error reading archive {path}: {e}")
+        return []
+
+    names = list(sizes) if extensions == ['all'] else [name for name in sizes if name.endswith(tuple(extensions))]
+    ARCHIVE_MEMBER_SIZES.update((f"{path}{ARCHIVE_SEPARATOR}{name}", sizes[name]) for name in names)
+    return [f"{path}{ARCHIVE_SEPARATOR}{name}" for name in names]
+
+
+def get_archive_member_metadata(archive_path: str, member: str, fields: List[str],
+                                archives: Optional[ArchiveCache] = None) -> dict:
+    """
+    Retrieve specified metadata fields from a member of a zip or tar archive, without extracting it to disk.
+
+    Members up to ARCHIVE_MEMBER_MEMORY_SIZE are read in memory, so the native readers can be used;
+    larger ones are streamed into exiftool's standard input from an archive opened for them alone,
+    so that the cache is not held while exiftool reads them.
+
+    Args:
+        archive_path (str): Path of the archive.
+        member (str): Name of the member within the archive.
+        fields (List[str]): List of metadata fields to extract.
+        archives (Optional[ArchiveCache]): The cache of open archives. Defaults to ARCHIVES.
+
+    Returns:
+        dict: Dictionary containing the extracted metadata. "File Name" holds the virtual
+        "archive!/member" path, the archive being named by its base name.
+    """
+    import lzma
+    import tarfile
+    import zipfile
+
+    name = f"{os.path.basename(archive_path)}{ARCHIVE_SEPARATOR}{member}"
+    try:
+        with (archives or ARCHIVES).open(archive_path) as archive:
+            size, stream = open_archive_member(archive, member)
+            with stream:
+                data = stream.read(ARCHIVE_MEMBER_MEMORY_SIZE + 1) if size <= ARCHIVE_MEMBER_MEMORY_SIZE else None
+        if data is None:
+            with contextlib.closing(open_archive(archive_path)) as archive:
+                size, stream = open_archive_member(archive, member)
+                with stream:
+                    return get_metadata_from_bytes(stream, fields, name)
+        if len(data) > ARCHIVE_MEMBER_MEMORY_SIZE:
+            raise ValueError("member larger than its declared size")
+    except (OSError, EOFError, KeyError, RuntimeError, ValueError, zlib.error, lzma.LZMAError,
+            zipfile.BadZipFile, tarfile.TarError) as e:
+        LOGGER.error(f"Error reading {name}: {e}")
+        return {}
 
-    if lat_dd is not None and lon_dd is not None:
-        metadata["Formatted GPS Position"] = f"{lat_dd:.6f}, {lon_dd:.6f}"
+    METRICS.increment("archive_members_total")
+    return get_metadata_from_bytes(data, fields, name)
 
-    return metadata
 
+def is_mail_store(path: str) -> bool:
+    """
+    Check if a path names a mail store (eml, emlx or mbox) whose attachments can be analyzed.
 
-def matches_any_pattern(value: str, patterns: List[str]) -> bool:
+    Args:
+        path (str): The path to check.
+
+    Returns:
+        bool: True if the path has one of the MAIL_EXTENSIONS, False otherwise.
     """
-    Check if a string matches any of the provided patterns.
+    return path.lower().endswith(MAIL_EXTENSIONS)
+
+
+def open_mail_store(path: str) -> Any:
+    """
+    Open a mail store with the email package.
 
     Args:
-        value (str): The string to check.
-        patterns (List[str]): List of patterns to check against.
+        path (str): Path of the eml, emlx or mbox file.
 
     Returns:
-        bool: True if the value matches any of the patterns, False otherwise.
+        Union[mailbox.mbox, Dict[int, email.message.EmailMessage]]: A mapping of message keys to messages.
+        Mailbox messages are parsed one at a time, when accessed.
 
     Raises:
-        re.error: If one of the patterns is not a valid regular expression.
+        OSError, ValueError, mailbox.Error: If the store cannot be read.
     """
-    compiled_patterns = [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
-    return any(pattern.search(value) for pattern in compiled_patterns)
+    import mailbox
+    from email import policy
+    from email.parser import BytesParser
 
+    parser = BytesParser(policy=policy.default)
+    if path.lower().endswith(MBOX_EXTENSIONS):
+        return mailbox.mbox(path, factory=parser.parse, create=False)
+    with open(path, "rb") as file:
+        if path.lower().endswith(".emlx"):
+            # Apple Mail prefixes the message with its length and follows it with a property list.
+            return {0: parser.parsebytes(file.read(int(file.readline())))}
+        return {0: parser.parse(file)}
 
-def valid_directory(path: str) -> str:
+
+def mail_attachments(message: Any) -> List[Tuple[str, Any]]:
     """
-    Validate directory path.
+    Name the attachments of a message, including inline parts bearing a file name.
 
     Args:
-        path (str): The directory path to validate.
+        message (email.message.EmailMessage): The parsed message.
 
     Returns:
-        str: The valid directory path.
+        List[Tuple[str, email.message.EmailMessage]]: The attachment names, unique within the
+        message and free of path separators, with their MIME parts.
+    """
+    attachments = []
+    names = set()
+    parts = (part for part in message.walk() if not part.is_multipart() and part.get_content_type() != "message/rfc822")
+    for index, part in enumerate(parts, 1):
+        filename = part.get_filename()
+        if not filename and part.get_content_disposition() != "attachment":
+            continue
+        name = re.sub(r"[/\\]", "_", filename or f"attachment-{index}")
+        if name in names:
+            name = f"{index}-{name}"
+        names.add(name)
+        attachments.append((name, part))
+    return attachments
 
-    Raises:
-        argparse.ArgumentTypeError: If the directory path is invalid or doesn't exist.
+
+def mail_attribution(message: Any) -> Dict[str, str]:
     """
-    if not os.path.exists(path):
-        raise argparse.ArgumentTypeError(f"Directory path '{path}' does not exist.")
+    Describe the message an attachment comes from.
 
-    if not os.path.isdir(path):
-        raise argparse.ArgumentTypeError(f"Path '{path}' is not a directory.")
+    Args:
+        message (email.message.EmailMessage): The parsed message.
 
-    return path
+    Returns:
+        Dict[str, str]: The "Message From", "Message Subject" and "Message Date" fields found,
+        the date being in exiftool notation.
+    """
+    attribution = {"Message From": str(message["From"] or ""), "Message Subject": str(message["Subject"] or "")}
+    date = getattr(message["Date"], "datetime", None)
+    if date:
+        offset = date.strftime("%z")
+        attribution["Message Date"] = f"{date:%Y:%m:%d %H:%M:%S}" + (f"{offset[:3]}:{offset[3:5]}" if offset else "")
+    elif message["Date"]:
+        attribution["Message Date"] = str(message["Date"])
+    return {field: value.strip() for field, value in attribution.items() if value.strip()}
 
 
-def filter_files_by_extension(files: List[str], extensions: List[str]) -> List[str]:
+def list_mail_attachments(path: str, extensions: List[str]) -> List[str]:
     """
-    Filter a list of files to return only those that match the provided extensions.
+    List the attachments of the messages of a mail store as virtual paths.
+
+    Attachments of an eml or emlx message are named "store!/attachment", those of an mbox
+    message "store!/<message number>/attachment".
 
     Args:
-        files (List[str]): The list of file paths to filter.
-        extensions (List[str]): A list of file extensions to filter by.
+        path (str): Path of the mail store.
+        extensions (List[str]): Extensions of the attachments to keep, or ['all'].
 
     Returns:
-        List[str]: A filtered list of file paths with only the specified extensions.
+        List[str]: The virtual paths of the attachments, in store order. Empty if the store cannot be read.
+    """
+    import mailbox
 
-    Raises:
-        TypeError: If the inputs are not lists or if the elements within those lists are not strings.
+    names = []
+    try:
+        with ARCHIVES.open(path) as store:
+            for key in store.keys():
+                prefix = f"{key + 1}/" if path.lower().endswith(MBOX_EXTENSIONS) else ""
+                names += [prefix + name for name, _ in mail_attachments(ARCHIVES.message(key))]
+    except (OSError, ValueError, mailbox.Error) as e:
+        LOGGER.error(f"Error reading mail store {path}: {e}")
+        return []
+
+    if extensions != ['all']:
+        names = [name for name in names if name.endswith(tuple(extensions))]
+    return [f"{path}{ARCHIVE_SEPARATOR}{name}" for name in names]
+
+
+def get_attachment_metadata(store_path: str, member: str, fields: List[str],
+                            archives: Optional[ArchiveCache] = None) -> dict:
     """
-    if not isinstance(files, list) or not all(isinstance(f, str) for f in files):
-        raise TypeError("The 'files' argument must be a list of strings.")
+    Retrieve specified metadata fields from a mail attachment, decoded in memory.
 
-    if not isinstance(extensions, list) or not all(isinstance(ext, str) for ext in extensions):
-        raise TypeError("The 'extensions' argument must be a list of strings.")
+    Args:
+        store_path (str): Path of the mail store.
+        member (str): Name of the attachment, as listed by list_mail_attachments.
+        fields (List[str]): List of metadata fields to extract.
+        archives (Optional[ArchiveCache]): The cache of open mail stores. Defaults to ARCHIVES.
 
-    ext_set = set(extensions)
-    return [file for file in files if file.endswith(tuple(ext_set))]
+    Returns:
+        dict: Dictionary containing the extracted metadata, attributed to the message with the
+        "Message From", "Message Subject" and "Message Date" fields. "File Name" holds the
+        virtual "store!/attachment" path, the store being named by its base name.
+    """
+    import mailbox
+
+    name = f"{os.path.basename(store_path)}{ARCHIVE_SEPARATOR}{member}"
+    archives = archives or ARCHIVES
+    try:
+        with archives.open(store_path):
+            key, attachment = member.split("/", 1) if store_path.lower().endswith(MBOX_EXTENSIONS) else (1, member)
+            message = archives.message(int(key) - 1)
+            data = dict(mail_attachments(message))[attachment].get_payload(decode=True) or b""
+            attribution = mail_attribution(message)
+    except (OSError, KeyError, ValueError, mailbox.Error) as e:
+        LOGGER.error(f"Error reading {name}: {e}")
+        return {}
+
+    METRICS.increment("mail_attachments_total")
+    metadata = get_metadata_from_bytes(data, fields, name)
+    return {"File Name": name, **{field: value for field, value in attribution.items() if field in fields}, **metadata}
 
 
 def get_files(args) -> List[str]:
     """
     Retrieve a list of files based on the provided arguments.
 
+    With --archives, zip and tar archives are replaced by their members, and with --attachments,
+    mail stores by their attachments, as virtual "archive!/member" paths that get_metadata reads
+    without extracting them to disk.
+
     Args:
         args: The parsed command-line arguments.
 
@@ -392,16 +2703,179 @@ def get_files(args) -> List[str]:
 
         files = [os.path.join(args.directory, file) for file in os.listdir(args.directory)]
         if args.type != ['all']:
-            files = filter_files_by_extension(files, args.type)
+            containers = (list(ARCHIVE_EXTENSIONS) if args.archives else []) + (list(MAIL_EXTENSIONS) if args.attachments else [])
+            files = filter_files_by_extension(files, args.type + containers)
     else:
         files = args.files
 
+    if args.archives or args.attachments:
+        expanded = []
+        for file in files:
+            if args.archives and is_archive(file):
+                expanded += list_archive_members(file, args.type)
+            elif args.attachments and is_mail_store(file):
+                expanded += list_mail_attachments(file, args.type)
+            else:
+                expanded.append(file)
+        files = expanded
+
     if not files:
         raise ValueError("Error: No files found.")
 
     return files
 
 
+def estimate_extraction_cost(path: str) -> float:
+    """
+    Estimate the cost of extracting the metadata of a file, in bytes read.
+
+    Args:
+        path (str): Path of the file. Archive members cost their uncompressed size, as recorded by
+            list_archive_members, since they are read in full. Other virtual "archive!/member" paths
+            (mail attachments) and files that cannot be accessed cost PLAN_FILE_OVERHEAD only.
+
+    Returns:
+        float: PLAN_FILE_OVERHEAD plus the size of the file, weighted by PLAN_NATIVE_FACTOR for the files
+        read natively (see get_native_metadata).
+    """
+    if path in ARCHIVE_MEMBER_SIZES:
+        return PLAN_FILE_OVERHEAD + ARCHIVE_MEMBER_SIZES[path]
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return PLAN_FILE_OVERHEAD
+    native = NATIVE_EXTRACTION and os.path.splitext(path)[1].lstrip('.').lower() in NATIVE_EXTENSIONS
+    return PLAN_FILE_OVERHEAD + size * (PLAN_NATIVE_FACTOR if native else 1.0)
+
+
+def plan_extraction(files: List[str], jobs: int = 0, batch_size: int = DEFAULT_BATCH_SIZE) -> List[List[int]]:
+    """
+    Split files into extraction tasks, ordered largest first (longest processing time first).
+
+    Files estimated to cost PLAN_LARGE_FILE_COST or more are tasks of their own. The others are
+    batched together in file order, which keeps the members of an archive together. Handing the
+    tasks out in this order to whichever worker is free keeps a few huge files from being started
+    last while the other workers sit idle.
+
+    Args:
+        files (List[str]): The files to analyze, as returned by get_files.
+        jobs (int): Number of workers. When given, batches are made smaller so that each worker gets
+            about PLAN_TASKS_PER_JOB of them. Defaults to 0 (batches of batch_size files).
+        batch_size (int): Maximum number of files in a batch.
+
+    Returns:
+        List[List[int]]: The tasks, as positions in files, by decreasing estimated cost.
+    """
+    costs = [estimate_extraction_cost(file) for file in files]
+    tasks = [[position] for position, cost in enumerate(costs) if cost >= PLAN_LARGE_FILE_COST]
+    small = [position for position, cost in enumerate(costs) if cost < PLAN_LARGE_FILE_COST]
+    if jobs > 0:
+        batch_size = min(batch_size, -(-len(small) // (jobs * PLAN_TASKS_PER_JOB)))
+    batch_size = max(1, batch_size)
+    tasks += [small[i:i + batch_size] for i in range(0, len(small), batch_size)]
+    tasks.sort(key=lambda task: sum(costs[position] for position in task), reverse=True)
+    return tasks
+
+
+def hash_file(path: str, limit: Optional[int] = None) -> Optional[bytes]:
+    """
+    Hash the content of a file with BLAKE2b.
+
+    Args:
+        path (str): Path of the file.
+        limit (Optional[int]): Number of bytes hashed from the start of the file. Defaults to None (whole file).
+
+    Returns:
+        Optional[bytes]: The digest, or None if the file cannot be read.
+    """
+    import hashlib
+
+    digest = hashlib.blake2b(digest_size=32)
+    hashed = 0
+    try:
+        with open(path, "rb") as f:
+            while limit is None or hashed < limit:
+                chunk = f.read(READ_CHUNK_SIZE if limit is None else min(READ_CHUNK_SIZE, limit - hashed))
+                if not chunk:
+                    break
+                digest.update(chunk)
+                hashed += len(chunk)
+    except OSError:
+        return None
+    METRICS.increment("dedupe_hashed_bytes_total", hashed)
+    return digest.digest()
+
+
+def find_duplicates(files: List[str]) -> List[List[str]]:
+    """
+    Find the files with the same content.
+
+    Files are grouped by size first, then the files sharing a size by the hash of their first
+    DEDUPE_PARTIAL_SIZE bytes, and only the files still colliding are hashed in full. Virtual
+    "archive!/member" paths and files that cannot be read are left out.
+
+    Args:
+        files (List[str]): The files to analyze, as returned by get_files.
+
+    Returns:
+        List[List[str]]: The groups of identical files, each in file order, ordered by their first file.
+    """
+    def group(paths: List[str], key: Callable[[str], Any]) -> List[List[str]]:
+        groups = defaultdict(list)
+        for path in paths:
+            value = key(path)
+            if value is not None:
+                groups[value].append(path)
+        return [members for members in groups.values() if len(members) > 1]
+
+    def size(path: str) -> Optional[int]:
+        try:
+            status = os.stat(path)
+        except OSError:
+            return None
+        return status.st_size if stat.S_ISREG(status.st_mode) else None
+
+    duplicates = []
+    for same_size in group(list(dict.fromkeys(files)), size):
+        partial = group(same_size, functools.partial(hash_file, limit=DEDUPE_PARTIAL_SIZE))
+        if os.path.getsize(same_size[0]) <= DEDUPE_PARTIAL_SIZE:
+            duplicates += partial
+        else:
+            for same_start in partial:
+                duplicates += group(same_start, hash_file)
+
+    positions = {path: position for position, path in reversed(list(enumerate(files)))}
+    duplicates.sort(key=lambda members: positions[members[0]])
+    METRICS.increment("duplicate_files_total", sum(len(members) - 1 for members in duplicates))
+    return duplicates
+
+
+def reuse_duplicate_metadata(files: List[str], records: Dict[str, Optional[MetadataRecord]],
+                             duplicates: List[List[str]]) -> List[MetadataRecord]:
+    """
+    Give every copy of a duplicate group the metadata extracted from the first one.
+
+    Args:
+        files (List[str]): All the files, duplicates included.
+        records (Dict[str, Optional[MetadataRecord]]): The metadata of the files analyzed, by path,
+            None for the files left out (e.g. at the deadline).
+        duplicates (List[List[str]]): The groups of identical files (see find_duplicates).
+
+    Returns:
+        List[MetadataRecord]: The metadata of each file, in file order, with its own "File Name".
+    """
+    original = {copy: members[0] for members in duplicates for copy in members[1:]}
+    all_metadata = []
+    for file in files:
+        record = records.get(original.get(file, file))
+        if record is None:
+            continue
+        if file in original and "File Name" in record:
+            record = MetadataRecord({**record, "File Name": os.path.basename(file)})
+        all_metadata.append(record)
+    return all_metadata
+
+
 def get_address_from_coords(lat: str, lon: str) -> str:
     """
     Fetch address from latitude and longitude using the Nominatim API.
@@ -418,28 +2892,66 @@ def get_address_from_coords(lat: str, lon: str) -> str:
         json.JSONDecodeError: If there's an error decoding the JSON response.
         Exception: For any other unexpected errors.
     """
+    import http.client
+
     try:
-        conn = http.client.HTTPSConnection(NOMINATIM_HOST)
-        headers = {'User-Agent': USER_AGENT}
-        conn.request("GET", NOMINATIM_ENDPOINT.format(lat=lat, lon=lon), headers=headers)
+        with METRICS.timer("geocode_seconds"):
+            conn = http.client.HTTPSConnection(NOMINATIM_HOST)
+            headers = {'User-Agent': USER_AGENT}
+            conn.request("GET", NOMINATIM_ENDPOINT.format(lat=lat, lon=lon), headers=headers)
 
-        res = conn.getresponse()
-        data = res.read()
+            res = conn.getresponse()
+            data = res.read()
 
         parsed_data = json.loads(data.decode("utf-8"))
         return parsed_data.get("display_name", "")
 
     except http.client.HTTPException as e:
-        print(f"HTTP error occurred: {e}")
+        LOGGER.error(f"HTTP error occurred: {e}")
         raise
     except json.JSONDecodeError:
-        print("Error decoding JSON response.")
+        LOGGER.error("Error decoding JSON response.")
         raise
     except Exception as e:
-        print(f"Unexpected error: {e}")
+        LOGGER.error(f"Unexpected error: {e}")
         raise
 
 
+def lookup_address(lat: str, lon: str) -> str:
+    """
+    Fetch the address of coordinates through get_address_from_coords, caching the answers.
+
+    Files taken at the same place, and the renderers visiting the same entry several times,
+    then cost a single request to the Nominatim API. The cache keeps the GEOCODE_CACHE_SIZE
+    most recently used addresses.
+
+    Args:
+        lat (str): Latitude as a string.
+        lon (str): Longitude as a string.
+
+    Returns:
+        str: Address as a string. Returns an empty string if nothing was found.
+
+    Raises:
+        Exception: If there's an issue fetching the address. Failures are not cached.
+    """
+    key = (lat, lon)
+    with GEOCODE_CACHE_LOCK:
+        if key in GEOCODE_CACHE:
+            METRICS.increment("geocode_cache_hits_total")
+            GEOCODE_CACHE[key] = address = GEOCODE_CACHE.pop(key)
+            return address
+
+    METRICS.increment("geocode_cache_misses_total")
+    with PROFILER.stage("enrichment"):
+        address = get_address_from_coords(lat, lon)
+    with GEOCODE_CACHE_LOCK:
+        GEOCODE_CACHE[key] = address
+        while len(GEOCODE_CACHE) > GEOCODE_CACHE_SIZE:
+            del GEOCODE_CACHE[next(iter(GEOCODE_CACHE))]
+    return address
+
+
 def format_gps_data(metadata: Dict[str, str]) -> None:
     """
     Update the provided metadata dictionary with address and map link
@@ -468,7 +2980,7 @@ def format_gps_data(metadata: Dict[str, str]) -> None:
     except ValueError:
         raise ValueError("The 'Formatted GPS Position' data is not in the expected 'lat, lon' format.")
 
-    address = get_address_from_coords(lat, lon)
+    address = lookup_address(lat, lon)
     if address:
         metadata["Address"] = address
 
@@ -585,24 +3097,140 @@ def display_metadata(args: Namespace,
     else:
         raise ValueError(f"Unrecognized display preference: {args.display}")
 
+    for line in generate_duplicates_txt() + generate_quarantine_txt():
+        print(line)
 
-def export_metadata_to_html(args: Namespace, all_metadata: List[Dict[str, str]], ignore_patterns: List[str]) -> str:
+
+def html_metadata_entries(all_metadata: List[Dict[str, str]], ignore_patterns: List[str]) -> Iterator[str]:
     """
-    Convert and export metadata to a beautiful HTML page based on the provided arguments.
+    Render the metadata of each file as a "metadata-entry" block, for the 'all' display.
 
     Args:
-        args (Namespace): The parsed command-line arguments.
+        all_metadata (List[Dict[str, str]]): List of dictionaries containing metadata.
+        ignore_patterns (List[str]): List of patterns to ignore.
+
+    Yields:
+        str: The HTML of each entry.
+    """
+    from html import escape
+
+    for metadata in all_metadata:
+        html_parts = ['<div class="metadata-entry">']
+
+        # Links built by the export, rendered as they are; every value taken from the record is escaped.
+        links = {}
+        formatted_gps = metadata.get("Formatted GPS Position")
+        if formatted_gps:
+            lat, lon = formatted_gps.split(", ")
+            address = lookup_address(lat, lon)
+            if address:
+                link_to_address = escape(f"{NOMINATIM_SEARCH_URL}{quote(address)}")
+                links["Address"] = f"<a href='{link_to_address}' target='_blank' rel='noopener noreferrer'>{escape(address)}</a>"
+            map_link = escape(NOMINATIM_LINK.format(lat=quote(lat), lon=quote(lon)))
+            links["Map Link"] = f"<a href='{map_link}' target='_blank' rel='noopener noreferrer'>View on Map</a>"
+
+        displayed_fields = 0
+        for field, value in {**metadata, **links}.items():
+            if field in FIELDS and value and not matches_any_pattern(value, ignore_patterns):
+                html_parts.append(f'<p><strong>{field}:</strong> {links.get(field) or escape(value)}</p>')
+                displayed_fields += 1
+
+        if displayed_fields == 1:
+            html_parts.append('<p>No relevant metadata found.</p>')
+
+        html_parts.append('<hr></div>')
+        yield ''.join(html_parts)
+
+
+def html_singular_metadata(args: Namespace, all_metadata: List[Dict[str, str]], ignore_patterns: List[str]) -> List[str]:
+    """
+    Render the unique values of each field, for the 'singular' display.
+
+    Args:
+        args (Namespace): The parsed command-line arguments (format).
         all_metadata (List[Dict[str, str]]): List of dictionaries containing metadata.
         ignore_patterns (List[str]): List of patterns to ignore.
 
     Returns:
-        str: HTML representation of the metadata.
+        List[str]: The HTML parts of the fields.
     """
-    html_parts = [
+    from html import escape
+
+    html_parts = []
+    unique_values = defaultdict(set)
+
+    # Values are escaped as they are collected, the map links built here being the only HTML kept as is.
+    for metadata in all_metadata:
+        formatted_gps = metadata.get("Formatted GPS Position")
+        map_link = None
+        if formatted_gps:
+            lat, lon = formatted_gps.split(", ")
+            map_link = f"<a href='{escape(NOMINATIM_LINK.format(lat=quote(lat), lon=quote(lon)))}'>View on Map</a>"
+
+        for field in UNIQUE_FIELDS:
+            value = map_link if field == "Map Link" and map_link else metadata.get(field, None)
+            if field == "Hyperlinks" and value:
+                links = [link.strip() for link in value.split(',')]
+                valid_links = [link for link in links if not matches_any_pattern(link, ignore_patterns)]
+                if valid_links:
+                    unique_values[field].add(escape(', '.join(valid_links)))
+            elif value and not matches_any_pattern(value, ignore_patterns):
+                unique_values[field].add(value if value is map_link else escape(value))
+
+    for field, values in unique_values.items():
+        unique_cased_values = {next(v for v in values if v.lower() == value.lower()): None for value in values}.keys()
+        if unique_cased_values:
+            html_parts.append(f'<h3>{field}:</h3>')
+            if args.format == 'formatted':
+                for unique_value in unique_cased_values:
+                    html_parts.append(f'<p>    - {unique_value}</p>')
+            else:
+                html_parts.append(f"<p>{', '.join(unique_cased_values)}</p>")
+            html_parts.append('<hr>')
+
+    return html_parts
+
+
+def html_report_sections() -> List[str]:
+    """
+    Render the duplicate groups and the quarantined files listed at the end of the report.
+
+    Returns:
+        List[str]: The HTML parts of the sections, empty when there is nothing to list.
+    """
+    html_parts = []
+    quarantined = QUARANTINE.items()
+    if DUPLICATE_GROUPS or quarantined:
+        from html import escape
+
+        if DUPLICATE_GROUPS:
+            html_parts.append('<h3>Duplicate files (same content, analyzed once):</h3>')
+            for members in DUPLICATE_GROUPS:
+                html_parts.append(f"<p>    - {escape(', '.join(members))}</p>")
+            html_parts.append('<hr>')
+        if quarantined:
+            html_parts.append('<h3>Quarantined files:</h3>')
+            for path, reason in quarantined:
+                html_parts.append(f'<p>    - {escape(path)}: {escape(reason)}</p>')
+            html_parts.append('<hr>')
+    return html_parts
+
+
+def html_header(style: str) -> List[str]:
+    """
+    Render the head of an HTML report and its title banner.
+
+    Args:
+        style (str): The stylesheet, CSS_STYLE or LIGHT_CSS_STYLE.
+
+    Returns:
+        List[str]: The HTML parts, up to the opening of the body and the banner.
+    """
+    return [
         '<html>'
         '<head>',
         '<title>MetaDetective Export</title>',
-        CSS_STYLE,
+        style,
         '</head>',
         '<body>',
         '<div class="header">',
@@ -610,65 +3238,79 @@ def export_metadata_to_html(args: Namespace, all_metadata: List[Dict[str, str]],
         '</div>'
     ]
 
+
+def export_metadata_to_html(args: Namespace, all_metadata: List[Dict[str, str]], ignore_patterns: List[str],
+                            style: str = CSS_STYLE) -> str:
+    """
+    Convert and export metadata to a beautiful HTML page based on the provided arguments.
+
+    Args:
+        args (Namespace): The parsed command-line arguments.
+        all_metadata (List[Dict[str, str]]): List of dictionaries containing metadata.
+        ignore_patterns (List[str]): List of patterns to ignore.
+        style (str): The stylesheet of the page. Defaults to CSS_STYLE.
+
+    Returns:
+        str: HTML representation of the metadata.
+    """
+    html_parts = html_header(style)
+
     if args.display == "all":
-        for metadata in all_metadata:
-            html_parts.append('<div class="metadata-entry">')
-
-            formatted_gps = metadata.get("Formatted GPS Position")
-            if formatted_gps:
-                lat, lon = formatted_gps.split(", ")
-                address = get_address_from_coords(lat, lon)
-                if address:
-                    encoded_address = quote(address)
-                    link_to_address = f"{NOMINATIM_SEARCH_URL}{encoded_address}"
-                    metadata["Address"] = f"<a href='{link_to_address}' target='_blank' rel='noopener noreferrer'>{address}</a>"
-                metadata["Map Link"] = f"<a href='https://nominatim.openstreetmap.org/ui/reverse.html?lat={lat}&lon={lon}' target='_blank' rel='noopener noreferrer'>View on Map</a>"
-
-            displayed_fields = 0
-            for field, value in metadata.items():
-                if field in FIELDS and value and not matches_any_pattern(value, ignore_patterns):
-                    html_parts.append(f'<p><strong>{field}:</strong> {value}</p>')
-                    displayed_fields += 1
-
-            if displayed_fields == 1:
-                html_parts.append('<p>No relevant metadata found.</p>')
-
-            html_parts.append('<hr></div>')
+        html_parts += html_metadata_entries(all_metadata, ignore_patterns)
     elif args.display == "singular":
-        unique_values = defaultdict(set)
-
-        for metadata in all_metadata:
-            formatted_gps = metadata.get("Formatted GPS Position")
-            if formatted_gps:
-                lat, lon = formatted_gps.split(", ")
-                map_link = f"https://nominatim.openstreetmap.org/ui/reverse.html?lat={lat}&lon={lon}"
-                metadata["Map Link"] = f"<a href='{map_link}'>View on Map</a>"
-
-            for field in UNIQUE_FIELDS:
-                value = metadata.get(field, None)
-                if field == "Hyperlinks" and value:
-                    links = [link.strip() for link in value.split(',')]
-                    valid_links = [link for link in links if not matches_any_pattern(link, ignore_patterns)]
-                    if valid_links:
-                        unique_values[field].add(', '.join(valid_links))
-                elif value and not matches_any_pattern(value, ignore_patterns):
-                    unique_values[field].add(value)
-
-        for field, values in unique_values.items():
-            unique_cased_values = {next(v for v in values if v.lower() == value.lower()): None for value in values}.keys()
-            if unique_cased_values:
-                html_parts.append(f'<h3>{field}:</h3>')
-                if args.format == 'formatted':
-                    for unique_value in unique_cased_values:
-                        html_parts.append(f'<p>    - {unique_value}</p>')
-                else:
-                    html_parts.append(f"<p>{', '.join(unique_cased_values)}</p>")
-                html_parts.append('<hr>')
+        html_parts += html_singular_metadata(args, all_metadata, ignore_patterns)
 
+    html_parts += html_report_sections()
     html_parts.append('</body></html>')
     return ''.join(html_parts)
 
 
+def export_metadata_to_html_pages(args: Namespace, all_metadata: List[Dict[str, str]], ignore_patterns: List[str],
+                                  name: str, page_size: int) -> Iterator[Tuple[str, str]]:
+    """
+    Export metadata to lightweight HTML pages, for reports too large for a single animated page.
+
+    Pages use LIGHT_CSS_STYLE, which needs no network access and lets browsers skip the layout of the
+    entries out of view. In the 'all' display, each page holds page_size files and links to the
+    previous and next pages; the 'singular' display, condensed by nature, is a single page.
+    Pages are rendered one at a time, as they are consumed.
+
+    Args:
+        args (Namespace): The parsed command-line arguments.
+        all_metadata (List[Dict[str, str]]): List of dictionaries containing metadata.
+        ignore_patterns (List[str]): List of patterns to ignore.
+        name (str): File name of the first page, without extension. The next pages are named
+            "<name>-2.html", "<name>-3.html" and so on.
+        page_size (int): Number of files per page.
+
+    Yields:
+        Tuple[str, str]: The file name and the HTML of each page.
+    """
+    if args.display != "all":
+        yield f"{name}.html", export_metadata_to_html(args, all_metadata, ignore_patterns, LIGHT_CSS_STYLE)
+        return
+
+    count = max(1, -(-len(all_metadata) // page_size))
+    names = [f"{name}.html"] + [f"{name}-{number}.html" for number in range(2, count + 1)]
+    for number in range(count):
+        first = number * page_size
+        last = min(first + page_size, len(all_metadata))
+        links = [f"Page {number + 1} of {count} (files {first + 1 if last else 0} to {last} of {len(all_metadata)})"]
+        if number > 0:
+            links.append(f"<a href='{quote(names[number - 1])}'>Previous</a>")
+        if number < count - 1:
+            links.append(f"<a href='{quote(names[number + 1])}'>Next</a>")
+        navigation = f'<p class="pages">{" | ".join(links)}</p>'
+
+        html_parts = html_header(LIGHT_CSS_STYLE) + [navigation]
+        html_parts += html_metadata_entries(all_metadata[first:last], ignore_patterns)
+        if number == count - 1:
+            html_parts += html_report_sections()
+        html_parts.append(navigation)
+        html_parts.append('</body></html>')
+        yield names[number], ''.join(html_parts)
+
+
 def generate_all_metadata_txt(all_metadata: List[Dict[str, Any]], ignore_patterns: List[str]) -> List[str]:
     """
     Generate a list of text strings representing the complete metadata for each entry.
@@ -740,6 +3382,31 @@ def generate_singular_metadata_txt(all_metadata: List[Dict[str, Any]],
     return text_parts
 
 
+def generate_duplicates_txt() -> List[str]:
+    """
+    Generate a list of text strings listing the groups of duplicate files (see find_duplicates).
+
+    Returns:
+        List[str]: A list of text strings, empty without --dedupe or when no file is duplicated.
+    """
+    if not DUPLICATE_GROUPS:
+        return []
+    return ["Duplicate files (same content, analyzed once):"] + [f"    - {', '.join(members)}" for members in DUPLICATE_GROUPS] + [""]
+
+
+def generate_quarantine_txt() -> List[str]:
+    """
+    Generate a list of text strings listing the quarantined files (see Quarantine).
+
+    Returns:
+        List[str]: A list of text strings, empty when no file was quarantined.
+    """
+    quarantined = QUARANTINE.items()
+    if not quarantined:
+        return []
+    return ["Quarantined files:"] + [f"    - {path}: {reason}" for path, reason in quarantined] + [""]
+
+
 def export_metadata_to_txt(args: Namespace, all_metadata: List[Dict[str, Any]], ignore_patterns: List[str]) -> str:
     """
     Export the provided metadata to a text format based on the specified arguments.
@@ -757,7 +3424,49 @@ def export_metadata_to_txt(args: Namespace, all_metadata: List[Dict[str, Any]],
     elif args.display == "singular":
         text_parts = generate_singular_metadata_txt(all_metadata, args, ignore_patterns)
 
-    return '\n'.join(text_parts)
+    return '\n'.join(text_parts + generate_duplicates_txt() + generate_quarantine_txt())
+
+
+def report_metadata(args: Namespace, all_metadata: List[Dict[str, Any]], ignore_patterns: List[str]) -> None:
+    """
+    Export the metadata to a file or display it, depending on the provided arguments.
+
+    Args:
+        args (Namespace): The parsed command-line arguments (display, format and export options).
+        all_metadata (List[Dict[str, Any]]): List of metadata dictionaries to report.
+        ignore_patterns (List[str]): Patterns to use for excluding metadata fields from the report.
+    """
+    if args.export:
+        timestamp = datetime.datetime.now().strftime('%Y_%m_%d-%H_%M_%S')
+        custom_suffix = f"{args.custom}-" if args.custom else ""
+        name = f"MetaDetective_Export-{custom_suffix}{timestamp}"
+
+        if args.export == 'html' and getattr(args, "html_page_size", 0):
+            with PROFILER.stage("export"):
+                pages = 0
+                for filename, content in export_metadata_to_html_pages(args, all_metadata, ignore_patterns, name, args.html_page_size):
+                    with open(os.path.join(args.out, filename), "w") as f:
+                        f.write(content)
+                    pages += 1
+            print(f"Results exported to {pages} page{'s' if pages > 1 else ''} starting at {os.path.join(args.out, name)}.html")
+            return
+
+        with PROFILER.stage("export"):
+            if args.export == 'html':
+                content = export_metadata_to_html(args, all_metadata, ignore_patterns)
+                file_extension = '.html'
+            else:
+                content = export_metadata_to_txt(args, all_metadata, ignore_patterns)
+                file_extension = '.txt'
+
+        full_path = os.path.join(args.out, f"{name}{file_extension}")
+
+        with open(full_path, "w") as f:
+            f.write(content)
+        print(f"Results file exported to {full_path}")
+    else:
+        with PROFILER.stage("rendering"):
+            display_metadata(args, all_metadata, ignore_patterns)
 
 
 def valid_filename(value: str) -> str:
@@ -785,13 +3494,27 @@ def valid_filename(value: str) -> str:
     return value
 
 
-class LinkParser(HTMLParser):
-    """HTML Parser to extract links from a web page."""
+class LinkParser:
+    """HTML Parser to extract links from a web page.
+
+    It drives an html.parser.HTMLParser, imported on first use so that only scraping pays for it.
+    """
 
     def __init__(self) -> None:
         """Initialize the LinkParser."""
-        super().__init__()
+        from html.parser import HTMLParser
+
         self.links: List[str] = []
+        self.parser = HTMLParser()
+        self.parser.handle_starttag = self.handle_starttag
+
+    def feed(self, data: str) -> None:
+        """Feed HTML text to the parser."""
+        self.parser.feed(data)
+
+    def close(self) -> None:
+        """Process any buffered data."""
+        self.parser.close()
 
     def handle_starttag(self, tag: str, attrs: List[Tuple[str, str]]) -> None:
         """Handle the start tag of an HTML element.
@@ -814,12 +3537,60 @@ class LinkParser(HTMLParser):
                     self.links.append(value)
 
 
-def fetch_links_from_url(url: str) -> List[str]:
+class ContentDecompressor:
+    """Incremental decompressor for gzip or deflate encoded HTTP bodies."""
+
+    def __init__(self, encoding: str):
+        """
+        Initialize a ContentDecompressor instance.
+
+        encoding (str): The Content-Encoding of the body ('gzip', 'x-gzip' or 'deflate').
+        """
+        self.encoding = encoding
+        self.started = False
+        wbits = 16 + zlib.MAX_WBITS if encoding in ('gzip', 'x-gzip') else zlib.MAX_WBITS
+        self.decompressor = zlib.decompressobj(wbits)
+
+    def decompress(self, chunk: bytes, max_length: int = 0) -> bytes:
+        """
+        Decompress the next chunk of the body.
+
+        Servers sending raw deflate data without the zlib wrapper are handled as well.
+
+        Args:
+            chunk (bytes): The next compressed chunk.
+            max_length (int): Maximum number of bytes to return (0 for no limit), which bounds
+                the memory used by highly compressed bodies.
+
+        Returns:
+            bytes: The decompressed data.
+
+        Raises:
+            zlib.error: If the data is corrupt.
+        """
+        try:
+            data = self.decompressor.decompress(chunk, max_length)
+        except zlib.error:
+            if self.started or self.encoding != 'deflate':
+                raise
+            self.decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+            data = self.decompressor.decompress(chunk, max_length)
+        self.started = True
+        return data
+
+
+def fetch_links_from_url(url: str, max_page_size: int = DEFAULT_MAX_PAGE_SIZE) -> List[str]:
     """
     Fetch all links from a given URL.
 
+    Compressed transfer (gzip or deflate) is negotiated. The page is decompressed and fed
+    to the parser chunk by chunk as it arrives, decoded with the charset announced in the
+    response headers. Reading stops once max_page_size uncompressed bytes have been
+    received, and the links found so far are returned.
+
     Args:
         url (str): The URL to fetch links from.
+        max_page_size (int): Maximum number of bytes to read from the page. 0 disables the limit.
 
     Returns:
         List[str]: List of links found on the page.
@@ -827,32 +3598,66 @@ def fetch_links_from_url(url: str) -> List[str]:
     Raises:
         urllib.error.URLError: If there's an issue with opening the URL.
         ValueError: If there's an issue with decoding the response data.
+        zlib.error: If the compressed response data is corrupt.
     """
+    import urllib.error
+    import urllib.request
+
     pattern = re.compile(r"\.(css|js)($|\?|#)")
 
     try:
-        response = urllib.request.urlopen(url)
-
-        content_type = response.headers.get('Content-Type', '').split(';')[0]
-        if 'text' not in content_type:
-            return []
-
-        data = response.read().decode()
-        parser = LinkParser()
-        parser.feed(data)
+        request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT, 'Accept-Encoding': 'gzip, deflate'})
+        with open_url(request, "page") as response:
+            content_type = response.headers.get('Content-Type', '').split(';')[0]
+            if 'text' not in content_type:
+                return []
+
+            charset = response.headers.get_content_charset() or 'utf-8'
+            try:
+                decoder = codecs.getincrementaldecoder(charset)(errors='replace')
+            except LookupError:
+                decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+            content_encoding = response.headers.get('Content-Encoding', '').strip().lower()
+            decompressor = ContentDecompressor(content_encoding) if content_encoding in ('gzip', 'x-gzip', 'deflate') else None
+
+            parser = LinkParser()
+            compressed = 0
+            received = 0
+            while not max_page_size or received < max_page_size:
+                chunk = response.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                compressed += len(chunk)
+                remaining = max_page_size - received if max_page_size else 0
+                data = decompressor.decompress(chunk, remaining) if decompressor else chunk
+                if remaining:
+                    data = data[:remaining]
+                received += len(data)
+                parser.feed(decoder.decode(data))
+
+            METRICS.increment("http_bytes_total", compressed, kind="page")
+            METRICS.increment("html_wire_bytes_total", compressed)
+            METRICS.increment("html_content_bytes_total", received)
+
+            if max_page_size and received >= max_page_size:
+                LOGGER.warning(f"Page {url} exceeds {max_page_size} bytes, link extraction stopped early.")
+
+            parser.feed(decoder.decode(b'', final=True))
+            parser.close()
         return [link for link in parser.links if not link.startswith("javascript:") and not pattern.search(link)]
 
     except urllib.error.URLError as e:
         if url.startswith("mailto:"):
-            print(f"INFO: Found mailto link {url}")
+            LOGGER.info(f"Found mailto link {url}")
         else:
-            print(f"ERROR: Unable to open {url} Reason: {e}")
+            LOGGER.error(f"Unable to open {url} Reason: {e}")
         return []
     except urllib.error.HTTPError as e:
-        print(f"HTTP Error for URL {url} Reason: {e.code} - {e.reason}")
+        LOGGER.error(f"HTTP error for URL {url} Reason: {e.code} - {e.reason}")
         return []
-    except ValueError as e:
-        print(f"ERROR: Unable to decode data from {url} Reason: {e}")
+    except (ValueError, zlib.error) as e:
+        LOGGER.error(f"Unable to decode data from {url} Reason: {e}")
         return []
 
 
@@ -873,15 +3678,19 @@ def is_valid_file_link(link: str) -> bool:
 def process_url(url: str, depth: int, base_domain: str, q, seen: Set[str],
                 lock: threading.Lock, rate_limiter, file_stats: Dict[str, int],
                 download_dir: Optional[str] = None, scan: bool = False,
-                follow_extern: bool = False) -> None:
+                follow_extern: bool = False, max_page_size: int = DEFAULT_MAX_PAGE_SIZE,
+                remote_metadata: Optional[List[Dict[str, str]]] = None,
+                pipeline: Optional["ExtractionPipeline"] = None) -> None:
     """
     Process a URL, fetch its links, and perform download or scanning actions.
 
+    URLs pointing to files (e.g. seeded from a sitemap) are handed to the file actions directly.
+
     Args:
         url (str): The URL to process.
         depth (int): Depth of links to follow.
         base_domain (str): The base domain to restrict link following.
-        q (Queue): The processing queue.
+        q (CrawlFrontier): The processing queue.
         seen (Set[str]): Set of URLs already processed.
         lock (threading.Lock): Thread lock for shared resources.
         rate_limiter (RateLimiter): RateLimiter object.
@@ -889,6 +3698,11 @@ def process_url(url: str, depth: int, base_domain: str, q, seen: Set[str],
         download_dir (Optional[str], optional): Directory to save downloaded files. Defaults to None.
         scan (bool, optional): Whether to scan only. Defaults to False.
         follow_extern (bool): Whether to follow external links.
+        max_page_size (int, optional): Maximum number of bytes read from each page. Defaults to DEFAULT_MAX_PAGE_SIZE.
+        remote_metadata (Optional[List[Dict[str, str]]], optional): In scan mode, list receiving the metadata of
+            each file found, extracted through Range requests. Defaults to None (metadata is not fetched).
+        pipeline (Optional[ExtractionPipeline], optional): Pipeline receiving downloaded files for extraction,
+            or the file URLs themselves when download_dir is None. Defaults to None (files are only downloaded).
     """
     if url in seen:
         return
@@ -896,63 +3710,315 @@ def process_url(url: str, depth: int, base_domain: str, q, seen: Set[str],
     with lock:
         seen.add(url)
 
-    print(f"INFO: Accessing {url}")
+    if is_valid_file_link(url):
+        handle_file_links([url], lock, rate_limiter, file_stats, download_dir, scan, remote_metadata, pipeline)
+        return
+
+    if not q.claim_page():
+        METRICS.increment("pages_skipped_total")
+        return
+
+    LOGGER.info(f"Accessing {url}")
+    if pipeline is not None:
+        pipeline.emit("page", url)
 
-    rate_limiter.wait()
+    rate_limiter.wait(urlparse(url).netloc)
 
-    links = fetch_links_from_url(url)
+    links = fetch_links_from_url(url, max_page_size)
+    PROGRESS.update(pages=1)
 
     file_links = [urljoin(url, link) for link in links if is_valid_file_link(link)]
 
-    if download_dir and not scan:
-        if not file_links:
-            print("\nNo files found or no files with specified extensions.")
-            return
+    if (download_dir or pipeline is not None) and not scan and not file_links:
+        LOGGER.info(f"No files found on {url} or no files with specified extensions.")
+        return
+
+    handle_file_links(file_links, lock, rate_limiter, file_stats, download_dir, scan, remote_metadata, pipeline)
+
+    if depth > 0:
+        for link in links:
+            parsed_link = urlparse(link)
+            joined_link = urljoin(url, link)
 
+            if not follow_extern and parsed_link.netloc and parsed_link.netloc != base_domain:
+                continue
+
+            if is_valid_file_link(link):
+                continue
+
+            q.put((joined_link, depth - 1, base_domain, follow_extern), parent_yield=len(file_links))
+
+
+def handle_file_links(file_links: List[str], lock: threading.Lock, rate_limiter, file_stats: Dict[str, int],
+                      download_dir: Optional[str] = None, scan: bool = False,
+                      remote_metadata: Optional[List[Dict[str, str]]] = None,
+                      pipeline: Optional["ExtractionPipeline"] = None) -> None:
+    """
+    Perform the download, analysis or scanning actions on file links.
+
+    Args:
+        file_links (List[str]): Absolute URLs of the files.
+        lock (threading.Lock): Thread lock for shared resources.
+        rate_limiter (RateLimiter): RateLimiter object.
+        file_stats (Dict[str, int]): File statistics dictionary.
+        download_dir (Optional[str], optional): Directory to save downloaded files. Defaults to None.
+        scan (bool, optional): Whether to scan only. Defaults to False.
+        remote_metadata (Optional[List[Dict[str, str]]], optional): In scan mode, list receiving the metadata of
+            each file found, extracted through Range requests. Defaults to None (metadata is not fetched).
+        pipeline (Optional[ExtractionPipeline], optional): Pipeline receiving downloaded files for extraction,
+            or the file URLs themselves when download_dir is None. Defaults to None (files are only downloaded).
+    """
+    if (download_dir or pipeline is not None) and not scan:
         for file_link in file_links:
-            download_file(file_link, download_dir)
+            if not download_dir:
+                pipeline.submit(file_link)
+                PROGRESS.update(files=1)
+                continue
+            local_filename = download_file(file_link, download_dir)
+            if pipeline is not None and local_filename:
+                pipeline.submit(local_filename)
     elif scan:
-        for file_link in file_links:
-            file_url = urljoin(url, file_link)
+        for file_url in file_links:
             file_name = os.path.basename(urlparse(file_url).path)
             extension = os.path.splitext(file_name)[-1].lstrip('.')
             with lock:
                 if extension not in file_stats:
                     file_stats[extension] = set()
+                is_new = (file_url, file_name) not in file_stats[extension]
                 file_stats[extension].add((file_url, file_name))
+            if is_new:
+                PROGRESS.update(files=1)
 
-    if depth > 0:
-        for link in links:
-            parsed_link = urlparse(link)
-            joined_link = urljoin(url, link)
+            if remote_metadata is not None and is_new:
+                with PROFILER.stage("extraction"):
+                    metadata = fetch_remote_metadata(file_url, FIELDS, rate_limiter)
+                PROGRESS.update(extracted=1)
+                if metadata:
+                    with lock:
+                        remote_metadata.append(metadata)
 
-            if not follow_extern and parsed_link.netloc and parsed_link.netloc != base_domain:
+
+def read_robots_sitemaps(base_url: str) -> List[str]:
+    """
+    Read the sitemap locations declared by the "Sitemap:" lines of a site's robots.txt.
+
+    Args:
+        base_url (str): Any URL of the site.
+
+    Returns:
+        List[str]: The declared sitemap URLs, empty if robots.txt is missing or declares none.
+    """
+    import urllib.request
+
+    robots_url = urljoin(base_url, "/robots.txt")
+    sitemaps = []
+    try:
+        request = urllib.request.Request(robots_url, headers={'User-Agent': USER_AGENT})
+        with open_url(request, "robots") as response:
+            for line in response:
+                name, _, value = line.decode("utf-8", "replace").partition(":")
+                if name.strip().lower() == "sitemap" and value.strip():
+                    sitemaps.append(urljoin(robots_url, value.strip()))
+    except (urllib.error.URLError, ValueError, OSError) as e:
+        LOGGER.info(f"No robots.txt read from {robots_url} Reason: {e}")
+    return sitemaps
+
+
+def iter_sitemap(url: str) -> Iterator[Tuple[str, bool]]:
+    """
+    Stream the locations listed by a sitemap, decompressing gzipped sitemaps on the fly.
+
+    Args:
+        url (str): The URL of the sitemap or sitemap index.
+
+    Yields:
+        Tuple[str, bool]: Each listed URL, and whether it is a nested sitemap (listed by a sitemap index).
+
+    Raises:
+        urllib.error.URLError: If there's an issue with opening the URL.
+        xml.etree.ElementTree.ParseError: If the sitemap is not well-formed XML.
+    """
+    import urllib.request
+    from xml.etree import ElementTree
+
+    request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+    with open_url(request, "sitemap") as response:
+        stream = response
+        content_type = response.headers.get('Content-Type', '')
+        if url.endswith(".gz") or "gzip" in content_type or response.headers.get('Content-Encoding') == "gzip":
+            stream = gzip.GzipFile(fileobj=response)
+
+        root = None
+        for event, element in ElementTree.iterparse(stream, events=("start", "end")):
+            tag = element.tag.rsplit("}", 1)[-1]
+            if event == "start":
+                if root is None:
+                    root = element
                 continue
+            if tag == "loc" and element.text and element.text.strip():
+                yield element.text.strip(), root.tag.endswith("sitemapindex")
+            elif tag in ("url", "sitemap"):
+                root.clear()
+
+
+def discover_sitemap_links(base_url: str, max_sitemaps: int = MAX_SITEMAPS) -> Iterator[str]:
+    """
+    Discover the URLs listed by a site's sitemaps.
+
+    Sitemaps are looked up in robots.txt and at well-known paths, and sitemap indexes are
+    followed recursively. Each URL is yielded as soon as it has been parsed.
+
+    Args:
+        base_url (str): Any URL of the site.
+        max_sitemaps (int): Maximum number of sitemap files to read.
+
+    Yields:
+        str: Each URL listed by the sitemaps.
+    """
+    import urllib.error
+    from xml.etree import ElementTree
+
+    pending = read_robots_sitemaps(base_url)
+    pending += [urljoin(base_url, path) for path in WELL_KNOWN_SITEMAPS]
+    visited: Set[str] = set()
+
+    while pending and len(visited) < max_sitemaps:
+        sitemap_url = pending.pop(0)
+        if sitemap_url in visited:
+            continue
+        visited.add(sitemap_url)
+
+        try:
+            LOGGER.info(f"Reading sitemap {sitemap_url}")
+            for location, is_sitemap in iter_sitemap(sitemap_url):
+                if is_sitemap:
+                    pending.append(location)
+                else:
+                    yield location
+        except (urllib.error.URLError, ElementTree.ParseError, OSError, EOFError) as e:
+            LOGGER.info(f"Unable to read sitemap {sitemap_url} Reason: {e}")
+
+
+class CrawlFrontier(queue.PriorityQueue):
+    """Crawl frontier handing out the most promising URLs first, within an optional page and time budget."""
+
+    def __init__(self, max_pages: int = 0, max_time: float = 0):
+        """
+        Initialize a CrawlFrontier instance.
+
+        max_pages (int): Maximum number of pages to fetch (0 for no limit).
+        max_time (float): Number of seconds after which no more pages are fetched (0 for no limit).
+        """
+        super().__init__()
+        self.counter = itertools.count()
+        self.max_pages = max_pages
+        self.deadline = time.monotonic() + max_time if max_time else None
+        self.pages = 0
+        self.budget_lock = threading.Lock()
+
+    def put(self, item, block: bool = True, timeout: Optional[float] = None, parent_yield: int = 0) -> None:
+        """
+        Queue a task with a priority derived from its URL, depth and the yield of the page linking to it.
+
+        Args:
+            item: The task (URL, depth, base_domain, follow_external_links), or SENTINEL.
+            block (bool): Passed to queue.PriorityQueue.put.
+            timeout (Optional[float]): Passed to queue.PriorityQueue.put.
+            parent_yield (int): Number of file links found on the page linking to the URL.
+        """
+        priority = float("inf") if item is SENTINEL else score_url(item[0], item[1], parent_yield)
+        super().put((priority, next(self.counter), item), block, timeout)
+        METRICS.set_gauge("queue_depth", self.qsize(), queue="frontier")
+
+    def _get(self):
+        METRICS.set_gauge("queue_depth", self._qsize() - 1, queue="frontier")
+        return super()._get()[2]
+
+    def claim_page(self) -> bool:
+        """
+        Account for a page about to be fetched.
+
+        Returns:
+            bool: True if the page fits in the budget, False once the page or time budget is spent.
+        """
+        with self.budget_lock:
+            if self.max_pages and self.pages >= self.max_pages:
+                return False
+            if self.deadline is not None and time.monotonic() >= self.deadline:
+                return False
+            self.pages += 1
+            return True
+
+    def stop(self) -> None:
+        """Spend the budget, so that no more pages are fetched."""
+        with self.budget_lock:
+            self.deadline = time.monotonic()
 
-            q.put((joined_link, depth - 1, base_domain, follow_extern))
+
+def score_url(url: str, depth: int, parent_yield: int = 0) -> float:
+    """
+    Score a URL of the crawl frontier. Lower scores are fetched first.
+
+    Shallow pages (with more depth left to follow), pages linked from pages rich in file
+    links, and paths hinting at documents (e.g. /docs/, /downloads/, /media/) come first.
+
+    Args:
+        url (str): The URL to score.
+        depth (int): Depth of links left to follow from the URL.
+        parent_yield (int): Number of file links found on the page linking to the URL.
+
+    Returns:
+        float: The priority of the URL.
+    """
+    path = urlparse(url).path.lower()
+    score = -depth * FRONTIER_DEPTH_WEIGHT
+    score -= min(parent_yield, FRONTIER_MAX_YIELD) * FRONTIER_YIELD_WEIGHT
+    if any(hint in path for hint in FRONTIER_PATH_HINTS):
+        score -= FRONTIER_HINT_BONUS
+    return score
 
 
 class RateLimiter:
-    """Rate limiter class to control the frequency of function calls."""
+    """Per-host token-bucket rate limiter to control the frequency of requests."""
 
-    def __init__(self, rate: float):
+    def __init__(self, rate: float, burst: int = 1):
         """
         Initialize a RateLimiter instance.
 
-        rate (float): Number of allowed function calls per second.
+        rate (float): Number of allowed requests per second for each host.
+        burst (int): Number of requests a host may receive back to back before throttling applies.
         """
         self.rate = rate
-        self.last_call = 0.0
+        self.burst = max(1, burst)
+        self.buckets: Dict[str, Tuple[float, float]] = {}
         self.lock = threading.Lock()
 
-    def wait(self) -> None:
-        """Pause the current thread to maintain the desired rate."""
+    def reserve(self, host: str = "") -> float:
+        """
+        Reserve a token from the bucket of the given host.
+
+        Tokens are allowed to go negative: each caller is handed its own slot in
+        the future and must wait for it, so concurrent callers never share a slot.
+
+        Args:
+            host (str): The host the request is aimed at.
+
+        Returns:
+            float: Number of seconds the caller must wait before issuing the request.
+        """
         with self.lock:
-            elapsed = time.time() - self.last_call
-            left_to_wait = 1.0 / self.rate - elapsed
-            if left_to_wait > 0:
-                time.sleep(left_to_wait)
-            self.last_call = time.time()
+            now = time.monotonic()
+            tokens, last = self.buckets.get(host, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - last) * self.rate) - 1
+            self.buckets[host] = (tokens, now)
+
+        return -tokens / self.rate if tokens < 0 else 0.0
+
+    def wait(self, host: str = "") -> None:
+        """Pause the current thread, outside of the lock, to maintain the desired rate for the host."""
+        delay = self.reserve(host)
+        if delay > 0:
+            time.sleep(delay)
 
 
 def calculate_hash(data: bytes) -> str:
@@ -965,6 +4031,8 @@ def calculate_hash(data: bytes) -> str:
     Returns:
         str: The hexadecimal digest of the SHA-256 hash.
     """
+    import hashlib
+
     sha256_hash = hashlib.sha256()
     sha256_hash.update(data)
     return sha256_hash.hexdigest()
@@ -990,7 +4058,7 @@ def find_unique_filename(path: str) -> str:
     return path
 
 
-def download_file(url: str, download_dir: str) -> None:
+def download_file(url: str, download_dir: str) -> Optional[str]:
     """
     Download a file from a specified URL and save it to the given directory.
     If the file already exists and the content is identical (same hash),
@@ -1001,35 +4069,528 @@ def download_file(url: str, download_dir: str) -> None:
         url (str): The URL from which the file will be downloaded.
         download_dir (str): The directory path where the file will be saved.
 
+    Returns:
+        Optional[str]: Path of the local file holding the content (the existing file for
+        duplicates), or None if the download failed.
+
     Raises:
         Exception: If the download fails for any reason, the exception is caught and
-                    an error message with the reason for the failure is printed.
+                    an error message with the reason for the failure is logged.
     """
     try:
         encoded_url = quote(url, safe=":/?&=")
         local_filename = os.path.join(download_dir, os.path.basename(urlparse(encoded_url).path))
 
-        with urllib.request.urlopen(encoded_url) as response:
+        with open_url(encoded_url, "download") as response:
             data = response.read()
+            METRICS.increment("http_bytes_total", len(data), kind="download")
             file_hash = calculate_hash(data)
 
-            if os.path.exists(local_filename):
-                with open(local_filename, 'rb') as existing_file:
-                    existing_file_hash = calculate_hash(existing_file.read())
+            if os.path.exists(local_filename):
+                with open(local_filename, 'rb') as existing_file:
+                    existing_file_hash = calculate_hash(existing_file.read())
+
+                if file_hash == existing_file_hash:
+                    LOGGER.info(f"Duplicate file detected for '{local_filename}'. Both have the same hash: {file_hash}.")
+                    return local_filename
+                else:
+                    new_local_filename = find_unique_filename(local_filename)
+                    LOGGER.info(f"File '{local_filename}' already exists with a different hash. Saving the new file as '{new_local_filename}'.")
+                    local_filename = new_local_filename
+
+            with open(local_filename, 'wb') as out_file:
+                out_file.write(data)
+            LOGGER.info(f"Downloaded {url} to {local_filename}. SHA-256: {file_hash}.")
+        PROGRESS.update(files=1, nbytes=len(data))
+        return local_filename
+    except Exception as e:
+        LOGGER.error(f"Failed to download {url}. Reason: {e}")
+        return None
+
+
+class ExtractionPipeline:
+    """Bounded pipeline running metadata extraction and reporting while the crawl continues."""
+
+    def __init__(self, args: Namespace, ignore_patterns: List[str], workers: int = 2,
+                 queue_size: int = DEFAULT_PIPELINE_QUEUE_SIZE,
+                 extractor: Optional[Callable[[str, List[str]], dict]] = None,
+                 events: Optional[queue.Queue] = None):
+        """
+        Initialize an ExtractionPipeline instance.
+
+        args (Namespace): The parsed command-line arguments (display, format and export options).
+        ignore_patterns (List[str]): Patterns to use for excluding metadata fields from the report.
+        workers (int): Number of extraction threads.
+        extractor (Optional[Callable[[str, List[str]], dict]]): Function extracting the metadata of a submitted
+            item: get_metadata (the default) for local paths, fetch_metadata_from_url for URLs analyzed in memory.
+        queue_size (int): Capacity of the queues between stages. A full queue blocks the
+            stage feeding it, which throttles the crawl when extraction falls behind.
+        events (Optional[queue.Queue]): Queue receiving (kind, source, metadata) events for the pages
+            crawled, the files submitted and their metadata, instead of reporting them (see Engine.crawl).
+        """
+        self.args = args
+        self.ignore_patterns = ignore_patterns
+        self.extractor = extractor or get_metadata
+        self.events = events
+        self.paths: queue.Queue[Optional[str]] = queue.Queue(maxsize=queue_size)
+        self.results: queue.Queue[Optional[Tuple[str, Dict[str, str]]]] = queue.Queue(maxsize=queue_size)
+        self.submitted: Set[str] = set()
+        self.all_metadata: List[MetadataRecord] = []
+        self.lock = threading.Lock()
+        self.extractors = [threading.Thread(target=PROFILER.wrap(self._extract)) for _ in range(max(1, workers))]
+        self.reporter = threading.Thread(target=PROFILER.wrap(self._report))
+
+    def start(self) -> None:
+        """Start the extraction and reporting threads."""
+        for t in self.extractors:
+            t.start()
+        self.reporter.start()
+
+    def submit(self, path: str) -> None:
+        """
+        Queue a file for extraction, blocking while the extraction queue is full.
+
+        Args:
+            path (str): Path of the downloaded file, or its URL when analyzing in memory.
+                Files already submitted are ignored.
+        """
+        with self.lock:
+            if path in self.submitted:
+                return
+            self.submitted.add(path)
+        self.emit("file", path)
+        self.paths.put(path)
+        METRICS.set_gauge("queue_depth", self.paths.qsize(), queue="extraction")
+
+    def _extract(self) -> None:
+        """Extraction stage: turn queued files into metadata dictionaries."""
+        while True:
+            path = self.paths.get()
+            METRICS.set_gauge("queue_depth", self.paths.qsize(), queue="extraction")
+            if path is SENTINEL:
+                break
+            try:
+                with PROFILER.stage("extraction"):
+                    metadata = self.extractor(path, FIELDS)
+            except Exception as e:
+                LOGGER.error(f"Failed to extract metadata from {path}. Reason: {e}")
+                metadata = {}
+            PROGRESS.update(extracted=1)
+            self.results.put((path, metadata))
+            self.paths.task_done()
+
+    def _report(self) -> None:
+        """Reporting stage: collect results, printing them as they arrive in 'all' display mode."""
+        while True:
+            result = self.results.get()
+            METRICS.set_gauge("queue_depth", self.results.qsize(), queue="results")
+            if result is SENTINEL:
+                break
+            path, metadata = result
+            try:
+                if metadata and self.events is not None:
+                    self.emit("metadata", path, metadata)
+                elif metadata:
+                    metadata = MetadataRecord(metadata)
+                    self.all_metadata.append(metadata)
+                    if self.args.display == "all" and not self.args.export:
+                        with PROFILER.stage("rendering"), PROGRESS.pause():
+                            display_all_metadata([metadata], self.ignore_patterns)
+            except Exception as e:
+                LOGGER.error(f"Failed to report metadata of {path}. Reason: {e}")
+            finally:
+                self.results.task_done()
+
+    def emit(self, kind: str, source: str, metadata: Optional[Dict[str, str]] = None) -> None:
+        """
+        Hand an event to the events queue, if any.
+
+        Args:
+            kind (str): "page" for a crawled page, "file" for a submitted file, "metadata" for its metadata.
+            source (str): URL of the page, or path or URL of the file.
+            metadata (Optional[Dict[str, str]]): The metadata of the file, for "metadata" events.
+        """
+        if self.events is not None:
+            self.events.put((kind, source, metadata))
+
+    def close(self) -> List[MetadataRecord]:
+        """
+        Drain the pipeline, stop its threads and produce the final report.
+
+        In 'all' display mode the entries have already been printed, so only exports and
+        the 'singular' display are produced here. Nothing is reported when events are queued.
+
+        Returns:
+            List[MetadataRecord]: The metadata of every extracted file.
+        """
+        for _ in self.extractors:
+            self.paths.put(SENTINEL)
+        for t in self.extractors:
+            t.join()
+        self.results.put(SENTINEL)
+        self.reporter.join()
+        PROGRESS.stop()
+
+        if self.all_metadata and (self.args.export or self.args.display != "all"):
+            report_metadata(self.args, self.all_metadata, self.ignore_patterns)
+        return self.all_metadata
+
+
+def fetch_range(url: str, start: int, end: Optional[int] = None,
+                rate_limiter: Optional[RateLimiter] = None) -> Tuple[bytes, int, bool]:
+    """
+    Fetch a byte range of a remote file with an HTTP Range request.
+
+    A negative start requests the last -start bytes of the file. When the server
+    ignores the Range header, the whole body is returned instead.
+
+    Args:
+        url (str): The URL of the remote file.
+        start (int): First byte of the range, or a negative suffix length.
+        end (Optional[int]): Last byte of the range (inclusive). Ignored for suffix ranges.
+        rate_limiter (Optional[RateLimiter]): Per-host limiter waited on before the request.
+
+    Returns:
+        Tuple[bytes, int, bool]: The received data, the total size of the remote file,
+        and whether the server honoured the range (False means data is the full file).
+
+    Raises:
+        urllib.error.URLError: If there's an issue with opening the URL.
+    """
+    import urllib.request
+
+    if rate_limiter is not None:
+        rate_limiter.wait(urlparse(url).netloc)
+
+    if start < 0:
+        byte_range = f"bytes={start}"
+    elif end is None:
+        byte_range = f"bytes={start}-"
+    else:
+        byte_range = f"bytes={start}-{end}"
+
+    request = urllib.request.Request(quote(url, safe=":/?&=%"), headers={'User-Agent': USER_AGENT, 'Range': byte_range})
+    with open_url(request, "range") as response:
+        data = response.read()
+        METRICS.increment("http_bytes_total", len(data), kind="range")
+        content_range = response.headers.get('Content-Range', '')
+        if response.status == 206 and '/' in content_range:
+            total = content_range.rsplit('/', 1)[1]
+            return data, int(total) if total.isdigit() else start + len(data), True
+        return data, len(data), False
+
+
+def zip_metadata_ranges(tail: bytes, tail_offset: int) -> List[Tuple[int, int]]:
+    """
+    Locate the byte ranges of the metadata members of a ZIP based document (OOXML/ODF).
+
+    Args:
+        tail (bytes): The last bytes of the archive, which must contain the central directory.
+        tail_offset (int): Offset of the first byte of tail within the archive.
+
+    Returns:
+        List[Tuple[int, int]]: Inclusive (start, end) ranges of the metadata members' local
+        headers and data. Empty if the central directory could not be read from tail.
+    """
+    eocd = tail.rfind(b"PK\x05\x06")
+    if eocd < 0 or eocd + 22 > len(tail):
+        return []
+
+    cd_size, cd_offset = struct.unpack_from("<II", tail, eocd + 12)
+    position = cd_offset - tail_offset
+    if position < 0:
+        return []
+
+    ranges = []
+    while position + 46 <= len(tail) and tail[position:position + 4] == b"PK\x01\x02":
+        compressed_size, = struct.unpack_from("<I", tail, position + 20)
+        name_length, extra_length, comment_length = struct.unpack_from("<HHH", tail, position + 28)
+        local_offset, = struct.unpack_from("<I", tail, position + 42)
+        name = tail[position + 46:position + 46 + name_length].decode("utf-8", "replace")
+        if name in ZIP_METADATA_MEMBERS:
+            ranges.append((local_offset, local_offset + 30 + name_length + REMOTE_ZIP_HEADER_SLACK + compressed_size))
+        position += 46 + name_length + extra_length + comment_length
+
+    return ranges
+
+
+def pdf_object_offsets(data: bytes, data_offset: int) -> Tuple[Dict[int, int], bytes]:
+    """
+    Read the classic cross-reference table and trailer found at the end of a PDF.
+
+    Args:
+        data (bytes): The last bytes of the PDF, which must contain the last xref table.
+        data_offset (int): Offset of the first byte of data within the PDF.
+
+    Returns:
+        Tuple[Dict[int, int], bytes]: Mapping of object numbers to byte offsets, and the
+        raw trailer dictionary. Both are empty if no classic xref table could be read.
+    """
+    startxref = data.rfind(b"startxref")
+    match = re.match(rb"startxref\s+(\d+)", data[startxref:]) if startxref >= 0 else None
+    if not match:
+        return {}, b""
+
+    position = int(match.group(1)) - data_offset
+    if position < 0 or not data[position:position + 4] == b"xref":
+        return {}, b""
+
+    return pdf_xref_table(data, position)
+
+
+def pdf_xref_table(data: bytes, position: int) -> Tuple[Dict[int, int], bytes]:
+    """
+    Read a classic cross-reference table and the trailer following it.
+
+    Args:
+        data (bytes): The raw PDF data.
+        position (int): Position of the "xref" keyword within data.
+
+    Returns:
+        Tuple[Dict[int, int], bytes]: Mapping of object numbers to byte offsets, and the
+        raw trailer dictionary. Both are empty if the trailer could not be found.
+    """
+    trailer_start = data.find(b"trailer", position)
+    if trailer_start < 0:
+        return {}, b""
+
+    offsets = {}
+    object_number = 0
+    for line in data[position + 4:trailer_start].splitlines():
+        fields = line.split()
+        if len(fields) == 2:
+            object_number = int(fields[0])
+        elif len(fields) == 3:
+            if fields[2] == b"n":
+                offsets[object_number] = int(fields[0])
+            object_number += 1
+
+    return offsets, data[trailer_start:trailer_start + 4096]
+
+
+def pdf_stream(data: bytes, position: int, offsets: Optional[Dict[int, int]] = None) -> Tuple[bytes, bytes]:
+    """
+    Read a PDF stream object, decoding its content when it is Flate encoded.
+
+    Args:
+        data (bytes): The raw PDF data.
+        position (int): Position of the object within data.
+        offsets (Optional[Dict[int, int]]): Mapping of object numbers to byte offsets, used
+        to resolve an indirect /Length.
+
+    Returns:
+        Tuple[bytes, bytes]: The raw stream dictionary and the decoded content.
+
+    Raises:
+        ValueError: If there is no stream object at position, if it is larger than XMP_MAX_SIZE
+                    or if it uses another filter or predictor.
+        zlib.error: If the content cannot be decompressed.
+    """
+    header = data[position:position + PDF_MAX_OBJECT_SIZE]
+    match = re.match(rb"\s*\d+\s+\d+\s+obj\s*(<<.*?>>)\s*stream\r?\n", header, re.S)
+    if not match:
+        raise ValueError("No PDF stream object found.")
+
+    dictionary = match.group(1)
+    reference = pdf_reference(dictionary, b"Length")
+    length = re.search(rb"/Length\s+(\d+)", dictionary)
+    if reference is not None:
+        size = int(pdf_object(data, offsets or {}, reference).strip() or -1)
+    else:
+        size = int(length.group(1)) if length else -1
+    if not 0 <= size <= XMP_MAX_SIZE:
+        raise ValueError("Unsupported PDF stream length.")
+
+    content = data[position + match.end():position + match.end() + size]
+    filters = re.findall(rb"/(\w+Decode)\b", dictionary)
+    if filters == [b"FlateDecode"]:
+        content = zlib.decompress(content)
+    elif filters:
+        raise ValueError("Unsupported PDF stream filter.")
+
+    predictor = re.search(rb"/Predictor\s+(\d+)", dictionary)
+    if predictor and int(predictor.group(1)) >= 10:
+        # PNG predictors prefix each row with a filter type; cross-reference streams use None or Up.
+        columns = re.search(rb"/Columns\s+(\d+)", dictionary)
+        width = int(columns.group(1)) if columns else 1
+        rows, previous = bytearray(), bytes(width)
+        for start in range(0, len(content) - width, width + 1):
+            row = content[start + 1:start + 1 + width]
+            if content[start] == 2:
+                row = bytes((a + b) & 0xFF for a, b in zip(row, previous))
+            elif content[start]:
+                raise ValueError("Unsupported PNG predictor.")
+            rows += row
+            previous = row
+        content = bytes(rows)
+    elif predictor and int(predictor.group(1)) > 1:
+        raise ValueError("Unsupported PDF predictor.")
+
+    return dictionary, content
+
+
+def pdf_xref_stream(dictionary: bytes, content: bytes) -> Dict[int, int]:
+    """
+    Read the entries of a PDF 1.5 cross-reference stream.
+
+    Args:
+        dictionary (bytes): The raw stream dictionary, which also serves as the trailer.
+        content (bytes): The decoded stream content.
+
+    Returns:
+        Dict[int, int]: Mapping of object numbers to byte offsets. Objects stored in object
+        streams are left out.
+
+    Raises:
+        ValueError: If the dictionary is not the one of a cross-reference stream.
+    """
+    widths = re.search(rb"/W\s*\[\s*(\d+)\s+(\d+)\s+(\d+)\s*\]", dictionary)
+    size = re.search(rb"/Size\s+(\d+)", dictionary)
+    if not re.search(rb"/Type\s*/XRef\b", dictionary) or not widths or not size:
+        raise ValueError("Invalid PDF cross-reference stream.")
+
+    kind_width, offset_width, _ = (int(width) for width in widths.groups())
+    row = sum(int(width) for width in widths.groups())
+    index = re.search(rb"/Index\s*\[([\d\s]*)\]", dictionary)
+    ranges = [int(value) for value in index.group(1).split()] if index else [0, int(size.group(1))]
+
+    offsets = {}
+    position = 0
+    for first, count in zip(ranges[::2], ranges[1::2]):
+        for number in range(first, first + count):
+            entry = content[position:position + row]
+            position += row
+            if len(entry) < row:
+                return offsets
+            if not kind_width or int.from_bytes(entry[:kind_width], "big") == 1:
+                offsets[number] = int.from_bytes(entry[kind_width:kind_width + offset_width], "big")
+    return offsets
+
+
+def pdf_reference(dictionary: bytes, key: bytes) -> Optional[int]:
+    """
+    Find the object number referenced by a key of a PDF dictionary.
+
+    Args:
+        dictionary (bytes): The raw PDF dictionary.
+        key (bytes): The key to look up, e.g. b"Info".
+
+    Returns:
+        Optional[int]: The referenced object number, or None if the key is absent.
+    """
+    match = re.search(rb"/" + key + rb"\s+(\d+)\s+\d+\s+R", dictionary)
+    return int(match.group(1)) if match else None
+
+
+def read_sparse_chunk(chunks: Dict[int, bytes], offset: int) -> bytes:
+    """
+    Read the fetched data starting at the given offset.
+
+    Args:
+        chunks (Dict[int, bytes]): Mapping of offsets to the data found at those offsets.
+        offset (int): Offset of the data to read.
+
+    Returns:
+        bytes: The data from offset to the end of the chunk holding it, or b"" if it was not fetched.
+    """
+    for start, data in chunks.items():
+        if start <= offset < start + len(data):
+            return data[offset - start:]
+    return b""
+
+
+def write_sparse_file(path: str, chunks: Dict[int, bytes], total: int) -> None:
+    """
+    Write fetched byte ranges at their original offsets in a file of the given size.
+
+    Args:
+        path (str): Path of the file to write.
+        chunks (Dict[int, bytes]): Mapping of offsets to the data found at those offsets.
+        total (int): Size of the original file. Missing ranges are left as holes.
+    """
+    with open(path, 'wb') as out_file:
+        for offset, data in sorted(chunks.items()):
+            out_file.seek(offset)
+            out_file.write(data)
+        out_file.truncate(total)
+
+
+def fetch_remote_metadata(url: str, fields: List[str], rate_limiter: Optional[RateLimiter] = None) -> Dict[str, str]:
+    """
+    Extract metadata from a remote file while downloading only the regions holding it.
+
+    The head of the file is fetched first. PDF, ZIP based and video files also get their
+    tail fetched, along with the objects or members it points to (PDF Info dictionary and
+    XMP packet, OOXML/ODF docProps and meta.xml). The ranges are laid out in a sparse
+    temporary file that is handed to exiftool. If the server does not support Range
+    requests, or if nothing could be extracted from the partial file, the full file is
+    downloaded instead.
+
+    Args:
+        url (str): The URL of the remote file.
+        fields (List[str]): List of metadata fields to extract.
+        rate_limiter (Optional[RateLimiter]): Per-host limiter waited on before each request.
+
+    Returns:
+        Dict[str, str]: Dictionary containing the extracted metadata. "File Name" holds the URL.
+    """
+    import tempfile
+    import urllib.error
+    import urllib.request
 
-                if file_hash == existing_file_hash:
-                    print(f"WARNING: Duplicate file detected for '{local_filename}'. Both have the same hash: {file_hash}.")
-                    return
-                else:
-                    new_local_filename = find_unique_filename(local_filename)
-                    print(f"INFO: File '{local_filename}' already exists with a different hash. Saving the new file as '{new_local_filename}'.")
-                    local_filename = new_local_filename
+    extension = os.path.splitext(urlparse(url).path)[1].lstrip('.').lower()
 
-            with open(local_filename, 'wb') as out_file:
-                out_file.write(data)
-            print(f"INFO: Downloaded {url} to {local_filename}. SHA-256: {file_hash}.")
+    try:
+        head, total, partial = fetch_range(url, 0, REMOTE_HEAD_SIZE - 1, rate_limiter)
+        if not partial or total <= len(head):
+            LOGGER.info(f"Extracted metadata from {url} using a full download of {len(head)} bytes.")
+            return get_metadata_from_bytes(head, fields, url)
+
+        chunks = {0: head}
+        if extension in REMOTE_TAIL_EXTENSIONS:
+            tail_offset = max(len(head), total - REMOTE_TAIL_SIZE)
+            tail, _, _ = fetch_range(url, tail_offset, total - 1, rate_limiter)
+            chunks[tail_offset] = tail
+
+            if extension == "pdf":
+                offsets, trailer = pdf_object_offsets(tail, tail_offset)
+                for key in (b"Info", b"Root"):
+                    start = offsets.get(pdf_reference(trailer, key), -1)
+                    if len(head) <= start < tail_offset:
+                        chunks[start], _, _ = fetch_range(url, start, min(start + REMOTE_OBJECT_SIZE, total) - 1, rate_limiter)
+
+                root_data = read_sparse_chunk(chunks, offsets.get(pdf_reference(trailer, b"Root"), -1))
+                start = offsets.get(pdf_reference(root_data[:REMOTE_OBJECT_SIZE], b"Metadata"), -1)
+                if len(head) <= start < tail_offset:
+                    chunks[start], _, _ = fetch_range(url, start, min(start + REMOTE_TAIL_SIZE, total) - 1, rate_limiter)
+            elif extension in ZIP_EXTENSIONS:
+                for start, end in zip_metadata_ranges(tail, tail_offset):
+                    if len(head) <= start < tail_offset:
+                        chunks[start], _, _ = fetch_range(url, start, min(end, total - 1), rate_limiter)
+
+        temporary = tempfile.NamedTemporaryFile(suffix=f".{extension}", delete=False)
+        temporary.close()
+        try:
+            write_sparse_file(temporary.name, chunks, total)
+            metadata = get_metadata(temporary.name, fields)
+        finally:
+            os.remove(temporary.name)
+
+        if any(field != "File Name" for field in metadata):
+            fetched = sum(len(data) for data in chunks.values())
+            LOGGER.info(f"Extracted metadata from {url} using {fetched} of {total} bytes.")
+            metadata["File Name"] = url
+            return metadata
+
+        LOGGER.info(f"Partial metadata extraction failed for {url}, falling back to a full download.")
+        if rate_limiter is not None:
+            rate_limiter.wait(urlparse(url).netloc)
+        request = urllib.request.Request(quote(url, safe=":/?&=%"), headers={'User-Agent': USER_AGENT})
+        with open_url(request, "stream") as response:
+            return get_metadata_from_bytes(MeteredStream(response, "stream"), fields, url)
     except Exception as e:
-        print(f"ERROR: Failed to download {url}. Reason: {e}")
+        LOGGER.error(f"Failed to extract remote metadata from {url}. Reason: {e}")
+        return {}
 
 
 def worker_thread(q: queue.Queue[Tuple[str, int, str, bool]],
@@ -1038,7 +4599,10 @@ def worker_thread(q: queue.Queue[Tuple[str, int, str, bool]],
                   rate_limiter: RateLimiter,
                   file_stats: Dict[str, int],
                   download_dir: Optional[str] = None,
-                  scan: bool = False) -> None:
+                  scan: bool = False,
+                  max_page_size: int = DEFAULT_MAX_PAGE_SIZE,
+                  remote_metadata: Optional[List[Dict[str, str]]] = None,
+                  pipeline: Optional[ExtractionPipeline] = None) -> None:
     """
     Worker thread function to process URLs from the queue.
 
@@ -1050,13 +4614,16 @@ def worker_thread(q: queue.Queue[Tuple[str, int, str, bool]],
         file_stats: Dictionary tracking statistics about processed files.
         download_dir: Directory where files should be saved; if None, no download occurs.
         scan: Indicates whether the tool is in scan mode or not.
+        max_page_size: Maximum number of bytes read from each page.
+        remote_metadata: List receiving remote metadata in scan mode; if None, metadata is not fetched.
+        pipeline: Pipeline receiving downloaded files for extraction; if None, files are only downloaded.
     """
     while True:
         task = get_task_from_queue(q)
         if task is SENTINEL:
             break
 
-        process_task(task, q, seen, lock, rate_limiter, file_stats, download_dir, scan)
+        process_task(task, q, seen, lock, rate_limiter, file_stats, download_dir, scan, max_page_size, remote_metadata, pipeline)
 
         q.task_done()
 
@@ -1081,7 +4648,10 @@ def process_task(task: Tuple[str, int, str, bool],
                  rate_limiter: RateLimiter,
                  file_stats: Dict[str, int],
                  download_dir: Optional[str] = None,
-                 scan: bool = False) -> None:
+                 scan: bool = False,
+                 max_page_size: int = DEFAULT_MAX_PAGE_SIZE,
+                 remote_metadata: Optional[List[Dict[str, str]]] = None,
+                 pipeline: Optional[ExtractionPipeline] = None) -> None:
     """
     Processes a given task by extracting the relevant information and invoking the appropriate URL processing function.
 
@@ -1094,9 +4664,845 @@ def process_task(task: Tuple[str, int, str, bool],
         file_stats (Dict[str, int]): A dictionary to track various statistics related to file processing.
         download_dir (Optional[str], optional): The directory where the files should be saved. If None, no files are saved. Defaults to None.
         scan (bool, optional): A flag indicating if the tool is in scan mode. If True, URLs are only scanned and not downloaded. Defaults to False.
+        max_page_size (int, optional): Maximum number of bytes read from each page. Defaults to DEFAULT_MAX_PAGE_SIZE.
+        remote_metadata (Optional[List[Dict[str, str]]], optional): List receiving remote metadata in scan mode. Defaults to None.
+        pipeline (Optional[ExtractionPipeline], optional): Pipeline receiving downloaded files for extraction. Defaults to None.
     """
     url, depth, base_domain, follow_extern = task
-    process_url(url, depth, base_domain, q, seen, lock, rate_limiter, file_stats, download_dir, scan, follow_extern)
+    process_url(url, depth, base_domain, q, seen, lock, rate_limiter, file_stats, download_dir, scan, follow_extern, max_page_size,
+                remote_metadata, pipeline)
+
+
+def crawl_site(url: str, q: CrawlFrontier, rate_limiter: RateLimiter, file_stats: Dict[str, int],
+               depth: int = 0, threads: int = 4, follow_extern: bool = False, sitemap: bool = False,
+               download_dir: Optional[str] = None, scan: bool = False,
+               max_page_size: int = DEFAULT_MAX_PAGE_SIZE,
+               remote_metadata: Optional[List[Dict[str, str]]] = None,
+               pipeline: Optional[ExtractionPipeline] = None) -> Set[str]:
+    """
+    Crawl a site with worker threads, from its URL and optionally its sitemaps, until the frontier is empty.
+
+    Args:
+        url (str): The URL to start from.
+        q (CrawlFrontier): The crawl frontier, holding the page and time budget.
+        rate_limiter (RateLimiter): RateLimiter object.
+        file_stats (Dict[str, int]): File statistics dictionary, filled in scan mode.
+        depth (int): Depth of links to follow.
+        threads (int): Number of worker threads.
+        follow_extern (bool): Whether to follow external links.
+        sitemap (bool): Whether to also enumerate the files listed in the site's sitemaps.
+        download_dir (Optional[str]): Directory to save downloaded files. Defaults to None.
+        scan (bool): Whether to scan only. Defaults to False.
+        max_page_size (int): Maximum number of bytes read from each page. Defaults to DEFAULT_MAX_PAGE_SIZE.
+        remote_metadata (Optional[List[Dict[str, str]]]): In scan mode, list receiving the metadata of
+            each file found. Defaults to None (metadata is not fetched).
+        pipeline (Optional[ExtractionPipeline]): Pipeline receiving the files for extraction. Defaults to None.
+
+    Returns:
+        Set[str]: The URLs processed.
+    """
+    base_domain = urlparse(url).netloc
+    seen: Set[str] = set()
+    lock = threading.Lock()
+    q.put((url, depth, base_domain, follow_extern))
+
+    workers = []
+    for _ in range(threads):
+        t = threading.Thread(target=PROFILER.wrap(worker_thread), args=(q, seen, lock, rate_limiter, file_stats, download_dir, scan, max_page_size, remote_metadata, pipeline))
+        t.start()
+        workers.append(t)
+
+    if sitemap:
+        for link in discover_sitemap_links(url):
+            if not follow_extern and urlparse(link).netloc != base_domain:
+                continue
+            if is_valid_file_link(link):
+                q.put((link, 0, base_domain, follow_extern))
+
+    q.join()
+
+    for _ in range(threads):
+        q.put(None)
+    for t in workers:
+        t.join()
+    return seen
+
+
+def extract_files(files: List[str], jobs: int = 1) -> List[Optional[MetadataRecord]]:
+    """
+    Extract the metadata of files, on one or several threads.
+
+    With several jobs, the files are handed out as planned by plan_extraction, large files first, and
+    each thread keeps its own exiftool process running (see ExifTool) and its own archive open (see
+    ArchiveCache). Files not reached before the global deadline (DEADLINE) are quarantined.
+
+    Args:
+        files (List[str]): The files to analyze, as returned by get_files.
+        jobs (int): Number of extraction threads.
+
+    Returns:
+        List[Optional[MetadataRecord]]: The metadata of each file, in the order of the file list,
+        None for the files not reached before the deadline.
+    """
+    def extract(file: str, exiftool: Optional[ExifTool] = None, archives: Optional[ArchiveCache] = None) -> MetadataRecord:
+        try:
+            metadata = MetadataRecord(get_metadata(file, FIELDS, exiftool, archives))
+        except Exception as e:
+            LOGGER.error(f"Failed to extract metadata from {file}. Reason: {e}")
+            metadata = MetadataRecord({})
+        PROGRESS.update(files=1, nbytes=os.path.getsize(file) if PROGRESS.active and os.path.isfile(file) else 0)
+        return metadata
+
+    if jobs <= 1:
+        all_metadata: List[Optional[MetadataRecord]] = []
+        for index, file in enumerate(files):
+            if DEADLINE is not None and time.monotonic() >= DEADLINE:
+                QUARANTINE.extend(files[index:], "not analyzed before the deadline")
+                return all_metadata + [None] * (len(files) - index)
+            all_metadata.append(extract(file))
+        return all_metadata
+
+    tasks: queue.SimpleQueue = queue.SimpleQueue()
+    plan = plan_extraction(files, jobs)
+    for task in plan:
+        tasks.put(task)
+    records: List[Optional[MetadataRecord]] = [None] * len(files)
+    skipped: List[int] = []
+
+    def work() -> None:
+        with contextlib.closing(ExifTool()) as exiftool, contextlib.closing(ArchiveCache()) as archives:
+            while True:
+                try:
+                    task = tasks.get_nowait()
+                except queue.Empty:
+                    return
+                for position in task:
+                    file = files[position]
+                    if DEADLINE is not None and time.monotonic() >= DEADLINE:
+                        skipped.append(position)
+                        continue
+                    records[position] = extract(file, exiftool, archives)
+
+    threads = [threading.Thread(target=work, daemon=True) for _ in range(min(jobs, len(plan)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    QUARANTINE.extend([files[position] for position in sorted(skipped)], "not analyzed before the deadline")
+    return records
+
+
+class Coordinator:
+    """Share the files of an analysis between workers in leased batches and collect their results."""
+
+    def __init__(self, files: List[str], batch_size: int = DEFAULT_BATCH_SIZE,
+                 lease_timeout: float = DEFAULT_LEASE_TIMEOUT, max_attempts: int = DISTRIBUTED_MAX_ATTEMPTS):
+        """
+        Initialize a Coordinator instance.
+
+        files (List[str]): The files to analyze, as returned by get_files.
+        batch_size (int): Maximum number of files handed to a worker at a time. Large files are handed
+            out alone and first (see plan_extraction).
+        lease_timeout (float): Seconds a worker has to return the results of a batch. Batches
+            whose lease expires (lost or crashed worker) are handed out again.
+        max_attempts (int): Number of times a batch is handed out before it is given up.
+        """
+        self.positions = plan_extraction(files, batch_size=batch_size)
+        self.batches = [[files[position] for position in task] for task in self.positions]
+        self.size = len(files)
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self.pending = deque(range(len(self.batches)))
+        self.leases: Dict[int, float] = {}
+        self.attempts = [0] * len(self.batches)
+        self.results: Dict[int, List[Dict[str, str]]] = {}
+        self.failed: Set[int] = set()
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+        self._check_finished()
+
+    def lease(self) -> Optional[Tuple[int, List[str]]]:
+        """
+        Hand out the next pending batch.
+
+        Returns:
+            Optional[Tuple[int, List[str]]]: The batch number and its files, or None when no batch
+            is pending (all of them are leased or finished).
+        """
+        with self.lock:
+            self._expire_leases()
+            if not self.pending:
+                return None
+            batch = self.pending.popleft()
+            self.attempts[batch] += 1
+            self.leases[batch] = time.monotonic() + self.lease_timeout
+        METRICS.increment("distributed_batches_total", status="leased")
+        return batch, self.batches[batch]
+
+    def complete(self, batch: int, results: List[Dict[str, str]],
+                 quarantined: Iterable[Tuple[str, str]] = ()) -> bool:
+        """
+        Record the results of a batch.
+
+        Results arriving after the lease expired are still accepted, as long as the batch has not
+        been completed by another worker in the meantime.
+
+        Args:
+            batch (int): The batch number.
+            results (List[Dict[str, str]]): The metadata of each file of the batch, in order.
+            quarantined (Iterable[Tuple[str, str]]): (path, reason) pairs of the files of the batch
+                the worker quarantined, added to QUARANTINE.
+
+        Returns:
+            bool: True if the results were recorded, False if they are unexpected or duplicate.
+        """
+        with self.lock:
+            if not 0 <= batch < len(self.batches) or batch in self.results or len(results) != len(self.batches[batch]):
+                return False
+            self.results[batch] = results
+            self.leases.pop(batch, None)
+            self.failed.discard(batch)
+            if batch in self.pending:
+                self.pending.remove(batch)
+            self._check_finished()
+        for path, reason in quarantined:
+            QUARANTINE.add(path, reason)
+        METRICS.increment("distributed_batches_total", status="completed")
+        PROGRESS.update(files=len(results))
+        return True
+
+    def wait(self, interval: float = DISTRIBUTED_POLL_INTERVAL, deadline: Optional[float] = None) -> List[MetadataRecord]:
+        """
+        Wait until every batch is completed or given up (see join).
+
+        Returns:
+            List[MetadataRecord]: The metadata of the analyzed files, in the order of the file list.
+        """
+        self.join(interval, deadline)
+        return [record for record in self.records() if record is not None]
+
+    def join(self, interval: float = DISTRIBUTED_POLL_INTERVAL, deadline: Optional[float] = None,
+             workers: Sequence[subprocess.Popen] = ()) -> None:
+        """
+        Wait until every batch is completed or given up.
+
+        Args:
+            interval (float): Seconds between checks of the expired leases.
+            deadline (Optional[float]): time.monotonic() value at which the batches not completed yet are
+                given up, their files being quarantined. Defaults to None (no deadline).
+            workers (Sequence[subprocess.Popen]): The local worker processes. Once all of them have exited
+                (crashed, killed or unable to connect) and no batch is leased, the batches not completed
+                yet are given up, their files being quarantined. Defaults to () (remote workers only).
+        """
+        while not self.finished.wait(interval if deadline is None else min(interval, max(deadline - time.monotonic(), 0))):
+            with self.lock:
+                if deadline is not None and time.monotonic() >= deadline:
+                    self._give_up("not analyzed before the deadline")
+                    continue
+                self._expire_leases()
+                if workers and not self.leases and all(worker.poll() is not None for worker in workers):
+                    LOGGER.error("Every local worker exited before the end of the analysis.")
+                    self._give_up("no worker left to analyze it")
+
+    def records(self) -> List[Optional[MetadataRecord]]:
+        """
+        Return the results received so far.
+
+        Returns:
+            List[Optional[MetadataRecord]]: The metadata of each file of the file list, in order,
+            None for the files whose batch is not completed.
+        """
+        with self.lock:
+            records: List[Optional[MetadataRecord]] = [None] * self.size
+            for batch, results in self.results.items():
+                for position, metadata in zip(self.positions[batch], results):
+                    records[position] = MetadataRecord(metadata)
+        return records
+
+    def _expire_leases(self) -> None:
+        """Hand out again the batches whose lease expired, or give them up after max_attempts."""
+        now = time.monotonic()
+        for batch, deadline in list(self.leases.items()):
+            if deadline > now:
+                continue
+            del self.leases[batch]
+            if self.attempts[batch] < self.max_attempts:
+                self.pending.append(batch)
+                METRICS.increment("distributed_batches_total", status="retried")
+                LOGGER.warning(f"Batch {batch} was not returned in time, handing it out again.")
+            else:
+                self.failed.add(batch)
+                METRICS.increment("distributed_batches_total", status="failed")
+                LOGGER.error(f"Batch {batch} was not returned after {self.attempts[batch]} attempts. "
+                             f"Its {len(self.batches[batch])} files are left out of the report.")
+        self._check_finished()
+
+    def _give_up(self, reason: str) -> None:
+        """
+        Give up the batches not completed yet and end the analysis.
+
+        Args:
+            reason (str): Why the files of these batches were not analyzed, recorded in QUARANTINE.
+        """
+        unfinished = [batch for batch in range(len(self.batches)) if batch not in self.results and batch not in self.failed]
+        self.failed.update(unfinished)
+        self.pending.clear()
+        self.leases.clear()
+        METRICS.increment("distributed_batches_total", len(unfinished), status="failed")
+        QUARANTINE.extend((path for batch in unfinished for path in self.batches[batch]), reason)
+        self.finished.set()
+
+    def _check_finished(self) -> None:
+        """Signal the end of the analysis once every batch is completed or given up."""
+        if len(self.results) + len(self.failed) == len(self.batches):
+            self.finished.set()
+
+
+def coordinator_handler(coordinator: Coordinator) -> type:
+    """
+    Build the HTTP request handler serving a coordinator's batches to workers.
+
+    The protocol has two endpoints: "GET /lease" answers a batch as JSON ({"batch": n, "files": [...]}),
+    204 when all batches are leased but not finished, and 410 once the analysis is over;
+    "POST /results" takes {"batch": n, "results": [...], "quarantined": [[path, reason], ...]} back.
+
+    Args:
+        coordinator (Coordinator): The coordinator handing out the batches.
+
+    Returns:
+        type: A http.server.BaseHTTPRequestHandler subclass.
+    """
+    from http.server import BaseHTTPRequestHandler
+
+    class CoordinatorHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if urlparse(self.path).path != "/lease":
+                self.send_error(404)
+                return
+            lease = coordinator.lease()
+            if lease is None:
+                self.send_response(410 if coordinator.finished.is_set() else 204)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self._send_json({"batch": lease[0], "files": lease[1]})
+
+        def do_POST(self):
+            if urlparse(self.path).path != "/results":
+                self.send_error(404)
+                return
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                batch, results = int(body["batch"]), body["results"]
+                if not isinstance(results, list) or not all(isinstance(metadata, dict) for metadata in results):
+                    raise ValueError("results must be a list of objects")
+                quarantined = [(str(path), str(reason)) for path, reason in body.get("quarantined", [])]
+            except (KeyError, TypeError, ValueError) as e:
+                self.send_error(400, str(e))
+                return
+            self._send_json({"accepted": coordinator.complete(batch, results, quarantined)})
+
+        def _send_json(self, value):
+            data = json.dumps(value).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return CoordinatorHandler
+
+
+def run_coordinator(args: Namespace, files: List[str]) -> List[Optional[MetadataRecord]]:
+    """
+    Analyze files with the workers connecting to this coordinator.
+
+    The batches are served over HTTP at the --coordinator address, --local-workers worker
+    processes are started on this host, and the results are merged once every batch is
+    completed or given up, or once the global deadline (DEADLINE) is reached.
+
+    Args:
+        args (Namespace): The parsed command-line arguments (coordinator, local_workers, batch_size,
+            lease_timeout, file_timeout and exiftool_only).
+        files (List[str]): The files to analyze.
+
+    Returns:
+        List[Optional[MetadataRecord]]: The metadata of each file, in the order of the file list,
+        None for the files left out (batches given up).
+    """
+    from http.server import ThreadingHTTPServer
+
+    coordinator = Coordinator(files, args.batch_size, args.lease_timeout)
+    try:
+        server = ThreadingHTTPServer(args.coordinator, coordinator_handler(coordinator))
+    except OSError as e:
+        sys.exit(f"Error: cannot listen on {args.coordinator[0]}:{args.coordinator[1]}. Reason: {e}")
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    host, port = server.server_address[:2]
+    url = f"http://{'127.0.0.1' if host == '0.0.0.0' else host}:{port}/"
+    LOGGER.info(f"Serving {len(files)} files in {len(coordinator.batches)} batches to workers at {url}")
+
+    command = [sys.executable, os.path.abspath(__file__), "--worker", url]
+    if args.exiftool_only:
+        command.append("--exiftool-only")
+    if args.file_timeout:
+        command += ["--file-timeout", str(args.file_timeout)]
+    workers = [subprocess.Popen(command, stdout=subprocess.DEVNULL) for _ in range(args.local_workers)]
+    try:
+        coordinator.join(deadline=DEADLINE, workers=workers)
+        for worker in workers:
+            try:
+                worker.wait(timeout=None if DEADLINE is None else max(DEADLINE - time.monotonic(), 0))
+            except subprocess.TimeoutExpired:
+                pass
+        # Give the workers polling for a batch the time to hear that the analysis is over.
+        time.sleep(DISTRIBUTED_POLL_INTERVAL * 2)
+    finally:
+        for worker in workers:
+            if worker.poll() is None:
+                worker.terminate()
+        server.shutdown()
+        server.server_close()
+    return coordinator.records()
+
+
+def run_worker(url: str) -> int:
+    """
+    Analyze the batches served by a coordinator until the analysis is over.
+
+    The files are opened at the paths listed by the coordinator, so they must be reachable at the
+    same paths on the worker (e.g. a share mounted at the same location). A batch whose results
+    cannot be returned is handed out again by the coordinator once its lease expires. The files
+    quarantined while analyzing a batch are returned with its results.
+
+    Args:
+        url (str): Base URL of the coordinator, e.g. http://127.0.0.1:8000/.
+
+    Returns:
+        int: The number of files analyzed.
+
+    Raises:
+        urllib.error.URLError: If the coordinator cannot be reached after DISTRIBUTED_CONNECT_ATTEMPTS attempts.
+    """
+    import urllib.error
+    import urllib.request
+
+    analyzed = 0
+    failures = 0
+    while True:
+        try:
+            with open_url(urljoin(url, "lease"), "lease") as response:
+                lease = json.load(response) if response.status == 200 else None
+        except urllib.error.HTTPError as e:
+            if e.code == 410:
+                return analyzed
+            raise
+        except urllib.error.URLError:
+            failures += 1
+            if failures >= DISTRIBUTED_CONNECT_ATTEMPTS:
+                raise
+            time.sleep(DISTRIBUTED_POLL_INTERVAL)
+            continue
+        failures = 0
+        if lease is None:
+            time.sleep(DISTRIBUTED_POLL_INTERVAL)
+            continue
+
+        results = []
+        quarantined = len(QUARANTINE)
+        for path in lease["files"]:
+            try:
+                results.append(get_metadata(path, FIELDS))
+            except Exception as e:
+                LOGGER.error(f"Failed to extract metadata from {path}. Reason: {e}")
+                results.append({})
+        ARCHIVES.close()
+
+        request = urllib.request.Request(urljoin(url, "results"), headers={"Content-Type": "application/json"},
+                                         data=json.dumps({"batch": lease["batch"], "results": results,
+                                                          "quarantined": QUARANTINE.items(quarantined)}).encode())
+        try:
+            with open_url(request, "results"):
+                pass
+        except urllib.error.URLError as e:
+            LOGGER.error(f"Failed to return batch {lease['batch']} to the coordinator. Reason: {e}")
+            continue
+        analyzed += len(results)
+
+
+class Engine:
+    """
+    Library interface of MetaDetective, for use from other Python programs without the command line.
+
+    Nothing is printed: results are yielded by iterators and messages go through the "MetaDetective"
+    logger. One exiftool process is kept running across calls (see ExifTool); close the engine, or
+    use it as a context manager, to stop it. Metadata comes as plain dictionaries rather than
+    MetadataRecord, so that a program holding an engine for long does not accumulate the values it read.
+
+    Example:
+        from MetaDetective.MetaDetective import Engine
+
+        with Engine() as engine:
+            for path, metadata in engine.analyze(["report.pdf", "leaks"]):
+                print(path, metadata.get("Author"))
+    """
+
+    def __init__(self, fields: Optional[List[str]] = None, types: Optional[List[str]] = None,
+                 archives: bool = False, attachments: bool = False):
+        """
+        Initialize an Engine instance.
+
+        fields (Optional[List[str]]): Metadata fields to extract. Defaults to FIELDS.
+        types (Optional[List[str]]): File types (extensions) analyzed in directories, e.g. ["pdf", "docx"].
+            Defaults to all types.
+        archives (bool): Analyze the files inside zip and tar archives, as "archive!/member" paths.
+        attachments (bool): Analyze the attachments of mail stores, as "store!/attachment" paths.
+        """
+        self.fields = fields or FIELDS
+        self.types = types or ["all"]
+        self.archives = archives
+        self.attachments = attachments
+        self.exiftool = ExifTool()
+
+    def __enter__(self) -> Engine:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop the exiftool process and close the archives left open."""
+        self.exiftool.close()
+        ARCHIVES.close()
+
+    def extract(self, path: str) -> Dict[str, str]:
+        """
+        Extract the metadata of a single file.
+
+        Args:
+            path (str): Path of the file, or a virtual "archive!/member" path.
+
+        Returns:
+            Dict[str, str]: The metadata of the file, empty when it could not be read.
+        """
+        return get_metadata(path, self.fields, self.exiftool)
+
+    def extract_bytes(self, data: bytes, name: str = "-") -> Dict[str, str]:
+        """
+        Extract the metadata of in-memory content, e.g. an uploaded file.
+
+        Args:
+            data (bytes): The content of the file.
+            name (str): Name of the file, reported in the "File Name" field and whose extension selects the reader.
+
+        Returns:
+            Dict[str, str]: The metadata of the content, empty when it could not be read.
+        """
+        return get_metadata_from_bytes(data, self.fields, name, self.exiftool)
+
+    def analyze(self, paths: Iterable[str]) -> Iterator[Tuple[str, Dict[str, str]]]:
+        """
+        Analyze files, and the files of directories (without recursing, like --directory).
+
+        Args:
+            paths (Iterable[str]): Paths of files and directories.
+
+        Yields:
+            Tuple[str, Dict[str, str]]: The path of each file and its metadata, as soon as it is extracted.
+        """
+        for path in paths:
+            args = Namespace(directory=path if os.path.isdir(path) else None, files=[path], type=self.types,
+                             archives=self.archives, attachments=self.attachments)
+            try:
+                files = get_files(args)
+            except ValueError:
+                LOGGER.warning(f"No files found in {path}.")
+                continue
+            try:
+                for file in files:
+                    yield file, self.extract(file)
+            finally:
+                ARCHIVES.close()
+
+    def crawl(self, url: str, depth: int = 0, download_dir: Optional[str] = None, sitemap: bool = False,
+              follow_extern: bool = False, max_pages: int = 0, max_time: float = 0, threads: int = 4,
+              jobs: int = 2, rate: float = 5, burst: int = 1) -> Iterator[Tuple[str, str, Optional[Dict[str, str]]]]:
+        """
+        Crawl a site and analyze the files found, in memory or once downloaded to download_dir.
+
+        The crawl runs in background threads while the events are consumed. Leaving the loop early
+        stops the fetching of pages, the files already found being analyzed in the background.
+
+        Args:
+            url (str): The URL to start from.
+            depth (int): Depth of links to follow.
+            download_dir (Optional[str]): Directory where the files are saved. Defaults to None (analysis in memory).
+            sitemap (bool): Also enumerate the files listed in the site's sitemaps.
+            follow_extern (bool): Follow external links.
+            max_pages (int): Maximum number of pages to fetch (0 for no limit).
+            max_time (float): Number of seconds after which no more pages are fetched (0 for no limit).
+            threads (int): Number of crawling threads.
+            jobs (int): Number of metadata extraction threads.
+            rate (float): Maximum number of requests per second and per host.
+            burst (int): Number of requests allowed back to back on a host before the rate applies.
+
+        Yields:
+            Tuple[str, str, Optional[Dict[str, str]]]: (kind, source, metadata) events: ("page", url, None) for each
+            page crawled, ("file", source, None) for each file found, source being its URL or downloaded path,
+            and ("metadata", source, metadata) once its metadata is extracted.
+        """
+        def extractor(source: str, fields: List[str]) -> dict:
+            if download_dir:
+                return get_metadata(source, self.fields, self.exiftool)
+            return fetch_metadata_from_url(source, self.fields)
+
+        events: queue.Queue = queue.Queue()
+        q = CrawlFrontier(max_pages, max_time)
+        pipeline = ExtractionPipeline(Namespace(display="singular", export=None), [], jobs,
+                                      extractor=extractor, events=events)
+
+        def run() -> None:
+            try:
+                crawl_site(url, q, RateLimiter(rate, burst), {}, depth, threads, follow_extern, sitemap,
+                           download_dir, pipeline=pipeline)
+            finally:
+                pipeline.close()
+                events.put(SENTINEL)
+
+        pipeline.start()
+        threading.Thread(target=run, daemon=True).start()
+        try:
+            while True:
+                event = events.get()
+                if event is SENTINEL:
+                    return
+                yield event
+        finally:
+            q.stop()
+
+
+class MetadataService:
+    """Metadata lookups answered by a resident pool of engines, behind --serve.
+
+    Each engine keeps its exiftool process running, and the geocoding cache and the compiled
+    ignore patterns stay in memory, so a lookup costs no process startup. As the service runs for
+    as long as the process, nothing grows with the number of lookups: the answers are plain
+    dictionaries, never interned in STRING_TABLE, and QUARANTINE keeps the last SERVE_QUARANTINE_SIZE files.
+    """
+
+    def __init__(self, workers: int = DEFAULT_SERVE_WORKERS, root: Optional[str] = None,
+                 ignore_patterns: Optional[List[str]] = None):
+        """
+        Initialize a MetadataService instance.
+
+        workers (int): Number of engines, i.e. of lookups running at the same time.
+        root (Optional[str]): Directory the paths looked up must be in. Defaults to None (any path).
+        ignore_patterns (Optional[List[str]]): Patterns of the values left out of the answers.
+        """
+        self.root = os.path.realpath(root) if root else None
+        self.ignore_patterns = ignore_patterns or []
+        compile_patterns(tuple(self.ignore_patterns))
+        QUARANTINE.max_entries = SERVE_QUARANTINE_SIZE
+        self.engines: queue.Queue[Engine] = queue.Queue()
+        for _ in range(max(1, workers)):
+            self.engines.put(Engine())
+
+    @contextlib.contextmanager
+    def engine(self) -> Iterator[Engine]:
+        """Borrow an engine of the pool, waiting for one to be free."""
+        engine = self.engines.get()
+        try:
+            yield engine
+        finally:
+            self.engines.put(engine)
+
+    def lookup_path(self, path: str) -> Dict[str, str]:
+        """
+        Extract the metadata of a file of the server.
+
+        Args:
+            path (str): Path of the file, or a virtual "archive!/member" path.
+
+        Returns:
+            Dict[str, str]: The relevant metadata (see report).
+
+        Raises:
+            PermissionError: If the file is outside of the root directory.
+            FileNotFoundError: If there is no such file.
+        """
+        member = split_archive_path(path) if ARCHIVE_SEPARATOR in path else None
+        container = member[0] if member else path
+        if self.root and os.path.commonpath([self.root, os.path.realpath(container)]) != self.root:
+            raise PermissionError(f"{path} is outside of {self.root}")
+        if not os.path.isfile(container):
+            raise FileNotFoundError(path)
+        with self.engine() as engine:
+            return self.report(get_metadata(path, engine.fields, engine.exiftool))
+
+    def lookup_bytes(self, data: bytes, name: str) -> Dict[str, str]:
+        """
+        Extract the metadata of uploaded content.
+
+        Args:
+            data (bytes): The content of the file.
+            name (str): Name of the file, whose extension selects the reader.
+
+        Returns:
+            Dict[str, str]: The relevant metadata (see report).
+        """
+        with self.engine() as engine:
+            return self.report(get_metadata_from_bytes(data, engine.fields, name, engine.exiftool))
+
+    def report(self, metadata: Mapping[str, str]) -> Dict[str, str]:
+        """
+        Keep the fields of a file worth reporting, with the address of its GPS position, as the displays do.
+
+        Args:
+            metadata (Mapping[str, str]): The metadata of the file.
+
+        Returns:
+            Dict[str, str]: The FIELDS with a value not matching the ignore patterns.
+        """
+        metadata = dict(metadata)
+        try:
+            format_gps_data(metadata)
+        except Exception as e:
+            LOGGER.warning(f"Unable to look up the address of {metadata.get('File Name')}. Reason: {e}")
+        return {field: value for field, value in metadata.items()
+                if field in FIELDS and value and not matches_any_pattern(value, self.ignore_patterns)}
+
+    def close(self) -> None:
+        """Stop the exiftool processes of the engines."""
+        while not self.engines.empty():
+            self.engines.get().close()
+
+
+def service_handler(service: MetadataService) -> type:
+    """
+    Build the HTTP request handler answering metadata lookups.
+
+    "GET /metadata?path=<path>" looks up a file of the server, and "POST /metadata?name=<file name>"
+    looks up the content sent as the request body. Both answer the metadata as a JSON object.
+
+    Args:
+        service (MetadataService): The service answering the lookups.
+
+    Returns:
+        type: A http.server.BaseHTTPRequestHandler subclass.
+    """
+    from http.server import BaseHTTPRequestHandler
+
+    class ServiceHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            path = parse_qs(url.query).get("path", [""])[0]
+            if url.path != "/metadata" or not path:
+                self.send_error(404 if url.path != "/metadata" else 400)
+                return
+            try:
+                metadata = service.lookup_path(path)
+            except PermissionError:
+                self.send_error(403)
+                return
+            except FileNotFoundError:
+                self.send_error(404, f"No such file: {path}")
+                return
+            self._send_json(metadata)
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            if url.path != "/metadata":
+                self.send_error(404)
+                return
+            length = self.headers.get("Content-Length")
+            if length is None or not length.isdigit():
+                self.send_error(411)
+                return
+            if int(length) > SERVE_MAX_UPLOAD_SIZE:
+                self.send_error(413)
+                return
+            data = self.rfile.read(int(length))
+            name = os.path.basename(parse_qs(url.query).get("name", ["upload"])[0]) or "upload"
+            self._send_json(service.lookup_bytes(data, name))
+
+        def _send_json(self, value):
+            data = json.dumps(value).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            LOGGER.debug(format % args)
+
+    return ServiceHandler
+
+
+def make_server(address: Tuple[str, int], service: MetadataService, workers: int = DEFAULT_SERVE_WORKERS):
+    """
+    Create the HTTP server of --serve, handling requests on a bounded pool of threads.
+
+    While every thread is busy, new connections wait in the listen backlog instead of
+    starting more threads.
+
+    Args:
+        address (Tuple[str, int]): The host and port to listen on.
+        service (MetadataService): The service answering the lookups.
+        workers (int): Number of requests handled at the same time.
+
+    Returns:
+        http.server.HTTPServer: The server, not yet serving.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from http.server import HTTPServer
+
+    slots = threading.BoundedSemaphore(max(1, workers))
+    pool = ThreadPoolExecutor(max(1, workers))
+
+    class PooledHTTPServer(HTTPServer):
+        def process_request(self, request, client_address):
+            slots.acquire()
+            pool.submit(self.process_request_thread, request, client_address)
+
+        def process_request_thread(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+                slots.release()
+
+        def server_close(self):
+            super().server_close()
+            pool.shutdown()
+
+    return PooledHTTPServer(address, service_handler(service))
+
+
+def valid_address(address: str) -> Tuple[str, int]:
+    """
+    Validate a HOST:PORT address to listen on.
+
+    Args:
+        address (str): The address, the host defaulting to 127.0.0.1 when omitted (":8000").
+
+    Returns:
+        Tuple[str, int]: The host and port.
+
+    Raises:
+        argparse.ArgumentTypeError: If the address has no valid port.
+    """
+    host, _, port = address.rpartition(":")
+    if not port.isdigit() or int(port) > 65535:
+        raise argparse.ArgumentTypeError(f"'{address}' is not a valid HOST:PORT address.")
+    return host or "127.0.0.1", int(port)
 
 
 def valid_url(url: str) -> str:
@@ -1122,7 +5528,6 @@ def valid_url(url: str) -> str:
 
 def main():
     show_banner()
-    check_exiftool_installed()
 
     parser = argparse.ArgumentParser(description="Retrieve and display metadata from files using exiftool.",
                                      epilog="Example commands:\n\n"
@@ -1136,14 +5541,26 @@ def main():
                                             "\n"
                                             "   # Export metadata analysis of a directory and exports data (by default in HTML format):\n"
                                             "python3 MetaDetective.py -d directory --export\n"
+                                            "   # Share the analysis of a directory between 4 local worker processes:\n"
+                                            "python3 MetaDetective.py -d directory --coordinator 127.0.0.1:8000 --local-workers 4\n"
+                                            "   # Join the analysis from another machine where the directory is mounted at the same path:\n"
+                                            "python3 MetaDetective.py --worker http://coordinator-host:8000/\n"
                                             "\n"
                                             "# Scraping:\n"
                                             "   # Scan a website without downloading files:\n"
                                             "python3 MetaDetective.py --scraping --scan --url https://example.com/\n"
+                                            "   # Scan a website using its sitemaps to enumerate files:\n"
+                                            "python3 MetaDetective.py --scraping --scan --sitemap --url https://example.com/\n"
+                                            "   # Scan a website and extract the metadata of the files found without downloading them fully:\n"
+                                            "python3 MetaDetective.py --scraping --scan --remote-metadata --url https://example.com/\n"
                                             "   # Download files from a website to a specified directory:\n"
                                             "python3 MetaDetective.py --scraping --download-dir directory --url https://example.com/\n"
                                             "   # Download files from a website with specified depth:\n"
-                                            "python3 MetaDetective.py --scraping --depth 1 --download-dir directory --url https://example.com/\n",
+                                            "python3 MetaDetective.py --scraping --depth 1 --download-dir directory --url https://example.com/\n"
+                                            "   # Download files from a website and analyze them while crawling:\n"
+                                            "python3 MetaDetective.py --scraping --download-dir directory --analyze --url https://example.com/\n"
+                                            "   # Analyze files from a website in memory, without saving them:\n"
+                                            "python3 MetaDetective.py --scraping --analyze --url https://example.com/\n",
                                      formatter_class=argparse.RawTextHelpFormatter
                                      )
 
@@ -1151,27 +5568,62 @@ def main():
     scraping_group.add_argument('-s', '--scraping', action='store_true', help="Argument required to activate scraping mode.")
     scraping_group.add_argument('-u', "--url", type=valid_url, help="Site url for scraping.")
     scraping_group.add_argument("--scan", action="store_true", help="Scans the website and displays information and statistics without downloading files.")
+    scraping_group.add_argument("--remote-metadata", action="store_true", help="In scan mode, extract the metadata of the files found using HTTP Range requests to\nfetch only the regions holding it (full download when ranges are not supported).")
     scraping_group.add_argument('--extensions', nargs='+', type=str.lower, help='File extensions to filter by, e.g., --extensions pdf jpg png')
     scraping_group.add_argument("--depth", type=int, default=0, help="Depth of links to follow on the site.")
+    scraping_group.add_argument("--max-pages", type=int, default=0, help="Maximum number of pages to fetch (0 for no limit). Pages likely to link\nto documents are fetched first.")
+    scraping_group.add_argument("--max-time", type=float, default=0, help="Number of seconds after which no more pages are fetched (0 for no limit).")
     scraping_group.add_argument("--download-dir", type=valid_directory, help="Directory where files that have been scraped should be stored.")
+    scraping_group.add_argument("--analyze", action="store_true", help="Extract and report the metadata of the files found while the crawl continues.\nFiles are analyzed in memory unless --download-dir is given.")
+    scraping_group.add_argument("--sitemap", action="store_true", help="Also enumerate files listed in the site's sitemaps (robots.txt and well-known locations).")
     scraping_group.add_argument("--follow-extern", action="store_true", help="Follow external links.")
     scraping_group.add_argument("--threads", type=int, default=4, help="Number of threads to use.")
-    scraping_group.add_argument("--rate", type=int, default=5, help="Maximum number of requests per second.")
+    scraping_group.add_argument("--queue-size", type=int, default=DEFAULT_PIPELINE_QUEUE_SIZE, help="Capacity of the queues between download, extraction and reporting (--analyze).")
+    scraping_group.add_argument("--rate", type=int, default=5, help="Maximum number of requests per second and per host.")
+    scraping_group.add_argument("--burst", type=int, default=1, help="Number of requests allowed back to back on a host before the rate applies.")
+    scraping_group.add_argument("--max-page-size", type=int, default=DEFAULT_MAX_PAGE_SIZE, help="Maximum number of bytes read from each HTML page (0 for no limit).")
 
     analysis_group = parser.add_argument_group('analysis options', 'Main analysis options.')
     analysis_group.add_argument('-d', '--directory', type=valid_directory, help="Directory containing the files to be analyzed.")
     analysis_group.add_argument('-f', '--files', nargs='+', help="File or space-separated list of files to be analyzed.")
 
+    analysis_group.add_argument('--exiftool-only', action='store_true', help="Analyze every file with exiftool, without the built-in readers of office documents\n(docx, xlsx, pptx, odt, odp), PDF, JPEG and TIFF metadata.")
+    analysis_group.add_argument('--archives', action='store_true', help="Analyze the files inside zip and tar (.tar.gz, .tar.bz2, .tar.xz) archives, without\nextracting them to disk. Members are reported as 'archive!/member'.")
+    analysis_group.add_argument('--attachments', action='store_true', help="Analyze the attachments of the messages of mail stores (eml, emlx, mbox) in memory,\nattributed to their message with the Message From, Subject and Date fields.")
     analysis_group.add_argument('-t', '--type', nargs='+', default=['all'], help="File types (extensions) to be analyzed (all by default).")
+    analysis_group.add_argument("--jobs", type=int, help="Number of parallel metadata extraction workers (1 by default, files being handed out\nlargest first). Also applies to scraping with --analyze (2 by default).")
+    analysis_group.add_argument('--file-timeout', type=float, default=0, metavar='SECONDS', help="Seconds exiftool may spend on a file before it is killed and restarted (0 for no limit).\nThe file is listed as quarantined at the end of the report.")
+    analysis_group.add_argument('--dedupe', action='store_true', help="Analyze files with the same content once (by size, then partial and full hash),\nreusing the results for every copy. The groups of copies are listed in the report.")
+    analysis_group.add_argument('--deadline', type=float, default=0, metavar='SECONDS', help="Seconds after which no more files are analyzed (0 for no limit), the files left\nbeing listed as quarantined at the end of the report.")
+
+    distributed_group = parser.add_argument_group('distributed options', 'Options for sharing an analysis between worker processes or machines.')
+    distributed_group.add_argument('--coordinator', type=valid_address, metavar='HOST:PORT', help="Serve the files to analyze (--directory/--files) in batches to workers over HTTP\nat this address, and report their merged results.")
+    distributed_group.add_argument('--worker', type=valid_url, metavar='URL', help="Run as a worker of the coordinator at this URL, e.g. http://host:8000/.\nThe files must be reachable at the same paths as on the coordinator.")
+    distributed_group.add_argument('--local-workers', type=int, default=0, help="Number of worker processes started on this host by the coordinator.")
+    distributed_group.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Number of files handed to a worker at a time.")
+    distributed_group.add_argument('--lease-timeout', type=float, default=DEFAULT_LEASE_TIMEOUT, help=f"Seconds a worker has to return a batch before it is handed out again\n(at most {DISTRIBUTED_MAX_ATTEMPTS} times).")
+
+    server_group = parser.add_argument_group('server options', 'Options for answering metadata lookups over HTTP.')
+    server_group.add_argument('--serve', type=valid_address, metavar='HOST:PORT', help="Answer metadata lookups over HTTP at this address, with exiftool kept running:\nGET /metadata?path=<path> for a file of this host (within --directory if given),\nPOST /metadata?name=<file name> for uploaded content. Values matching --ignore are left out.")
+    server_group.add_argument('--serve-workers', type=int, default=DEFAULT_SERVE_WORKERS, help="Number of lookups answered at the same time (--serve).")
 
     display_group = parser.add_argument_group('display options', 'Options for displaying results.')
     display_group.add_argument('-i', '--ignore', nargs='+', help="Ignore one or more results separated by spaces for keywords or regexes.")
     display_group.add_argument('--display', choices=['all', 'singular'], default='singular', help="Display options:\n'all' to display all relevant results for each file one by one.\n'singular' to display condensed results.'")
+    display_group.add_argument('--no-progress', action='store_true', help="Do not display the progress line (files/s, bytes/s, queue depth, ETA) shown on terminals.")
     display_group.add_argument('--format', choices=['formatted', 'concise'], help="Display format ('singular' display required):\n'formatted' for a formatted (stylized) display.\n'concise' for more classic (basic) formatting.")
 
+    metrics_group = parser.add_argument_group('metrics options', 'Options for measuring runs.')
+    metrics_group.add_argument('--metrics-file', help="Write crawl and extraction metrics to this file at exit.")
+    metrics_group.add_argument('--metrics-format', choices=['json', 'prometheus'], default='json', help="Format of the metrics file (JSON by default, or Prometheus text format).")
+    metrics_group.add_argument('--metrics-interval', type=float, default=0, help="Print a live metrics summary to stderr every given number of seconds.")
+    metrics_group.add_argument('--profile', nargs='*', choices=['cprofile', 'memory'], help="Time the stages of the run (discovery, extraction, enrichment, rendering, export, crawl)\nand print the breakdown at exit. Add 'cprofile' to capture a .pstats file and\n'memory' to trace allocations with tracemalloc, e.g. --profile cprofile memory.")
+    metrics_group.add_argument('--profile-out', help="Path without extension of the profile files (.txt breakdown and .pstats capture).\nDefaults to MetaDetective_Profile-<timestamp> in the export directory (--out).")
+
     export_group = parser.add_argument_group('export options', 'Options for exporting results.')
     export_group.add_argument('-e', '--export', nargs='?', const='html', choices=['html', 'txt'], default=None, help="Export results. Default format is HTML. Text export (txt) is also possible.")
     export_group.add_argument('-c', '--custom', type=valid_filename, help="Custom file name. The name is generated with default values, but you can add a suffix.")
+    export_group.add_argument('--html-page-size', type=int, default=0, metavar='N', help="Split the HTML export of the 'all' display into pages of N files, styled\nwithout animations nor web fonts so that large reports open at once and offline.")
     export_group.add_argument('-o', '--out', type=valid_directory, default=os.getcwd(), help="Specify file export directory.")
 
     args = parser.parse_args()
@@ -1180,44 +5632,106 @@ def main():
         parser.print_help()
         sys.exit(0)
 
+    handler = progress_handler()
+    if not any(isinstance(existing, handler) for existing in LOGGER.handlers):
+        LOGGER.addHandler(handler())
+    LOGGER.setLevel("INFO")
+
+    reporter = MetricsReporter(args.metrics_interval) if args.metrics_interval else None
+    if reporter:
+        reporter.start()
+    atexit.register(finish_metrics, args, reporter)
+
+    if args.exiftool_only:
+        global NATIVE_EXTRACTION
+        NATIVE_EXTRACTION = False
+
+    if args.jobs is None:
+        args.jobs = 2 if args.scraping else 1
+
+    if args.file_timeout < 0 or args.deadline < 0:
+        parser.error("The file timeout (--file-timeout) and deadline (--deadline) arguments cannot be negative.")
+
+    global FILE_TIMEOUT
+    FILE_TIMEOUT = args.file_timeout
+
+    if args.profile is not None:
+        PROFILER.start(args.profile)
+        atexit.register(finish_profile, args)
+
+    if args.display == 'all' and args.format:
+        parser.error("The formatting (--format) argument is not compatible with the 'all' display mode (--display all).")
+
+    if args.display == 'singular' and args.format is None:
+        args.format = 'concise'
+
+    if args.html_page_size < 0:
+        parser.error("The HTML page size argument (--html-page-size) cannot be negative.")
+
+    if args.html_page_size and args.export != 'html':
+        parser.error("The HTML page size argument (--html-page-size) requires the HTML export (--export html).")
+
+    if args.local_workers and not args.coordinator:
+        parser.error("The local workers argument (--local-workers) requires coordinator mode (--coordinator).")
+
+    if args.deadline and (args.serve or not (args.directory or args.files)):
+        parser.error("The deadline argument (--deadline) requires analysis mode (--directory/-d or --files/-f).")
+
+    if args.dedupe and (args.serve or not (args.directory or args.files)):
+        parser.error("The dedupe argument (--dedupe) requires analysis mode (--directory/-d or --files/-f).")
+
     if args.scraping:
-        if args.directory or args.files or args.ignore:
-            parser.error("Analysis arguments (--directory/-d, --files/-f, and --ignore/-i) cannot be used with scrapping options (--scraping/-s).")
+        if args.directory or args.files:
+            parser.error("Analysis arguments (--directory/-d and --files/-f) cannot be used with scrapping options (--scraping/-s).")
+
+        if args.ignore and not (args.remote_metadata or args.analyze):
+            parser.error("The ignore argument (--ignore/-i) can only be used in scraping mode together with --remote-metadata or --analyze.")
+
+        if args.remote_metadata and not args.scan:
+            parser.error("The remote metadata argument (--remote-metadata) requires scan mode (--scan).")
 
-        if args.scan and args.download_dir:
-            parser.error("The scan (--scan) and download (--download-dir) arguments cannot be specified together. Choose between one or the other mode in scraping mode, but not both.")
-        elif not args.scan and not args.download_dir:
-            parser.error("You must choose at least between the scan (--scan) or download (--download-dir) argument in scraping mode.")
+        if args.scan and (args.download_dir or args.analyze):
+            parser.error("The scan (--scan) and download (--download-dir/--analyze) arguments cannot be specified together. Choose between one or the other mode in scraping mode, but not both.")
+        elif not args.scan and not args.download_dir and not args.analyze:
+            parser.error("You must choose at least between the scan (--scan) or download (--download-dir/--analyze) argument in scraping mode.")
 
         if not args.url:
             parser.error("The url choice argument (-u or --url) is required for scraping mode.")
 
+        if args.coordinator or args.worker or args.serve:
+            parser.error("The distributed (--coordinator and --worker) and server (--serve) arguments cannot be used with scrapping options (--scraping/-s).")
+
+        if args.analyze or args.remote_metadata:
+            check_exiftool_installed()
+
         if args.extensions:
             global EXTENSIONS
             EXTENSIONS = args.extensions
 
-        base_domain = urlparse(args.url).netloc
-
-        seen = set()
-        lock = threading.Lock()
-        q = queue.Queue()
-        rate_limiter = RateLimiter(args.rate)
+        q = CrawlFrontier(args.max_pages, args.max_time)
+        rate_limiter = RateLimiter(args.rate, args.burst)
         file_stats = {}
-
-        q.put((args.url, args.depth, base_domain, args.follow_extern))
-
-        threads = []
-        for _ in range(args.threads):
-            t = threading.Thread(target=worker_thread, args=(q, seen, lock, rate_limiter, file_stats, args.download_dir, args.scan))
-            t.start()
-            threads.append(t)
-
-        q.join()
-
-        for _ in range(args.threads):
-            q.put(None)
-        for t in threads:
-            t.join()
+        remote_metadata = [] if args.remote_metadata else None
+        extractor = get_metadata if args.download_dir else fetch_metadata_from_url
+        pipeline = ExtractionPipeline(args, args.ignore if args.ignore else [], args.jobs, args.queue_size, extractor) if args.analyze else None
+        if pipeline:
+            pipeline.start()
+        if not args.no_progress:
+            PROGRESS.start(queue_depth=lambda: q.qsize() + (pipeline.paths.qsize() if pipeline else 0))
+
+        with PROFILER.stage("crawl"):
+            seen = crawl_site(args.url, q, rate_limiter, file_stats, args.depth, args.threads, args.follow_extern, args.sitemap,
+                              args.download_dir, args.scan, args.max_page_size, remote_metadata, pipeline)
+
+        if pipeline:
+            pipeline.close()
+        PROGRESS.stop()
+
+        html_wire_bytes = METRICS.counter_total("html_wire_bytes_total")
+        if html_wire_bytes:
+            html_content_bytes = METRICS.counter_total("html_content_bytes_total")
+            print(f"\nINFO: HTML transferred: {html_wire_bytes:.0f} bytes on the wire, {html_content_bytes:.0f} bytes uncompressed "
+                  f"(compression ratio {html_content_bytes / html_wire_bytes:.1f}x).")
 
         if args.scan:
             if not any(file_stats.values()):
@@ -1234,45 +5748,87 @@ def main():
             print(f"\nINFO: Total URLs processed (followed): {len(seen)}")
             print("NOTE: These results provide an estimation and do not guarantee the uniqueness of the files.")
 
+            if remote_metadata:
+                print("\nRemote metadata:\n")
+                report_metadata(args, remote_metadata, args.ignore if args.ignore else [])
+
         sys.exit(0)
 
+    elif args.serve:
+        if args.files or args.coordinator or args.worker:
+            parser.error("The serve argument (--serve) cannot be used with the files (--files/-f), coordinator (--coordinator) or worker (--worker) arguments.")
+
+        check_exiftool_installed()
+
+        service = MetadataService(args.serve_workers, args.directory, args.ignore)
+        try:
+            server = make_server(args.serve, service, args.serve_workers)
+        except OSError as e:
+            sys.exit(f"Error: cannot listen on {args.serve[0]}:{args.serve[1]}. Reason: {e}")
+        host, port = server.server_address[:2]
+        print(f"INFO: Answering metadata lookups at http://{host}:{port}/metadata (press Ctrl+C to stop).")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            service.close()
+
     elif args.directory or args.files:
         if args.directory and args.files:
             parser.error("The directory (--directory/-d) and files (--files/-f) arguments cannot be specified together. Choose between one or the other mode in analysis mode, but not both.")
 
-        ignore_patterns = args.ignore if args.ignore else []
-
-        if args.display == 'all' and args.format:
-            parser.error("The formatting (--format) argument is not compatible with the 'all' display mode (--display all).")
+        if args.worker:
+            parser.error("The worker argument (--worker) cannot be used with analysis arguments (--directory/-d and --files/-f).")
 
-        if args.display == 'singular' and args.format is None:
-            args.format = 'concise'
+        if not args.coordinator or args.local_workers:
+            check_exiftool_installed()
 
-        files = get_files(args)
-        all_metadata = [get_metadata(file, FIELDS) for file in files]
+        ignore_patterns = args.ignore if args.ignore else []
 
-        if args.export:
-            if args.export == 'html':
-                content = export_metadata_to_html(args, all_metadata, ignore_patterns)
-                file_extension = '.html'
+        if args.deadline:
+            global DEADLINE
+            DEADLINE = time.monotonic() + args.deadline
+
+        with PROFILER.stage("discovery"):
+            files = get_files(args)
+        unique = files
+        if args.dedupe:
+            with PROFILER.stage("dedupe"):
+                DUPLICATE_GROUPS[:] = find_duplicates(files)
+            copies = {copy for members in DUPLICATE_GROUPS for copy in members[1:]}
+            unique = [file for file in files if file not in copies]
+        if not args.no_progress:
+            PROGRESS.start(total=len(unique))
+        with PROFILER.stage("extraction"):
+            if args.coordinator:
+                records = run_coordinator(args, unique)
             else:
-                content = export_metadata_to_txt(args, all_metadata, ignore_patterns)
-                file_extension = '.txt'
+                records = extract_files(unique, args.jobs)
+        all_metadata = reuse_duplicate_metadata(files, dict(zip(unique, records)), DUPLICATE_GROUPS)
+        PROGRESS.stop()
+        ARCHIVES.close()
 
-            timestamp = datetime.datetime.now().strftime('%Y_%m_%d-%H_%M_%S')
-            custom_suffix = f"{args.custom}-" if args.custom else ""
-            filename = f"MetaDetective_Export-{custom_suffix}{timestamp}{file_extension}"
+        report_metadata(args, all_metadata, ignore_patterns)
 
-            full_path = os.path.join(args.out, filename)
+    elif args.worker:
+        if args.coordinator:
+            parser.error("The worker (--worker) and coordinator (--coordinator) arguments cannot be specified together.")
 
-            with open(full_path, "w") as f:
-                f.write(content)
-            print(f"Results file exported to {full_path}")
-        else:
-            display_metadata(args, all_metadata, ignore_patterns)
+        check_exiftool_installed()
+
+        import urllib.error
+
+        print(f"INFO: Analyzing the batches of the coordinator at {args.worker}")
+        try:
+            analyzed = run_worker(args.worker)
+        except urllib.error.URLError as e:
+            sys.exit(f"Error: the coordinator at {args.worker} cannot be reached. Reason: {e}")
+        print(f"INFO: The analysis is over. {analyzed} files analyzed.")
 
     else:
-        parser.error("You must specify either --scraping or --directory or --files.")
+        parser.error("You must specify either --scraping, --directory, --files, --worker or --serve.")
 
 
 if __name__ == "__main__":
@@ -1,19 +1,47 @@
 import argparse
+import functools
+import gzip
 import http.client
 import json
+import logging
 import os
+import pstats
 import re
+import struct
 import subprocess
+import sys
+import tarfile
 import tempfile
+import threading
+import time
 import unittest
-from io import StringIO
+import urllib.error
+import urllib.request
+import zipfile
+import zlib
+from email.message import Message
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO, StringIO
 from unittest.mock import Mock, patch
 
 from src.MetaDetective.MetaDetective import (BANNER, show_banner, check_exiftool_installed,
                                              dms_to_dd, parse_dms, get_metadata, matches_any_pattern,
                                              valid_directory, filter_files_by_extension, get_files,
                                              get_address_from_coords, format_gps_data, valid_filename,
-                                             is_valid_file_link, valid_url)
+                                             is_valid_file_link, valid_url, RateLimiter,
+                                             fetch_links_from_url, fetch_range, zip_metadata_ranges,
+                                             pdf_object_offsets, fetch_remote_metadata, ExtractionPipeline,
+                                             get_metadata_from_bytes, read_robots_sitemaps, iter_sitemap,
+                                             discover_sitemap_links, CrawlFrontier, score_url, ContentDecompressor,
+                                             Metrics, open_url, lookup_address, Profiler, ProgressReporter,
+                                             get_office_metadata, get_native_metadata, get_pdf_metadata, pdf_date,
+                                             get_exif_metadata, format_dms, MetadataRecord, ARCHIVES,
+                                             list_archive_members, FIELDS, Coordinator, coordinator_handler,
+                                             run_worker, valid_address, ExifTool, Engine, progress_handler,
+                                             MetadataService, make_server, QUARANTINE, export_metadata_to_txt,
+                                             plan_extraction, extract_files, find_duplicates, reuse_duplicate_metadata,
+                                             hash_file, export_metadata_to_html_pages, report_metadata,
+                                             export_metadata_to_html, Quarantine, STRING_TABLE, SERVE_QUARANTINE_SIZE)
 
 
 class TestShowBanner(unittest.TestCase):
@@ -26,29 +54,64 @@ class TestShowBanner(unittest.TestCase):
 
 class TestExifToolCheck(unittest.TestCase):
 
+    @patch('shutil.which', return_value=None)
     @patch('subprocess.run')
-    def test_exiftool_is_installed(self, mock_run):
+    def test_exiftool_is_installed(self, mock_run, mock_which):
         """Test that the function doesn't raise an error when exiftool is installed."""
-        mock_run.return_value = None
+        mock_run.return_value = Mock(stdout="12.76\n")
         try:
-            check_exiftool_installed()
+            self.assertEqual(check_exiftool_installed(), "12.76")
         except SystemExit as e:
             self.fail(f"Unexpected exit: {e}")
 
+    @patch('shutil.which', return_value=None)
     @patch('subprocess.run')
-    def test_raises_error_when_exiftool_not_installed(self, mock_run):
+    def test_raises_error_when_exiftool_not_installed(self, mock_run, mock_which):
         """Test that the function raises an error when exiftool is not installed."""
         mock_run.side_effect = FileNotFoundError()
         with self.assertRaisesRegex(SystemExit, "Error: exiftool is not installed. Please install it to continue."):
             check_exiftool_installed()
 
+    @patch('shutil.which', return_value=None)
     @patch('subprocess.run')
-    def test_raises_error_on_exiftool_execution_error(self, mock_run):
+    def test_raises_error_on_exiftool_execution_error(self, mock_run, mock_which):
         """Test that the function raises an error when exiftool encounters an execution error."""
         mock_run.side_effect = subprocess.CalledProcessError(returncode=1, cmd=['exiftool', '-ver'])
         with self.assertRaisesRegex(SystemExit, "Error: exiftool encountered an error."):
             check_exiftool_installed()
 
+    @patch('subprocess.run')
+    def test_version_is_cached(self, mock_run):
+        """Test that the probe runs once per exiftool binary and is then answered from the cache."""
+        mock_run.return_value = Mock(stdout="12.76\n")
+        with tempfile.TemporaryDirectory() as directory:
+            binary = os.path.join(directory, "exiftool")
+            with open(binary, "w") as f:
+                f.write("#!/bin/sh\n")
+            with patch('shutil.which', return_value=binary), \
+                    patch("src.MetaDetective.MetaDetective.EXIFTOOL_CACHE_FILE", os.path.join(directory, "cache", "exiftool.json")):
+                self.assertEqual(check_exiftool_installed(), "12.76")
+                self.assertEqual(check_exiftool_installed(), "12.76")
+                self.assertEqual(mock_run.call_count, 1)
+
+                with open(binary, "a") as f:
+                    f.write("# upgraded\n")
+                check_exiftool_installed()
+                self.assertEqual(mock_run.call_count, 2)
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_heavy_modules_are_not_imported(self):
+        """Test that importing the tool leaves the modules only scraping, exports and profiling need unloaded."""
+        deferred = ["http.client", "urllib.request", "html.parser", "hashlib", "ssl", "tempfile",
+                    "xml.etree.ElementTree", "cProfile", "pstats", "tracemalloc", "logging"]
+        code = ("import sys, src.MetaDetective.MetaDetective; "
+                f"print(','.join(m for m in {deferred!r} if m in sys.modules))")
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=root)
+        self.assertEqual(result.stdout.strip(), "")
+
 
 class TestDMStoDD(unittest.TestCase):
 
@@ -493,5 +556,1816 @@ class TestValidUrl(unittest.TestCase):
             valid_url(url)
 
 
+class TestRateLimiter(unittest.TestCase):
+
+    @patch("time.monotonic", return_value=100.0)
+    def test_first_request_is_not_delayed(self, mock_monotonic):
+        """Test that a fresh host can be requested immediately."""
+        rate_limiter = RateLimiter(2)
+        self.assertEqual(rate_limiter.reserve("example.com"), 0.0)
+
+    @patch("time.monotonic", return_value=100.0)
+    def test_requests_to_same_host_are_spaced(self, mock_monotonic):
+        """Test that concurrent reservations on one host are given successive slots."""
+        rate_limiter = RateLimiter(2)
+        delays = [rate_limiter.reserve("example.com") for _ in range(3)]
+        self.assertEqual(delays, [0.0, 0.5, 1.0])
+
+    @patch("time.monotonic", return_value=100.0)
+    def test_hosts_are_independent(self, mock_monotonic):
+        """Test that one host's bucket does not throttle another host."""
+        rate_limiter = RateLimiter(1)
+        rate_limiter.reserve("example.com")
+        self.assertEqual(rate_limiter.reserve("example.org"), 0.0)
+
+    @patch("time.monotonic", return_value=100.0)
+    def test_burst(self, mock_monotonic):
+        """Test that a burst allows several immediate requests."""
+        rate_limiter = RateLimiter(1, burst=3)
+        delays = [rate_limiter.reserve("example.com") for _ in range(4)]
+        self.assertEqual(delays, [0.0, 0.0, 0.0, 1.0])
+
+    def test_tokens_refill_over_time(self):
+        """Test that tokens are refilled according to the elapsed time."""
+        rate_limiter = RateLimiter(1)
+        with patch("time.monotonic", return_value=100.0):
+            rate_limiter.reserve("example.com")
+        with patch("time.monotonic", return_value=101.0):
+            self.assertEqual(rate_limiter.reserve("example.com"), 0.0)
+
+    @patch("time.sleep")
+    def test_wait_sleeps_outside_lock(self, mock_sleep):
+        """Test that the lock is released while the caller is sleeping."""
+        rate_limiter = RateLimiter(1)
+        mock_sleep.side_effect = lambda delay: self.assertFalse(rate_limiter.lock.locked())
+        rate_limiter.wait("example.com")
+        rate_limiter.wait("example.com")
+        mock_sleep.assert_called_once()
+
+
+def make_http_response(body: bytes, content_type: str = "text/html", extra_headers: dict = None, status: int = 200) -> Mock:
+    """Build a mocked urlopen response streaming the given body."""
+    headers = Message()
+    headers["Content-Type"] = content_type
+    for name, value in (extra_headers or {}).items():
+        headers[name] = value
+    response = Mock()
+    response.headers = headers
+    response.status = status
+    stream = BytesIO(body)
+    response.read = Mock(side_effect=stream.read)
+    response.__iter__ = Mock(side_effect=lambda: iter(stream.readlines()))
+    response.__enter__ = Mock(return_value=response)
+    response.__exit__ = Mock(return_value=False)
+    return response
+
+
+class TestFetchLinksFromUrl(unittest.TestCase):
+
+    @patch("urllib.request.urlopen")
+    def test_extracts_links(self, mock_urlopen):
+        """Test that links are extracted and scripts/stylesheets are skipped."""
+        body = b'<a href="/doc.pdf">x</a><link href="/style.css"><a href="javascript:void(0)">y</a>'
+        mock_urlopen.return_value = make_http_response(body)
+        self.assertEqual(fetch_links_from_url("http://example.com"), ["/doc.pdf"])
+
+    @patch("urllib.request.urlopen")
+    def test_uses_header_charset(self, mock_urlopen):
+        """Test that the page is decoded with the charset from the headers."""
+        body = '<a href="/caf\xe9.pdf">x</a>'.encode("latin-1")
+        mock_urlopen.return_value = make_http_response(body, "text/html; charset=ISO-8859-1")
+        self.assertEqual(fetch_links_from_url("http://example.com"), ["/caf\xe9.pdf"])
+
+    @patch("urllib.request.urlopen")
+    def test_invalid_bytes_do_not_fail(self, mock_urlopen):
+        """Test that undecodable bytes are replaced instead of aborting the page."""
+        body = b'\xff\xfe<a href="/doc.pdf">x</a>'
+        mock_urlopen.return_value = make_http_response(body)
+        self.assertEqual(fetch_links_from_url("http://example.com"), ["/doc.pdf"])
+
+    @patch("urllib.request.urlopen")
+    def test_max_page_size_stops_early(self, mock_urlopen):
+        """Test that reading stops once the page size cap is reached."""
+        body = b'<a href="/first.pdf">x</a>' + b' ' * 1000 + b'<a href="/second.pdf">y</a>'
+        mock_urlopen.return_value = make_http_response(body)
+        with patch("sys.stdout", new_callable=StringIO):
+            links = fetch_links_from_url("http://example.com", max_page_size=100)
+        self.assertEqual(links, ["/first.pdf"])
+
+    @patch("urllib.request.urlopen")
+    def test_gzip_content(self, mock_urlopen):
+        """Test that gzip is negotiated and decompressed while parsing."""
+        body = gzip.compress(b'<a href="/doc.pdf">x</a>')
+        mock_urlopen.return_value = make_http_response(body, extra_headers={"Content-Encoding": "gzip"})
+        self.assertEqual(fetch_links_from_url("http://example.com"), ["/doc.pdf"])
+        self.assertIn("gzip", mock_urlopen.call_args[0][0].get_header("Accept-encoding"))
+
+    @patch("urllib.request.urlopen")
+    def test_max_page_size_applies_to_uncompressed_bytes(self, mock_urlopen):
+        """Test that the page size cap bounds decompressed data."""
+        body = gzip.compress(b'<a href="/first.pdf">x</a>' + b' ' * 100000 + b'<a href="/second.pdf">y</a>')
+        mock_urlopen.return_value = make_http_response(body, extra_headers={"Content-Encoding": "gzip"})
+        with patch("sys.stdout", new_callable=StringIO):
+            links = fetch_links_from_url("http://example.com", max_page_size=1000)
+        self.assertEqual(links, ["/first.pdf"])
+
+    @patch("urllib.request.urlopen")
+    def test_non_text_content(self, mock_urlopen):
+        """Test that non-text responses are not parsed."""
+        mock_urlopen.return_value = make_http_response(b"%PDF-1.4", "application/pdf")
+        self.assertEqual(fetch_links_from_url("http://example.com/doc"), [])
+
+
+def make_pdf(info: bytes, padding: int = 0) -> bytes:
+    """Build a minimal PDF with a classic xref table and the given Info dictionary."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", b"<< /Type /Pages /Kids [] /Count 0 >>",
+               b"<< /Length %d >>\nstream\n" % padding + b"0" * padding + b"\nendstream", info]
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        pdf += b"%010d 00000 n \n" % offset
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R /Info 4 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(pdf)
+
+
+class TestFetchRange(unittest.TestCase):
+
+    @patch("urllib.request.urlopen")
+    def test_partial_content(self, mock_urlopen):
+        """Test that a 206 response reports the total size from Content-Range."""
+        mock_urlopen.return_value = make_http_response(b"abcd", "application/pdf", {"Content-Range": "bytes 0-3/1000"}, 206)
+        data, total, partial = fetch_range("http://example.com/file.pdf", 0, 3)
+        self.assertEqual((data, total, partial), (b"abcd", 1000, True))
+        self.assertEqual(mock_urlopen.call_args[0][0].get_header("Range"), "bytes=0-3")
+
+    @patch("urllib.request.urlopen")
+    def test_suffix_range(self, mock_urlopen):
+        """Test that a negative start requests the end of the file."""
+        mock_urlopen.return_value = make_http_response(b"cd", "application/pdf", {"Content-Range": "bytes 998-999/1000"}, 206)
+        fetch_range("http://example.com/file.pdf", -2)
+        self.assertEqual(mock_urlopen.call_args[0][0].get_header("Range"), "bytes=-2")
+
+    @patch("urllib.request.urlopen")
+    def test_range_not_supported(self, mock_urlopen):
+        """Test that a 200 response is reported as the full file."""
+        mock_urlopen.return_value = make_http_response(b"abcdef", "application/pdf")
+        data, total, partial = fetch_range("http://example.com/file.pdf", 0, 3)
+        self.assertEqual((data, total, partial), (b"abcdef", 6, False))
+
+
+class TestZipMetadataRanges(unittest.TestCase):
+
+    def test_locates_metadata_members(self):
+        """Test that docProps members are located from the central directory."""
+        buffer = BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            archive.writestr("word/document.xml", "x" * 5000)
+            archive.writestr("docProps/core.xml", "<core/>")
+        data = buffer.getvalue()
+
+        ranges = zip_metadata_ranges(data[4000:], 4000)
+
+        self.assertEqual(len(ranges), 1)
+        start, end = ranges[0]
+        self.assertEqual(data[start:start + 4], b"PK\x03\x04")
+        self.assertIn(b"<core/>", data[start:end + 1])
+
+    def test_central_directory_not_in_tail(self):
+        """Test that nothing is returned when the central directory is out of reach."""
+        self.assertEqual(zip_metadata_ranges(b"no zip here", 0), [])
+
+
+class TestPdfObjectOffsets(unittest.TestCase):
+
+    def test_reads_xref_and_trailer(self):
+        """Test that object offsets and trailer are read from the end of the file."""
+        pdf = make_pdf(b"<< /Author (Bob) >>", padding=2000)
+        offsets, trailer = pdf_object_offsets(pdf[1500:], 1500)
+        self.assertEqual(sorted(offsets), [1, 2, 3, 4])
+        self.assertTrue(pdf[offsets[4]:].startswith(b"4 0 obj"))
+        self.assertIn(b"/Info 4 0 R", trailer)
+
+    def test_xref_out_of_reach(self):
+        """Test that nothing is returned when the xref table is not in the data."""
+        pdf = make_pdf(b"<< /Author (Bob) >>")
+        self.assertEqual(pdf_object_offsets(pdf[-30:], len(pdf) - 30), ({}, b""))
+
+
+class TestFetchRemoteMetadata(unittest.TestCase):
+
+    @patch("src.MetaDetective.MetaDetective.get_metadata")
+    @patch("src.MetaDetective.MetaDetective.fetch_range")
+    def test_partial_extraction(self, mock_fetch_range, mock_get_metadata):
+        """Test that only the head is fetched for a large image."""
+        mock_fetch_range.return_value = (b"\xff\xd8" + b"0" * 10, 10 ** 9, True)
+        mock_get_metadata.return_value = {"File Name": "tmp.jpg", "Make": "Canon"}
+
+        with patch("sys.stdout", new_callable=StringIO):
+            metadata = fetch_remote_metadata("http://example.com/photo.jpg", ["File Name", "Make"])
+
+        self.assertEqual(metadata, {"File Name": "http://example.com/photo.jpg", "Make": "Canon"})
+        mock_fetch_range.assert_called_once()
+
+    @patch("urllib.request.urlopen")
+    @patch("src.MetaDetective.MetaDetective.get_metadata_from_bytes")
+    @patch("src.MetaDetective.MetaDetective.get_metadata")
+    @patch("src.MetaDetective.MetaDetective.fetch_range")
+    def test_fallback_to_full_download(self, mock_fetch_range, mock_get_metadata, mock_from_bytes, mock_urlopen):
+        """Test that the full file is streamed to exiftool when the partial file yields nothing."""
+        mock_fetch_range.return_value = (b"0" * 10, 100, True)
+        mock_get_metadata.return_value = {"File Name": "tmp.jpg"}
+        mock_from_bytes.return_value = {"File Name": "http://example.com/photo.jpg", "Make": "Canon"}
+        mock_urlopen.return_value = make_http_response(b"0" * 100, "image/jpeg")
+
+        with patch("sys.stdout", new_callable=StringIO):
+            metadata = fetch_remote_metadata("http://example.com/photo.jpg", ["File Name", "Make"])
+
+        self.assertEqual(metadata["Make"], "Canon")
+        self.assertIs(mock_from_bytes.call_args[0][0].stream, mock_urlopen.return_value)
+
+    @patch("src.MetaDetective.MetaDetective.get_metadata_from_bytes")
+    @patch("src.MetaDetective.MetaDetective.fetch_range")
+    def test_server_without_range_support(self, mock_fetch_range, mock_from_bytes):
+        """Test that a full response is analyzed directly from memory."""
+        mock_fetch_range.return_value = (b"0" * 100, 100, False)
+        mock_from_bytes.return_value = {"File Name": "http://example.com/photo.jpg", "Make": "Canon"}
+
+        with patch("sys.stdout", new_callable=StringIO):
+            metadata = fetch_remote_metadata("http://example.com/photo.jpg", ["File Name", "Make"])
+
+        self.assertEqual(metadata["Make"], "Canon")
+        mock_fetch_range.assert_called_once()
+        mock_from_bytes.assert_called_once_with(b"0" * 100, ["File Name", "Make"], "http://example.com/photo.jpg")
+
+    @patch("src.MetaDetective.MetaDetective.get_metadata")
+    @patch("urllib.request.urlopen")
+    def test_every_range_request_rate_limited(self, mock_urlopen, mock_get_metadata):
+        """Test that the rate limiter is waited on before each Range request, not once per file."""
+        head = Mock(status=206, headers={"Content-Range": f"bytes 0-9/{10 ** 9}"})
+        head.read.return_value = b"%PDF-1.7\n0"
+        head.__enter__ = Mock(return_value=head)
+        head.__exit__ = Mock(return_value=False)
+        mock_urlopen.return_value = head
+        mock_get_metadata.return_value = {"File Name": "tmp.pdf", "Author": "Alice"}
+        rate_limiter = Mock()
+
+        metadata = fetch_remote_metadata("http://example.com/report.pdf", FIELDS, rate_limiter)
+
+        self.assertEqual(metadata["Author"], "Alice")
+        self.assertEqual(rate_limiter.wait.call_count, mock_urlopen.call_count)
+        self.assertGreaterEqual(rate_limiter.wait.call_count, 2)
+        rate_limiter.wait.assert_called_with("example.com")
+
+
+CORE_XML = (
+    '<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" '
+    'xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:dcterms="http://purl.org/dc/terms/">'
+    '<dc:title>Report</dc:title><dc:creator>Conan Edogawa</dc:creator><cp:lastModifiedBy>Ran Mouri</cp:lastModifiedBy>'
+    '<dcterms:created>2023-09-01T10:00:00Z</dcterms:created><dcterms:modified>2023-09-02T11:30:00Z</dcterms:modified>'
+    '</cp:coreProperties>'
+)
+HLINK = '<vt:variant><vt:i4>1</vt:i4></vt:variant>' * 4 + '<vt:variant><vt:lpwstr>{}</vt:lpwstr></vt:variant><vt:variant><vt:lpwstr></vt:lpwstr></vt:variant>'
+APP_XML = (
+    '<Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties" '
+    'xmlns:vt="http://schemas.openxmlformats.org/officeDocument/2006/docPropsVTypes">'
+    '<Application>Microsoft Office Word</Application><Company>Black Organization</Company>'
+    '<HLinks><vt:vector size="12" baseType="variant">'
+    f'{HLINK.format("https://example.com/a")}{HLINK.format("mailto:gin@example.com")}'
+    '</vt:vector></HLinks></Properties>'
+)
+META_XML = (
+    '<office:document-meta xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" '
+    'xmlns:meta="urn:oasis:names:tc:opendocument:xmlns:meta:1.0" xmlns:dc="http://purl.org/dc/elements/1.1/">'
+    '<office:meta><meta:initial-creator>Ai Haibara</meta:initial-creator><dc:creator>Heiji Hattori</dc:creator>'
+    '<meta:creation-date>2022-01-05T08:00:00.12</meta:creation-date><dc:date>2022-01-06T09:00:00</dc:date>'
+    '<meta:generator>LibreOffice/7.4</meta:generator></office:meta></office:document-meta>'
+)
+
+
+def make_office_document(parts: dict) -> bytes:
+    """Build a zip package holding the given parts."""
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", "<Types/>")
+        for name, content in parts.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def corrupt_zip_member(data: bytes, name: str) -> bytes:
+    """Overwrite the compressed stream of a zip member with an invalid deflate block."""
+    info = zipfile.ZipFile(BytesIO(data)).getinfo(name)
+    name_length, extra_length = struct.unpack_from("<HH", data, info.header_offset + 26)
+    start = info.header_offset + 30 + name_length + extra_length
+    return data[:start] + b"\xff" * info.compress_size + data[start + info.compress_size:]
+
+
+class TestGetOfficeMetadata(unittest.TestCase):
+
+    def test_ooxml_properties(self):
+        """Test that core and extended properties are mapped onto FIELDS with exiftool's date notation."""
+        document = make_office_document({"docProps/core.xml": CORE_XML, "docProps/app.xml": APP_XML})
+        metadata = get_office_metadata(BytesIO(document), FIELDS, "report.docx")
+        self.assertEqual(metadata, {
+            "File Name": "report.docx", "Title": "Report", "Creator": "Conan Edogawa", "Last Modified By": "Ran Mouri",
+            "Create Date": "2023:09:01 10:00:00Z", "Modify Date": "2023:09:02 11:30:00Z",
+            "Company": "Black Organization",
+            "Hyperlinks": "https://example.com/a, mailto:gin@example.com"})
+
+    def test_odf_properties(self):
+        """Test that the ODF meta.xml part is read."""
+        metadata = get_office_metadata(BytesIO(make_office_document({"meta.xml": META_XML})), FIELDS, "notes.odt")
+        self.assertEqual(metadata["Author"], "Ai Haibara")
+        self.assertEqual(metadata["Creator"], "Heiji Hattori")
+        self.assertEqual(metadata["Create Date"], "2022:01:05 08:00:00.12")
+        self.assertEqual(metadata["Modify Date"], "2022:01:06 09:00:00")
+        self.assertNotIn("Creator Tool", metadata)
+
+    def test_fields_filter(self):
+        """Test that only the requested fields are returned."""
+        document = make_office_document({"docProps/core.xml": CORE_XML})
+        self.assertEqual(get_office_metadata(BytesIO(document), ["Creator"], "report.docx"), {"Creator": "Conan Edogawa"})
+
+    def test_unreadable_documents(self):
+        """Test that documents without metadata parts, or not being zip packages, are left to exiftool."""
+        self.assertIsNone(get_office_metadata(BytesIO(make_office_document({"word/document.xml": "<w/>"})), FIELDS, "a.docx"))
+        self.assertIsNone(get_office_metadata(BytesIO(b"\xd0\xcf\x11\xe0 encrypted"), FIELDS, "b.docx"))
+        self.assertIsNone(get_office_metadata(BytesIO(make_office_document({"docProps/core.xml": "<broken"})), FIELDS, "c.docx"))
+
+    def test_corrupted_parts(self):
+        """Test that a document whose metadata part cannot be decompressed is left to exiftool."""
+        document = corrupt_zip_member(make_office_document({"docProps/core.xml": CORE_XML}), "docProps/core.xml")
+        self.assertIsNone(get_office_metadata(BytesIO(document), FIELDS, "report.docx"))
+
+    @patch("subprocess.run")
+    def test_get_metadata_skips_exiftool(self, mock_run):
+        """Test that office documents are analyzed without spawning exiftool, and others still use it."""
+        mock_run.return_value = Mock(stdout="Author : Gin\n")
+        with tempfile.TemporaryDirectory() as directory:
+            document = os.path.join(directory, "report.docx")
+            with open(document, "wb") as f:
+                f.write(make_office_document({"docProps/core.xml": CORE_XML}))
+            self.assertEqual(get_metadata(document, FIELDS)["Last Modified By"], "Ran Mouri")
+            mock_run.assert_not_called()
+
+            broken = os.path.join(directory, "broken.docx")
+            with open(broken, "wb") as f:
+                f.write(b"not a zip")
+            self.assertEqual(get_metadata(broken, FIELDS), {"Author": "Gin"})
+            mock_run.assert_called_once()
+
+            with patch("src.MetaDetective.MetaDetective.NATIVE_EXTRACTION", False):
+                get_metadata(document, FIELDS)
+            self.assertEqual(mock_run.call_count, 2)
+
+    @patch("subprocess.run")
+    def test_get_metadata_from_bytes(self, mock_run):
+        """Test that in-memory office documents are read natively too."""
+        document = make_office_document({"docProps/core.xml": CORE_XML})
+        metadata = get_metadata_from_bytes(document, FIELDS, "http://example.com/report.docx")
+        self.assertEqual(metadata["File Name"], "http://example.com/report.docx")
+        self.assertEqual(metadata["Creator"], "Conan Edogawa")
+        mock_run.assert_not_called()
+
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "examples")
+
+XMP_PACKET = (
+    b'<?xpacket begin="\xef\xbb\xbf" id="W5M0MpCehiHzreSzNTczkc9d"?>'
+    b'<x:xmpmeta xmlns:x="adobe:ns:meta/"><rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">'
+    b'<rdf:Description xmlns:xmp="http://ns.adobe.com/xap/1.0/" xmlns:dc="http://purl.org/dc/elements/1.1/"'
+    b' xmp:CreatorTool="Microsoft Word" xmp:CreateDate="2023-09-01T10:00:00+02:00">'
+    b'<dc:creator><rdf:Seq><rdf:li>Gin</rdf:li><rdf:li>Vodka</rdf:li></rdf:Seq></dc:creator>'
+    b'</rdf:Description></rdf:RDF></x:xmpmeta><?xpacket end="w"?>'
+)
+
+
+def make_pdf_document(objects: dict, trailer: bytes, xref_stream: bool = False) -> bytes:
+    """Build a PDF holding the given objects, with a classic cross-reference table or a compressed cross-reference stream."""
+    pdf = b"%PDF-1.5\n"
+    offsets = {}
+    for number, body in sorted(objects.items()):
+        offsets[number] = len(pdf)
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    size = max(offsets) + 2
+    if xref_stream:
+        offsets[size - 1] = len(pdf)
+        rows = b"".join(b"\x02" + bytes([1]) + offsets.get(number, 0).to_bytes(2, "big") + b"\x00" for number in range(size))
+        # Encode the rows with the PNG Up predictor, as PDF writers do.
+        previous, encoded = bytes(4), b""
+        for start in range(0, len(rows), 5):
+            row = rows[start + 1:start + 5]
+            encoded += b"\x02" + bytes((a - b) & 0xFF for a, b in zip(row, previous))
+            previous = row
+        content = zlib.compress(encoded)
+        pdf += (b"%d 0 obj\n<< /Type /XRef /Size %d /W [1 2 1] /Filter /FlateDecode "
+                b"/DecodeParms << /Columns 4 /Predictor 12 >> /Length %d %s >>\nstream\n%s\nendstream\nendobj\n"
+                % (size - 1, size, len(content), trailer[2:-2], content))
+        return pdf + b"startxref\n%d\n%%%%EOF\n" % offsets[size - 1]
+    startxref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (size - 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offsets[number] for number in range(1, size - 1))
+    return pdf + b"trailer\n%s\nstartxref\n%d\n%%%%EOF\n" % (trailer, startxref)
+
+
+class TestGetPdfMetadata(unittest.TestCase):
+
+    def test_example_document(self):
+        """Test that the Info dictionary of an example PDF, with UTF-16 strings and custom keys, is read."""
+        metadata = get_native_metadata(os.path.join(EXAMPLES, "MetaDetective-APTX_4869_report.pdf"), FIELDS)
+        self.assertEqual(metadata["Author"], "Ai Haibara")
+        self.assertEqual(metadata["Creator"], "AHaibara")
+        self.assertEqual(metadata["Last Modified By"], "HAgasa")
+        self.assertEqual(metadata["Company"], "Black Organization")
+        self.assertEqual(metadata["Create Date"], "2023:08:31 18:53:00+00:00")
+        self.assertEqual(metadata["Producer"], "Adobe Acrobat 17.011.30158")
+
+    def test_strings_and_references(self):
+        """Test escape sequences, hex strings, name escapes and strings held in other objects."""
+        pdf = make_pdf_document({1: b"<< /Type /Catalog >>",
+                                 2: rb"<< /Title (Case \(1\)\\ \101) /Author <FEFF004700690E01> /Last#20Modified#20By 3 0 R"
+                                    rb" /Trapped /False /ModDate (D:20230901100000Z) >>",
+                                 3: b"(Ran\\\nMouri)"}, b"<< /Size 4 /Root 1 0 R /Info 2 0 R >>")
+        metadata = get_pdf_metadata(pdf, FIELDS, "case.pdf")
+        self.assertEqual(metadata, {"File Name": "case.pdf", "Title": "Case (1)\\ A", "Author": "Giก",
+                                    "Last Modified By": "RanMouri", "Modify Date": "2023:09:01 10:00:00Z"})
+
+    def test_xref_stream_and_xmp(self):
+        """Test that cross-reference streams are decoded and the XMP packet fills the fields missing from Info."""
+        packet = zlib.compress(XMP_PACKET)
+        pdf = make_pdf_document({1: b"<< /Type /Catalog /Metadata 3 0 R >>", 2: b"<< /Author (Ai Haibara) >>",
+                                 3: b"<< /Type /Metadata /Filter /FlateDecode /Length %d >>\nstream\n%s\nendstream" % (len(packet), packet)},
+                                b"<< /Root 1 0 R /Info 2 0 R >>", xref_stream=True)
+        metadata = get_pdf_metadata(pdf, FIELDS, "scan.pdf")
+        self.assertEqual(metadata, {"File Name": "scan.pdf", "Author": "Ai Haibara", "Creator": "Gin, Vodka",
+                                    "Creator Tool": "Microsoft Word", "Create Date": "2023:09:01 10:00:00+02:00"})
+
+    def test_unreadable_pdfs(self):
+        """Test that truncated, encrypted or dangling Info PDFs are left to exiftool."""
+        objects = {1: b"<< /Type /Catalog >>", 2: b"<< /Author (Gin) >>"}
+        self.assertIsNone(get_pdf_metadata(b"%PDF-1.4\n1 0 obj", FIELDS, "a.pdf"))
+        self.assertIsNone(get_pdf_metadata(make_pdf_document(objects, b"<< /Root 1 0 R /Info 2 0 R /Encrypt 5 0 R >>"), FIELDS, "b.pdf"))
+        self.assertIsNone(get_pdf_metadata(make_pdf_document(objects, b"<< /Root 1 0 R /Info 7 0 R >>"), FIELDS, "c.pdf"))
+
+    def test_pdf_date(self):
+        """Test the conversion of PDF dates to exiftool's notation."""
+        self.assertEqual(pdf_date("D:20230831185300+02'00'"), "2023:08:31 18:53:00+02:00")
+        self.assertEqual(pdf_date("D:2023083118"), "2023:08:31 18:00:00")
+        self.assertEqual(pdf_date("yesterday"), "yesterday")
+
+
+def tiff_directory(order: str, entries: list, offset: int) -> bytes:
+    """Build a TIFF image file directory located at offset, followed by the values too large for their entry."""
+    data_offset = offset + 2 + 12 * len(entries) + 4
+    directory, data = struct.pack(order + "H", len(entries)), b""
+    for tag, kind, count, value in entries:
+        if len(value) > 4:
+            directory += struct.pack(order + "HHII", tag, kind, count, data_offset + len(data))
+            data += value + b"\0" * (len(value) % 2)
+        else:
+            directory += struct.pack(order + "HHI", tag, kind, count) + value.ljust(4, b"\0")
+    return directory + struct.pack(order + "I", 0) + data
+
+
+def make_tiff(order: str, ifd0: list, exif: list, gps: list) -> bytes:
+    """Build a TIFF structure holding IFD0 with pointers to an Exif and a GPS directory."""
+    def pointer(tag, offset):
+        return tag, 4, 1, struct.pack(order + "I", offset)
+
+    exif_offset = 8 + len(tiff_directory(order, ifd0 + [pointer(0x8769, 0), pointer(0x8825, 0)], 8))
+    gps_offset = exif_offset + len(tiff_directory(order, exif, exif_offset))
+    header = (b"II*\0" if order == "<" else b"MM\0*") + struct.pack(order + "I", 8)
+    directories = [tiff_directory(order, ifd0 + [pointer(0x8769, exif_offset), pointer(0x8825, gps_offset)], 8),
+                   tiff_directory(order, exif, exif_offset), tiff_directory(order, gps, gps_offset)]
+    return header + b"".join(directories)
+
+
+def exif_entries(order: str) -> tuple:
+    """Build the IFD0, Exif and GPS entries of a picture taken in Tokyo."""
+    def ascii(tag, text):
+        return tag, 2, len(text) + 1, text.encode() + b"\0"
+
+    def rationals(tag, *values):
+        return tag, 5, len(values), b"".join(struct.pack(order + "II", *value) for value in values)
+
+    ifd0 = [ascii(0x010F, "Canon"), ascii(0x0110, "Canon EOS 5D"), ascii(0x0131, "Firmware 1.0"), (0x927C, 7, 3, b"\xff" * 3)]
+    exif = [ascii(0x9004, "2023:09:01 10:00:00"), ascii(0xA431, "0123456789")]
+    gps = [ascii(0x0001, "N"), rationals(0x0002, (35, 1), (39, 1), (3120, 100)),
+           ascii(0x0003, "E"), rationals(0x0004, (139, 1), (41, 1), (5988, 100)),
+           (0x0005, 1, 1, b"\x01"), rationals(0x0006, (1234, 100)), ascii(0x0009, "A")]
+    return ifd0, exif, gps
+
+
+class TestGetExifMetadata(unittest.TestCase):
+
+    def test_jpeg_exif_and_gps(self):
+        """Test that camera, date and GPS tags are read from the EXIF segment, with exiftool's notation."""
+        exif = b"Exif\0\0" + make_tiff("<", *exif_entries("<"))
+        jpeg = b"".join([b"\xff\xd8\xff\xe0\x00\x04\x00\x00\xff\xe1", struct.pack(">H", len(exif) + 2), exif,
+                         b"\xff\xe1", struct.pack(">H", len(XMP_PACKET) + 31), b"http://ns.adobe.com/xap/1.0/\0", XMP_PACKET,
+                         b"\xff\xda\x00\x02", b"\xff" * 100])
+        fields = [field for field in FIELDS if field not in ("Camera ID", "Camera Type 2", "Internal Serial Number")]
+        metadata = get_exif_metadata(jpeg, fields, "photo.jpg")
+        self.assertEqual(metadata, {
+            "File Name": "photo.jpg", "Make": "Canon", "Camera Model Name": "Canon EOS 5D", "Software": "Firmware 1.0",
+            "Create Date": "2023:09:01 10:00:00", "Serial Number": "0123456789", "Creator": "Gin, Vodka",
+            "Creator Tool": "Microsoft Word", "GPS Latitude": "35 deg 39' 31.20\" N", "GPS Longitude": "139 deg 41' 59.88\" E",
+            "GPS Position": "35 deg 39' 31.20\" N, 139 deg 41' 59.88\" E", "GPS Altitude": "12.3 m Below Sea Level",
+            "GPS Status": "Measurement Active", "Formatted GPS Position": "35.658667, 139.699967"})
+
+    @patch("subprocess.run")
+    def test_tiff_file(self, mock_run):
+        """Test that big-endian TIFF files are memory-mapped and analyzed without spawning exiftool."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "scan.tiff")
+            with open(path, "wb") as f:
+                f.write(make_tiff(">", *exif_entries(">")))
+            metadata = get_metadata(path, ["File Name", "Make", "GPS Position"])
+        self.assertEqual(metadata["File Name"], "scan.tiff")
+        self.assertEqual(metadata["Make"], "Canon")
+        self.assertEqual(metadata["Formatted GPS Position"], "35.658667, 139.699967")
+        mock_run.assert_not_called()
+
+    @patch("subprocess.run")
+    def test_maker_notes_left_to_exiftool(self, mock_run):
+        """Test that pictures holding maker notes go to exiftool when maker-note fields are requested."""
+        mock_run.return_value = Mock(stdout="Make : Canon\nInternal Serial Number : 4A0123\n")
+        ifd0, exif, gps = exif_entries("<")
+        tiff = make_tiff("<", [entry for entry in ifd0 if entry[0] != 0x927C], exif + [(0x927C, 7, 3, b"\xff" * 3)], gps)
+        self.assertIsNone(get_exif_metadata(tiff, FIELDS, "photo.tif"))
+        self.assertEqual(get_exif_metadata(tiff, ["Make"], "photo.tif"), {"Make": "Canon"})
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "photo.tif")
+            with open(path, "wb") as f:
+                f.write(tiff)
+            self.assertEqual(get_metadata(path, FIELDS), {"Make": "Canon", "Internal Serial Number": "4A0123"})
+
+    @patch("subprocess.run")
+    def test_unparseable_pictures(self, mock_run):
+        """Test that pictures that cannot be parsed are left to exiftool."""
+        mock_run.return_value = Mock(stdout="Make : Nikon\n")
+        self.assertIsNone(get_exif_metadata(b"\xff\xd8\x00\x00\x00\x00", FIELDS, "a.jpg"))
+        self.assertIsNone(get_exif_metadata(b"\xff\xd8\xff\xe1\x00\x0eExif\0\0II*\0\xff\xff\xff\x7f", FIELDS, "b.jpg"))
+        self.assertIsNone(get_exif_metadata(b"GIF89a", FIELDS, "c.jpg"))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "empty.jpg")
+            open(path, "wb").close()
+            self.assertEqual(get_metadata(path, FIELDS), {"Make": "Nikon"})
+
+    def test_format_dms(self):
+        """Test that seconds rounding up to 60 carry over to minutes and degrees."""
+        self.assertEqual(format_dms(50.819053, "N"), "50 deg 49' 8.59\" N")
+        self.assertEqual(format_dms(10.9999999, "W"), "11 deg 0' 0.00\" W")
+
+
+class TestMetadataRecord(unittest.TestCase):
+
+    def setUp(self):
+        self.metadata = {"File Name": "a.pdf", "Author": "Gin", "Producer": "Adobe PDF Library 15.0"}
+        self.record = MetadataRecord(self.metadata)
+
+    def test_mapping_access(self):
+        """Test that records read like the dictionary they were built from, in the same order."""
+        self.assertEqual(self.record, self.metadata)
+        self.assertEqual(list(self.record.items()), list(self.metadata.items()))
+        self.assertEqual(self.record["Author"], "Gin")
+        self.assertEqual(self.record.get("Company", "-"), "-")
+        self.assertIn("Producer", self.record)
+        self.assertEqual(len(self.record), 3)
+        with self.assertRaises(KeyError):
+            self.record["Company"]
+
+    def test_updates(self):
+        """Test that fields can be replaced, added and removed, as the renderers do."""
+        self.record["Author"] = "Vodka"
+        self.record["Map Link"] = "https://example.com"
+        del self.record["Producer"]
+        self.assertEqual(self.record, {"File Name": "a.pdf", "Author": "Vodka", "Map Link": "https://example.com"})
+
+    def test_values_and_layouts_are_shared(self):
+        """Test that repeated values and field layouts are stored once."""
+        other = MetadataRecord({"File Name": "b.pdf", "Author": "".join(["G", "in"]), "Producer": "Adobe PDF Library 15.0"})
+        self.assertIs(other["Author"], self.record["Author"])
+        self.assertIs(other._layout, self.record._layout)
+        self.assertFalse(hasattr(other, "__dict__"))
+
+    def test_unique_values_not_interned(self):
+        """Test that values specific to each file are not kept in STRING_TABLE."""
+        sizes = []
+        for index in range(100):
+            MetadataRecord({"File Name": f"{index}.pdf", "Title": f"Report {index}", "Create Date": f"2023:09:01 10:00:{index:02}",
+                            "Producer": "Adobe PDF Library 15.0"})
+            sizes.append(len(STRING_TABLE.strings))
+        self.assertEqual(sizes, sizes[:1] * 100)
+
+    def test_copies(self):
+        """Test that records survive deep copies and pickling."""
+        import copy
+        import pickle
+        self.assertEqual(copy.deepcopy(self.record), self.metadata)
+        self.assertEqual(pickle.loads(pickle.dumps(self.record)), self.metadata)
+
+
+class TestArchives(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.addCleanup(ARCHIVES.close)
+        self.zip_path = os.path.join(self.directory.name, "leak.zip")
+        with zipfile.ZipFile(self.zip_path, "w") as archive:
+            archive.writestr("docs/report.docx", make_office_document({"docProps/core.xml": CORE_XML}))
+            archive.writestr("docs/notes.txt", "notes")
+            archive.writestr("empty/", "")
+        self.tar_path = os.path.join(self.directory.name, "bundle.tar.gz")
+        with tarfile.open(self.tar_path, "w:gz") as archive:
+            archive.add(os.path.join(EXAMPLES, "MetaDetective-Kogoro_s_Choice.pdf"), "case.pdf")
+        with open(os.path.join(self.directory.name, "plain.pdf"), "wb") as f:
+            f.write(b"%PDF-1.4")
+
+    def test_get_files_lists_members(self):
+        """Test that archives are replaced by their members, filtered by type, and other files are kept."""
+        args = argparse.Namespace(directory=self.directory.name, files=None, type=["pdf", "docx"], archives=True, attachments=False)
+        files = sorted(get_files(args))
+        self.assertEqual(files, sorted([self.tar_path + "!/case.pdf", self.zip_path + "!/docs/report.docx",
+                                        os.path.join(self.directory.name, "plain.pdf")]))
+
+        args = argparse.Namespace(directory=None, files=[self.zip_path], type=["all"], archives=True, attachments=False)
+        self.assertEqual(get_files(args), [self.zip_path + "!/docs/report.docx", self.zip_path + "!/docs/notes.txt"])
+
+        args.archives = False
+        self.assertEqual(get_files(args), [self.zip_path])
+
+    @patch("subprocess.run")
+    def test_members_are_read_in_memory(self, mock_run):
+        """Test that members are analyzed with the native readers and named after their archive."""
+        metadata = get_metadata(self.zip_path + "!/docs/report.docx", FIELDS)
+        self.assertEqual(metadata["File Name"], "leak.zip!/docs/report.docx")
+        self.assertEqual(metadata["Creator"], "Conan Edogawa")
+
+        metadata = get_metadata(self.tar_path + "!/case.pdf", FIELDS)
+        self.assertEqual(metadata["File Name"], "bundle.tar.gz!/case.pdf")
+        self.assertEqual(metadata["Author"], "Kogoro Mouri")
+        mock_run.assert_not_called()
+
+    @patch("src.MetaDetective.MetaDetective.get_metadata_from_bytes")
+    def test_large_members_are_streamed(self, mock_from_bytes):
+        """Test that members larger than the memory limit are streamed rather than read in full, without holding the cache."""
+        def try_lock(acquired):
+            acquired.append(ARCHIVES.lock.acquire(blocking=False))
+            if acquired[0]:
+                ARCHIVES.lock.release()
+
+        def lock_free():
+            acquired = []
+            thread = threading.Thread(target=try_lock, args=(acquired,))
+            thread.start()
+            thread.join()
+            return acquired[0]
+
+        mock_from_bytes.side_effect = lambda data, fields, name: {"Author": "Gin", "Cache Free": lock_free()}
+        with patch("src.MetaDetective.MetaDetective.ARCHIVE_MEMBER_MEMORY_SIZE", 10):
+            self.assertEqual(get_metadata(self.tar_path + "!/case.pdf", FIELDS), {"Author": "Gin", "Cache Free": True})
+        data, _, name = mock_from_bytes.call_args[0]
+        self.assertNotIsInstance(data, bytes)
+        self.assertEqual(name, "bundle.tar.gz!/case.pdf")
+
+    @patch("subprocess.run")
+    def test_parallel_extraction(self, mock_run):
+        """Test that threads analyzing different archives each keep their own archive open."""
+        members = list_archive_members(self.zip_path, ["docx"]) + list_archive_members(self.tar_path, ["all"])
+        ARCHIVES.close()
+        records = extract_files(members * 3, jobs=2)
+        self.assertEqual([record["File Name"] for record in records],
+                         ["leak.zip!/docs/report.docx", "bundle.tar.gz!/case.pdf"] * 3)
+        self.assertIsNone(ARCHIVES.path)
+        mock_run.assert_not_called()
+
+    def test_missing_members(self):
+        """Test that unreadable members and archives are reported and skipped."""
+        with self.assertLogs("MetaDetective", level="ERROR") as logs:
+            self.assertEqual(get_metadata(self.zip_path + "!/missing.pdf", FIELDS), {})
+            broken = os.path.join(self.directory.name, "broken.zip")
+            with open(broken, "wb") as f:
+                f.write(b"not a zip")
+            self.assertEqual(list_archive_members(broken, ["all"]), [])
+        self.assertIn("Error reading leak.zip!/missing.pdf", logs.output[0])
+        self.assertIn("Error reading archive", logs.output[1])
+
+    def test_corrupted_members(self):
+        """Test that members whose compressed stream is damaged are reported and skipped."""
+        corrupted = os.path.join(self.directory.name, "corrupted.zip")
+        buffer = BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("docs/notes.txt", "notes " * 100)
+        with open(corrupted, "wb") as f:
+            f.write(corrupt_zip_member(buffer.getvalue(), "docs/notes.txt"))
+
+        stream = os.path.join(self.directory.name, "corrupted.tar.xz")
+        with tarfile.open(stream, "w:xz") as archive:
+            content = "".join(str(i * 7919 % 100003) for i in range(40000)).encode()
+            info = tarfile.TarInfo("case.pdf")
+            info.size = len(content)
+            archive.addfile(info, BytesIO(content))
+        with open(stream, "rb") as f:
+            data = bytearray(f.read())
+        data[len(data) * 3 // 4:len(data) * 3 // 4 + 64] = b"\xff" * 64
+        with open(stream, "wb") as f:
+            f.write(data)
+
+        with self.assertLogs("MetaDetective", level="ERROR") as logs:
+            self.assertEqual(get_metadata(corrupted + "!/docs/notes.txt", FIELDS), {})
+            self.assertEqual(get_metadata(stream + "!/case.pdf", FIELDS), {})
+        self.assertIn("Error reading corrupted.zip!/docs/notes.txt", logs.output[0])
+        self.assertIn("Error reading corrupted.tar.xz!/case.pdf", logs.output[1])
+
+
+def make_message(sender: str, subject: str, attachments: dict) -> bytes:
+    """Build a message with a text body and the given attachments."""
+    from email.message import EmailMessage
+    message = EmailMessage()
+    message["From"], message["To"], message["Subject"] = sender, "conan@example.com", subject
+    message["Date"] = "Fri, 01 Sep 2023 10:00:00 +0200"
+    message.set_content("See attached.")
+    for name, content in attachments.items():
+        message.add_attachment(content, maintype="application", subtype="octet-stream", filename=name)
+    return message.as_bytes()
+
+
+class TestMailAttachments(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.addCleanup(ARCHIVES.close)
+        self.document = make_office_document({"docProps/core.xml": CORE_XML})
+        self.eml_path = os.path.join(self.directory.name, "order.eml")
+        with open(self.eml_path, "wb") as f:
+            f.write(make_message("Gin <gin@example.com>", "Orders", {"report.docx": self.document, "notes.txt": b"x"}))
+
+    def args(self, files, types=None):
+        return argparse.Namespace(directory=None, files=files, type=types or ["all"], archives=False, attachments=True)
+
+    @patch("subprocess.run")
+    def test_eml_attachments(self, mock_run):
+        """Test that attachments are listed, analyzed in memory and attributed to their message."""
+        files = get_files(self.args([self.eml_path], ["docx"]))
+        self.assertEqual(files, [self.eml_path + "!/report.docx"])
+        metadata = get_metadata(files[0], FIELDS)
+        self.assertEqual(list(metadata)[:4], ["File Name", "Message From", "Message Subject", "Message Date"])
+        self.assertEqual(metadata["File Name"], "order.eml!/report.docx")
+        self.assertEqual(metadata["Message From"], "Gin <gin@example.com>")
+        self.assertEqual(metadata["Message Subject"], "Orders")
+        self.assertEqual(metadata["Message Date"], "2023:09:01 10:00:00+02:00")
+        self.assertEqual(metadata["Creator"], "Conan Edogawa")
+        mock_run.assert_not_called()
+
+    def test_mbox_and_emlx(self):
+        """Test that mbox messages are numbered, and that emlx messages are read past their length prefix."""
+        import mailbox
+        mbox_path = os.path.join(self.directory.name, "inbox.mbox")
+        box = mailbox.mbox(mbox_path)
+        box.add(make_message("Gin <gin@example.com>", "First", {"a.docx": self.document}))
+        box.add(make_message("Vodka <vodka@example.com>", "Second", {"a.docx": self.document, "b.docx": self.document}))
+        box.close()
+        emlx_path = os.path.join(self.directory.name, "1.emlx")
+        message = make_message("Chianti <chianti@example.com>", "Third", {"c.docx": self.document})
+        with open(emlx_path, "wb") as f:
+            f.write(b"%d\n" % len(message) + message + b"<?xml version=\"1.0\"?><plist/>")
+
+        files = get_files(self.args([mbox_path, emlx_path]))
+        self.assertEqual([file.rsplit("!/", 1)[1] for file in files], ["1/a.docx", "2/a.docx", "2/b.docx", "c.docx"])
+        self.assertEqual(get_metadata(files[2], FIELDS)["Message From"], "Vodka <vodka@example.com>")
+        self.assertEqual(get_metadata(files[3], FIELDS)["Message Subject"], "Third")
+
+    def test_html_export_escapes_headers(self):
+        """Test that mail headers of attachment records are escaped in both HTML displays."""
+        with open(self.eml_path, "wb") as f:
+            f.write(make_message("Gin <gin@black.org>", "<script>alert(1)</script>", {"report.docx": self.document}))
+        metadata = get_metadata(get_files(self.args([self.eml_path]))[0], FIELDS)
+        for display in ("all", "singular"):
+            content = export_metadata_to_html(argparse.Namespace(display=display, format="concise"), [dict(metadata)], [])
+            self.assertIn("Gin &lt;gin@black.org&gt;", content)
+            self.assertNotIn("<gin@black.org>", content)
+            self.assertNotIn("<script>", content)
+        content = export_metadata_to_html(argparse.Namespace(display="all", format=None), [dict(metadata)], [])
+        self.assertIn("<strong>Message Subject:</strong> &lt;script&gt;alert(1)&lt;/script&gt;", content)
+
+    def test_duplicate_and_missing_attachments(self):
+        """Test that duplicate names are made unique and that unknown attachments are reported."""
+        with open(self.eml_path, "wb") as f:
+            f.write(make_message("Gin <gin@example.com>", "Orders", {"a.pdf": b"1", "a.pdf ": b"2"}).replace(b'"a.pdf "', b'"a.pdf"'))
+        self.assertEqual(get_files(self.args([self.eml_path])), [self.eml_path + "!/a.pdf", self.eml_path + "!/3-a.pdf"])
+        with self.assertLogs("MetaDetective", level="ERROR") as logs:
+            self.assertEqual(get_metadata(self.eml_path + "!/missing.pdf", FIELDS), {})
+        self.assertIn("Error reading order.eml!/missing.pdf", logs.output[0])
+
+
+class TestGetMetadataFromBytes(unittest.TestCase):
+
+    @patch("subprocess.run")
+    def test_bytes_are_piped_to_exiftool(self, mock_run):
+        """Test that bytes are sent to exiftool's standard input."""
+        mock_run.return_value = Mock(stdout=b"Author                          : Alice\n")
+
+        metadata = get_metadata_from_bytes(b"content", ["File Name", "Author"], "memory.pdf")
+
+        self.assertEqual(metadata, {"File Name": "memory.pdf", "Author": "Alice"})
+        self.assertEqual(mock_run.call_args[0][0], ["exiftool", "-"])
+        self.assertEqual(mock_run.call_args[1]["input"], b"content")
+
+    @patch("subprocess.Popen")
+    def test_stream_is_copied_to_exiftool(self, mock_popen):
+        """Test that a stream is copied chunk by chunk to exiftool."""
+        stdin = BytesIO()
+        stdin.close = Mock()
+        process = mock_popen.return_value
+        process.stdin = stdin
+        process.stdout = BytesIO(b"Author                          : Alice\n")
+        process.wait.return_value = 0
+
+        metadata = get_metadata_from_bytes(BytesIO(b"streamed content"), ["Author"], "stream.pdf")
+
+        self.assertEqual(metadata, {"Author": "Alice"})
+        self.assertEqual(stdin.getvalue(), b"streamed content")
+        stdin.close.assert_called_once()
+
+    @patch("subprocess.run")
+    def test_exiftool_error(self, mock_run):
+        """Test that an exiftool failure yields an empty result."""
+        mock_run.side_effect = subprocess.CalledProcessError(returncode=1, cmd=["exiftool", "-"])
+        with patch("sys.stdout", new_callable=StringIO):
+            self.assertEqual(get_metadata_from_bytes(b"content", ["Author"]), {})
+
+
+class TestExtractionPipeline(unittest.TestCase):
+
+    def make_args(self, display="singular", export=None):
+        return argparse.Namespace(display=display, format="concise", export=export)
+
+    @patch("src.MetaDetective.MetaDetective.get_metadata")
+    def test_collects_results(self, mock_get_metadata):
+        """Test that every submitted file is extracted once."""
+        mock_get_metadata.side_effect = lambda path, fields: {"File Name": path, "Author": "Alice"}
+        pipeline = ExtractionPipeline(self.make_args(), [], workers=2, queue_size=1)
+        pipeline.start()
+        for path in ["a.pdf", "b.pdf", "a.pdf", "c.pdf"]:
+            pipeline.submit(path)
+
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            all_metadata = pipeline.close()
+
+        self.assertEqual(sorted(m["File Name"] for m in all_metadata), ["a.pdf", "b.pdf", "c.pdf"])
+        self.assertEqual(mock_get_metadata.call_count, 3)
+        self.assertIn("Author: Alice", mock_stdout.getvalue())
+
+    @patch("src.MetaDetective.MetaDetective.get_metadata")
+    def test_all_display_reports_while_running(self, mock_get_metadata):
+        """Test that entries are printed as they are extracted in 'all' display mode."""
+        mock_get_metadata.side_effect = lambda path, fields: {"File Name": path, "Author": "Alice"}
+        pipeline = ExtractionPipeline(self.make_args(display="all"), [], workers=1)
+
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            pipeline.start()
+            pipeline.submit("a.pdf")
+            pipeline.paths.join()
+            pipeline.results.join()
+            printed_before_close = mock_stdout.getvalue()
+            pipeline.close()
+
+        self.assertIn("File Name: a.pdf", printed_before_close)
+        self.assertEqual(mock_stdout.getvalue().count("File Name: a.pdf"), 1)
+
+    @patch("src.MetaDetective.MetaDetective.display_all_metadata")
+    @patch("src.MetaDetective.MetaDetective.get_metadata")
+    def test_reporting_errors_do_not_stall(self, mock_get_metadata, mock_display):
+        """Test that a failure while printing one entry does not stop the reporting of the others."""
+        mock_get_metadata.side_effect = lambda path, fields: {"File Name": path, "Author": "Alice"}
+        mock_display.side_effect = OSError("geocoding failed")
+        pipeline = ExtractionPipeline(self.make_args(display="all"), [], workers=1, queue_size=1)
+        pipeline.start()
+        for path in ["a.pdf", "b.pdf", "c.pdf"]:
+            pipeline.submit(path)
+
+        with self.assertLogs("MetaDetective", level="ERROR") as logs:
+            all_metadata = pipeline.close()
+
+        self.assertEqual(len(all_metadata), 3)
+        self.assertEqual(mock_display.call_count, 3)
+        self.assertIn("geocoding failed", logs.output[0])
+
+
+@patch("src.MetaDetective.MetaDetective.PLAN_FILE_OVERHEAD", 10)
+@patch("src.MetaDetective.MetaDetective.PLAN_LARGE_FILE_COST", 1000)
+class TestPlanExtraction(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.files = []
+        for name, size in [("a.txt", 10), ("video.mp4", 5000), ("b.txt", 20), ("c.pdf", 5000), ("movie.mov", 9000), ("d.txt", 0)]:
+            self.files.append(os.path.join(self.directory.name, name))
+            with open(self.files[-1], "wb") as f:
+                f.write(b"x" * size)
+
+    def test_largest_first(self):
+        """Test that large files are tasks of their own, largest first, and small ones batched in file order."""
+        self.assertEqual(plan_extraction(self.files), [[4], [1], [0, 2, 3, 5]])
+        self.assertEqual(plan_extraction(self.files, batch_size=3), [[4], [1], [0, 2, 3], [5]])
+        self.assertEqual(plan_extraction(self.files + ["missing.mp4"], jobs=1), [[4], [1], [3, 5], [0, 2], [6]])
+
+    def test_archive_members(self):
+        """Test that archive members are planned by their uncompressed size."""
+        archive = os.path.join(self.directory.name, "bundle.tar.gz")
+        with tarfile.open(archive, "w:gz") as tar:
+            for name, size in [("small.txt", 10), ("clip.mp4", 20 * 1024 * 1024)]:
+                info = tarfile.TarInfo(name)
+                info.size = size
+                tar.addfile(info, BytesIO(b"\0" * size))
+        members = list_archive_members(archive, ["all"])
+        self.assertEqual(plan_extraction(members + self.files[:1]), [[1], [0, 2]])
+
+        with patch("src.MetaDetective.MetaDetective.NATIVE_EXTRACTION", False):
+            self.assertEqual(plan_extraction(self.files)[:3], [[4], [1], [3]])
+
+    @patch("src.MetaDetective.MetaDetective.ExifTool")
+    @patch("src.MetaDetective.MetaDetective.get_metadata")
+    def test_extract_files_in_order(self, mock_get_metadata, mock_exiftool):
+        """Test that parallel extraction returns the records in file order, one exiftool process per thread."""
+        mock_get_metadata.side_effect = lambda path, fields, exiftool=None, archives=None: {"File Name": os.path.basename(path)}
+        records = extract_files(self.files, jobs=2)
+        self.assertEqual([record["File Name"] for record in records], [os.path.basename(file) for file in self.files])
+        self.assertEqual(mock_exiftool.call_count, 2)
+        self.assertEqual(mock_exiftool.return_value.close.call_count, 2)
+
+    @patch("src.MetaDetective.MetaDetective.ExifTool")
+    @patch("src.MetaDetective.MetaDetective.get_metadata")
+    def test_extract_files_failures(self, mock_get_metadata, mock_exiftool):
+        """Test that a file whose extraction fails gets an empty record, with one job or several."""
+        def get_metadata(path, fields, exiftool=None, archives=None):
+            if path.endswith(".pdf"):
+                raise ValueError("unreadable")
+            return {"File Name": os.path.basename(path)}
+
+        mock_get_metadata.side_effect = get_metadata
+        for jobs in (1, 2):
+            with self.assertLogs("MetaDetective", level="ERROR") as logs:
+                records = extract_files(self.files, jobs=jobs)
+            self.assertEqual([record.get("File Name") for record in records],
+                             [None if file.endswith(".pdf") else os.path.basename(file) for file in self.files])
+            self.assertIn("c.pdf. Reason: unreadable", logs.output[0])
+
+    def test_coordinator_batches(self):
+        """Test that the coordinator hands out large files first and merges the results in file order."""
+        coordinator = Coordinator(self.files, batch_size=4)
+        leases = [coordinator.lease() for _ in range(3)]
+        self.assertEqual([os.path.basename(files[0]) for _, files in leases], ["movie.mov", "video.mp4", "a.txt"])
+        for batch, files in leases:
+            coordinator.complete(batch, [{"File Name": os.path.basename(file)} for file in files])
+        self.assertEqual([m["File Name"] for m in coordinator.wait()], [os.path.basename(file) for file in self.files])
+
+
+@patch("src.MetaDetective.MetaDetective.DEDUPE_PARTIAL_SIZE", 4)
+class TestDedupe(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.files = []
+        for name, content in [("a.pdf", b"same content"), ("b.txt", b"other"), ("a copy.pdf", b"same content"),
+                              ("c.pdf", b"same but longer"[:12]), ("d.txt", b"other"), ("e.txt", b"otter")]:
+            self.files.append(os.path.join(self.directory.name, name))
+            with open(self.files[-1], "wb") as f:
+                f.write(content)
+
+    def test_find_duplicates(self):
+        """Test that files are grouped by content, through their size, partial hash and full hash."""
+        with patch("src.MetaDetective.MetaDetective.hash_file", wraps=hash_file) as mock_hash:
+            groups = find_duplicates(self.files + [self.files[0], "missing.pdf", "a.zip!/a.pdf", self.directory.name])
+        self.assertEqual(groups, [[self.files[0], self.files[2]], [self.files[1], self.files[4]]])
+        full = [call.args[0] for call in mock_hash.call_args_list if "limit" not in call.kwargs]
+        self.assertEqual(sorted(full), sorted([self.files[0], self.files[2], self.files[3], self.files[1], self.files[4]]))
+
+    def test_reuse_duplicate_metadata(self):
+        """Test that copies get the metadata of the file analyzed, under their own name."""
+        groups = [[self.files[0], self.files[2]]]
+        records = {self.files[0]: MetadataRecord({"File Name": "a.pdf", "Author": "Alice"}), self.files[1]: None}
+        all_metadata = reuse_duplicate_metadata(self.files[:3], records, groups)
+        self.assertEqual([dict(record) for record in all_metadata],
+                         [{"File Name": "a.pdf", "Author": "Alice"}, {"File Name": "a copy.pdf", "Author": "Alice"}])
+
+    def test_report_lists_duplicates(self):
+        """Test that the duplicate groups are listed at the end of the report."""
+        args = argparse.Namespace(display="all")
+        with patch("src.MetaDetective.MetaDetective.DUPLICATE_GROUPS", [["x/a.pdf", "y/a.pdf"]]):
+            text = export_metadata_to_txt(args, [MetadataRecord({"File Name": "a.pdf", "Author": "Alice"})], [])
+        self.assertIn("Duplicate files (same content, analyzed once):\n    - x/a.pdf, y/a.pdf\n", text)
+
+
+class TestDistributed(unittest.TestCase):
+
+    def serve(self, coordinator):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), coordinator_handler(coordinator))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return f"http://127.0.0.1:{server.server_address[1]}/"
+
+    def test_batches_in_order(self):
+        """Test that results are merged in the order of the file list, whatever the completion order."""
+        coordinator = Coordinator(["a", "b", "c", "d", "e"], batch_size=2)
+        leases = [coordinator.lease() for _ in range(3)]
+        self.assertEqual([files for _, files in leases], [["a", "b"], ["c", "d"], ["e"]])
+        self.assertIsNone(coordinator.lease())
+        for batch, files in reversed(leases):
+            self.assertTrue(coordinator.complete(batch, [{"File Name": name} for name in files]))
+        self.assertFalse(coordinator.complete(0, [{"File Name": "a"}, {"File Name": "b"}]))
+        self.assertEqual([m["File Name"] for m in coordinator.wait()], ["a", "b", "c", "d", "e"])
+
+    def test_expired_lease_handed_out_again(self):
+        """Test that a lost batch is handed out again, then given up after max_attempts."""
+        coordinator = Coordinator(["a", "b"], batch_size=1, lease_timeout=0, max_attempts=2)
+        with self.assertLogs("MetaDetective") as logs:
+            self.assertEqual(coordinator.lease(), (0, ["a"]))
+            self.assertEqual(coordinator.lease(), (1, ["b"]))
+            self.assertEqual(coordinator.lease(), (0, ["a"]))
+            self.assertTrue(coordinator.complete(1, [{"File Name": "b"}]))
+            self.assertIsNone(coordinator.lease())
+            self.assertEqual([m["File Name"] for m in coordinator.wait(0.01)], ["b"])
+        self.assertIn("ERROR:MetaDetective:Batch 0 was not returned after 2 attempts", logs.output[-1])
+
+    def test_late_results_accepted(self):
+        """Test that the results of an expired lease are kept if the batch was not completed meanwhile."""
+        coordinator = Coordinator(["a"], lease_timeout=0)
+        batch, _ = coordinator.lease()
+        self.assertEqual(coordinator.lease(), (batch, ["a"]))
+        self.assertFalse(coordinator.complete(batch, []))
+        self.assertTrue(coordinator.complete(batch, [{"File Name": "a"}]))
+        self.assertTrue(coordinator.finished.is_set())
+
+    def test_local_workers_exited(self):
+        """Test that the batches left are given up once every local worker exited and no lease is held."""
+        self.addCleanup(QUARANTINE.clear)
+        coordinator = Coordinator(["a", "b", "c"], batch_size=1, lease_timeout=0.05)
+        batch, _ = coordinator.lease()
+        coordinator.complete(batch, [{"File Name": "a"}])
+        coordinator.lease()
+        worker = Mock()
+        worker.poll.return_value = 1
+        with self.assertLogs("MetaDetective", "WARNING") as logs:
+            coordinator.join(0.01, workers=[worker])
+        self.assertIn("ERROR:MetaDetective:Every local worker exited", logs.output[1])
+        self.assertEqual([path for path, _ in QUARANTINE.items()], ["b", "c"])
+        self.assertEqual([m["File Name"] for m in coordinator.wait()], ["a"])
+
+    @patch("src.MetaDetective.MetaDetective.get_metadata")
+    def test_worker_over_http(self, mock_get_metadata):
+        """Test that a worker analyzes every batch over HTTP, including a batch lost by another worker."""
+        mock_get_metadata.side_effect = lambda path, fields: {"File Name": path, "Author": "Alice"}
+        coordinator = Coordinator(["a", "b", "c"], batch_size=2, lease_timeout=0.2)
+        url = self.serve(coordinator)
+        with urllib.request.urlopen(url + "lease") as response:
+            self.assertEqual(json.load(response), {"batch": 0, "files": ["a", "b"]})
+
+        with patch("src.MetaDetective.MetaDetective.DISTRIBUTED_POLL_INTERVAL", 0.05):
+            self.assertEqual(run_worker(url), 3)
+            all_metadata = coordinator.wait(0.05)
+
+        self.assertEqual([m["File Name"] for m in all_metadata], ["a", "b", "c"])
+        with self.assertRaises(urllib.error.HTTPError) as cm:
+            urllib.request.urlopen(url + "lease")
+        self.assertEqual(cm.exception.code, 410)
+
+    def test_invalid_results_rejected(self):
+        """Test that malformed results are answered with 400."""
+        url = self.serve(Coordinator(["a"]))
+        request = urllib.request.Request(url + "results", data=b'{"batch": 0, "results": "a"}')
+        with self.assertRaises(urllib.error.HTTPError) as cm:
+            urllib.request.urlopen(request)
+        self.assertEqual(cm.exception.code, 400)
+
+    @patch("src.MetaDetective.MetaDetective.DISTRIBUTED_CONNECT_ATTEMPTS", 2)
+    @patch("src.MetaDetective.MetaDetective.DISTRIBUTED_POLL_INTERVAL", 0)
+    @patch("src.MetaDetective.MetaDetective.open_url", side_effect=urllib.error.URLError("refused"))
+    def test_worker_gives_up(self, mock_open_url):
+        """Test that a worker stops when the coordinator cannot be reached."""
+        with self.assertRaises(urllib.error.URLError):
+            run_worker("http://127.0.0.1:1/")
+        self.assertEqual(mock_open_url.call_count, 2)
+
+    def test_valid_address(self):
+        """Test HOST:PORT parsing."""
+        self.assertEqual(valid_address("0.0.0.0:8000"), ("0.0.0.0", 8000))
+        self.assertEqual(valid_address(":8000"), ("127.0.0.1", 8000))
+        for address in ["localhost", "host:http", "host:70000"]:
+            with self.assertRaises(argparse.ArgumentTypeError):
+                valid_address(address)
+
+
+class TestQuarantine(unittest.TestCase):
+
+    def setUp(self):
+        QUARANTINE.clear()
+        self.addCleanup(QUARANTINE.clear)
+
+    @patch("src.MetaDetective.MetaDetective.FILE_TIMEOUT", 2.0)
+    @patch("subprocess.run", side_effect=subprocess.TimeoutExpired(["exiftool"], 2.0))
+    def test_timeout_quarantines_file(self, mock_run):
+        """Test that exiftool runs under the file timeout, and that a file exceeding it is quarantined."""
+        with self.assertLogs("MetaDetective", "WARNING") as logs:
+            self.assertEqual(get_metadata("/data/notes.txt", FIELDS), {})
+            self.assertEqual(get_metadata_from_bytes(b"data", FIELDS, "upload.txt"), {})
+        self.assertEqual(mock_run.call_args.kwargs["timeout"], 2.0)
+        self.assertEqual(QUARANTINE.items(), [("/data/notes.txt", "exiftool did not answer within 2 seconds"),
+                                              ("upload.txt", "exiftool did not answer within 2 seconds")])
+        self.assertIn("Quarantined /data/notes.txt", logs.output[0])
+
+    @patch("src.MetaDetective.MetaDetective.FILE_TIMEOUT", 10.0)
+    def test_timeout_capped_by_deadline(self):
+        """Test that the time budget of a file does not go past the global deadline."""
+        with patch("src.MetaDetective.MetaDetective.DEADLINE", time.monotonic() + 1), \
+                patch("subprocess.run", return_value=Mock(stdout="")) as mock_run:
+            get_metadata("/data/notes.txt", FIELDS)
+        self.assertLessEqual(mock_run.call_args.kwargs["timeout"], 1)
+
+    def test_max_entries(self):
+        """Test that a bounded quarantine forgets its oldest files."""
+        quarantine = Quarantine(max_entries=2)
+        with self.assertLogs("MetaDetective", "WARNING"):
+            quarantine.add("a", "slow")
+            quarantine.extend(["b", "c"], "late")
+        self.assertEqual(quarantine.items(), [("b", "late"), ("c", "late")])
+
+    def test_report_lists_quarantined_files(self):
+        """Test that the quarantined files are listed at the end of the report."""
+        QUARANTINE.extend(["a.pdf", "b.pdf"], "not analyzed before the deadline")
+        args = argparse.Namespace(display="singular", format="concise")
+        text = export_metadata_to_txt(args, [MetadataRecord({"File Name": "c.pdf", "Author": "Alice"})], [])
+        self.assertTrue(text.endswith("Quarantined files:\n    - a.pdf: not analyzed before the deadline\n"
+                                      "    - b.pdf: not analyzed before the deadline\n"))
+        self.assertIn("Author: Alice", text)
+
+    def test_coordinator_deadline(self):
+        """Test that the batches not completed before the deadline are given up and their files quarantined."""
+        coordinator = Coordinator(["a", "b", "c"], batch_size=1)
+        batch, _ = coordinator.lease()
+        coordinator.complete(batch, [{"File Name": "a"}], [("a!/slow.pdf", "exiftool did not answer within 1 seconds")])
+        coordinator.lease()
+        with self.assertLogs("MetaDetective", "WARNING"):
+            all_metadata = coordinator.wait(0.01, deadline=time.monotonic())
+        self.assertEqual([m["File Name"] for m in all_metadata], ["a"])
+        self.assertEqual([path for path, _ in QUARANTINE.items()], ["a!/slow.pdf", "b", "c"])
+        self.assertIsNone(coordinator.lease())
+
+
+class TestHtmlPages(unittest.TestCase):
+
+    def setUp(self):
+        self.records = [MetadataRecord({"File Name": f"f{i}.pdf", "Author": "Alice"}) for i in range(5)]
+        self.args = argparse.Namespace(display="all", format=None)
+
+    def test_pages(self):
+        """Test that entries are split into linked pages, with the report sections on the last one."""
+        with patch("src.MetaDetective.MetaDetective.DUPLICATE_GROUPS", [["x/f0.pdf", "y/f0.pdf"]]):
+            pages = list(export_metadata_to_html_pages(self.args, self.records, [], "report", 2))
+        self.assertEqual([name for name, _ in pages], ["report.html", "report-2.html", "report-3.html"])
+        self.assertEqual([content.count('class="metadata-entry"') for _, content in pages], [2, 2, 1])
+        self.assertIn("Page 2 of 3 (files 3 to 4 of 5) | <a href='report.html'>Previous</a> | <a href='report-3.html'>Next</a>", pages[1][1])
+        self.assertNotIn("Next", pages[2][1])
+        self.assertIn("Duplicate files", pages[2][1])
+        self.assertNotIn("Duplicate files", pages[0][1])
+        for _, content in pages:
+            self.assertNotIn("@import", content)
+            self.assertNotIn("animation", content)
+
+    def test_singular_single_page(self):
+        """Test that the condensed display is a single lightweight page."""
+        args = argparse.Namespace(display="singular", format="concise")
+        pages = list(export_metadata_to_html_pages(args, self.records, [], "report", 2))
+        self.assertEqual(len(pages), 1)
+        self.assertIn("<h3>Author:</h3><p>Alice</p>", pages[0][1])
+        self.assertIn("content-visibility", pages[0][1])
+
+    @patch("src.MetaDetective.MetaDetective.lookup_address", return_value="Beika <Street>")
+    def test_values_escaped(self, mock_lookup_address):
+        """Test that record values are escaped, including an Address or Map Link the export did not build."""
+        records = [
+            {"File Name": "card.vcf", "Address": "<script>alert(1)</script>", "Map Link": "<img src=x onerror=alert(2)>"},
+            {"File Name": "photo.jpg", "Formatted GPS Position": "35.68<b>, 139.76", "Map Link": "<i>raw</i>"},
+        ]
+        for display in ("all", "singular"):
+            content = export_metadata_to_html(argparse.Namespace(display=display, format="concise"), [dict(m) for m in records], [])
+            self.assertNotIn("<script>", content)
+            self.assertNotIn("<img", content)
+            self.assertNotIn("<b>", content)
+            self.assertNotIn("<i>", content)
+            self.assertIn("lat=35.68%3Cb%3E&amp;lon=139.76'", content)
+        content = export_metadata_to_html(self.args, [dict(m) for m in records], [])
+        self.assertIn("<strong>Address:</strong> &lt;script&gt;alert(1)&lt;/script&gt;", content)
+        self.assertIn(">Beika &lt;Street&gt;</a>", content)
+
+    def test_report_writes_pages(self):
+        """Test that the export writes every page to the export directory."""
+        with tempfile.TemporaryDirectory() as directory:
+            args = argparse.Namespace(display="all", format=None, export="html", custom="case", out=directory,
+                                      html_page_size=2)
+            with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+                report_metadata(args, self.records, [])
+            names = sorted(os.listdir(directory))
+            self.assertEqual(len(names), 3)
+            self.assertTrue(all(name.startswith("MetaDetective_Export-case-") for name in names))
+            self.assertIn("Results exported to 3 pages", mock_stdout.getvalue())
+
+
+SITEMAP_INDEX = b'''<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>http://example.com/sitemap-docs.xml.gz</loc></sitemap>
+</sitemapindex>'''
+
+SITEMAP_URLSET = b'''<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>http://example.com/docs/report.pdf</loc></url>
+  <url><loc> http://example.com/about.html </loc></url>
+</urlset>'''
+
+
+class TestSitemaps(unittest.TestCase):
+
+    @patch("urllib.request.urlopen")
+    def test_read_robots_sitemaps(self, mock_urlopen):
+        """Test that Sitemap lines are read from robots.txt, case-insensitively."""
+        robots = b"User-agent: *\nDisallow: /private\nSitemap: /sitemap-a.xml\nsitemap: http://example.com/b.xml\n"
+        mock_urlopen.return_value = make_http_response(robots, "text/plain")
+        self.assertEqual(read_robots_sitemaps("http://example.com/page"),
+                         ["http://example.com/sitemap-a.xml", "http://example.com/b.xml"])
+
+    @patch("urllib.request.urlopen")
+    def test_iter_sitemap_index(self, mock_urlopen):
+        """Test that locations of a sitemap index are flagged as nested sitemaps."""
+        mock_urlopen.return_value = make_http_response(SITEMAP_INDEX, "application/xml")
+        self.assertEqual(list(iter_sitemap("http://example.com/sitemap.xml")),
+                         [("http://example.com/sitemap-docs.xml.gz", True)])
+
+    @patch("urllib.request.urlopen")
+    def test_iter_gzipped_sitemap(self, mock_urlopen):
+        """Test that gzipped sitemaps are decompressed while parsing."""
+        mock_urlopen.return_value = make_http_response(gzip.compress(SITEMAP_URLSET), "application/octet-stream")
+        self.assertEqual(list(iter_sitemap("http://example.com/sitemap-docs.xml.gz")),
+                         [("http://example.com/docs/report.pdf", False), ("http://example.com/about.html", False)])
+
+    @patch("src.MetaDetective.MetaDetective.iter_sitemap")
+    @patch("src.MetaDetective.MetaDetective.read_robots_sitemaps", return_value=[])
+    def test_discover_follows_indexes(self, mock_robots, mock_iter_sitemap):
+        """Test that nested sitemaps are followed once and their URLs yielded."""
+        listings = {
+            "http://example.com/sitemap.xml": [("http://example.com/nested.xml", True)],
+            "http://example.com/sitemap_index.xml": [("http://example.com/nested.xml", True)],
+            "http://example.com/nested.xml": [("http://example.com/docs/report.pdf", False)],
+        }
+        mock_iter_sitemap.side_effect = lambda url: iter(listings.get(url, []))
+
+        with patch("sys.stdout", new_callable=StringIO):
+            links = list(discover_sitemap_links("http://example.com/"))
+
+        self.assertEqual(links, ["http://example.com/docs/report.pdf"])
+        visited = [c[0][0] for c in mock_iter_sitemap.call_args_list]
+        self.assertEqual(visited.count("http://example.com/nested.xml"), 1)
+
+
+class TestCrawlFrontier(unittest.TestCase):
+
+    def test_document_hints_first(self):
+        """Test that paths hinting at documents are fetched before navigation pages."""
+        frontier = CrawlFrontier()
+        frontier.put(("http://example.com/about", 1, "example.com", False))
+        frontier.put(("http://example.com/downloads/", 1, "example.com", False))
+        self.assertEqual(frontier.get()[0], "http://example.com/downloads/")
+
+    def test_parent_yield_first(self):
+        """Test that links from pages rich in files are fetched first."""
+        frontier = CrawlFrontier()
+        frontier.put(("http://example.com/a", 1, "example.com", False), parent_yield=0)
+        frontier.put(("http://example.com/b", 1, "example.com", False), parent_yield=5)
+        self.assertEqual(frontier.get()[0], "http://example.com/b")
+
+    def test_shallow_first_and_fifo_ties(self):
+        """Test that shallower pages come first and ties keep insertion order."""
+        frontier = CrawlFrontier()
+        frontier.put(("http://example.com/deep", 0, "example.com", False))
+        frontier.put(("http://example.com/one", 2, "example.com", False))
+        frontier.put(("http://example.com/two", 2, "example.com", False))
+        self.assertEqual([frontier.get()[0] for _ in range(3)],
+                         ["http://example.com/one", "http://example.com/two", "http://example.com/deep"])
+
+    def test_sentinel_last(self):
+        """Test that sentinels are handed out after every task."""
+        frontier = CrawlFrontier()
+        frontier.put(None)
+        frontier.put(("http://example.com/", 0, "example.com", False))
+        self.assertIsNotNone(frontier.get())
+        self.assertIsNone(frontier.get())
+
+    def test_page_budget(self):
+        """Test that no more pages are claimed once the budget is spent."""
+        frontier = CrawlFrontier(max_pages=2)
+        self.assertEqual([frontier.claim_page() for _ in range(3)], [True, True, False])
+
+    def test_time_budget(self):
+        """Test that no more pages are claimed once the time budget is spent."""
+        with patch("time.monotonic", return_value=100.0):
+            frontier = CrawlFrontier(max_time=10)
+        with patch("time.monotonic", return_value=111.0):
+            self.assertFalse(frontier.claim_page())
+
+    def test_score_url(self):
+        """Test that the score combines depth, yield and path hints."""
+        self.assertLess(score_url("http://example.com/media/", 0), score_url("http://example.com/blog/", 0))
+        self.assertLess(score_url("http://example.com/x", 3), score_url("http://example.com/x", 1))
+
+
+class TestContentDecompressor(unittest.TestCase):
+
+    def test_gzip(self):
+        """Test that gzip data split across chunks is decompressed."""
+        data = gzip.compress(b"hello world" * 100)
+        decompressor = ContentDecompressor("gzip")
+        output = b"".join(decompressor.decompress(data[i:i + 7]) for i in range(0, len(data), 7))
+        self.assertEqual(output, b"hello world" * 100)
+
+    def test_zlib_deflate(self):
+        """Test that zlib-wrapped deflate data is decompressed."""
+        self.assertEqual(ContentDecompressor("deflate").decompress(zlib.compress(b"hello")), b"hello")
+
+    def test_raw_deflate(self):
+        """Test that raw deflate data without zlib wrapper is decompressed."""
+        compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        data = compressor.compress(b"hello") + compressor.flush()
+        self.assertEqual(ContentDecompressor("deflate").decompress(data), b"hello")
+
+    def test_max_length(self):
+        """Test that the output size can be bounded."""
+        self.assertEqual(len(ContentDecompressor("gzip").decompress(gzip.compress(b"a" * 1000), 10)), 10)
+
+    def test_corrupt_data(self):
+        """Test that corrupt gzip data raises an error."""
+        with self.assertRaises(zlib.error):
+            ContentDecompressor("gzip").decompress(b"not gzip at all")
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_counters_and_labels(self):
+        """Test that counters are kept per label set and can be totalled."""
+        metrics = Metrics()
+        metrics.increment("http_requests_total", kind="page", status="200")
+        metrics.increment("http_requests_total", kind="page", status="200")
+        metrics.increment("http_requests_total", kind="page", status="404")
+        self.assertEqual(metrics.counter_total("http_requests_total"), 3)
+        counters = metrics.snapshot()["counters"]
+        self.assertIn({"name": "http_requests_total", "labels": {"kind": "page", "status": "200"}, "value": 2}, counters)
+
+    def test_histogram(self):
+        """Test that observations are counted in cumulative buckets."""
+        metrics = Metrics()
+        metrics.observe("exiftool_seconds", 0.02)
+        metrics.observe("exiftool_seconds", 3.0)
+        histogram = metrics.snapshot()["histograms"][0]
+        self.assertEqual(histogram["count"], 2)
+        self.assertAlmostEqual(histogram["sum"], 3.02)
+        self.assertEqual(histogram["buckets"]["0.025"], 1)
+        self.assertEqual(histogram["buckets"]["5.0"], 2)
+        self.assertEqual(histogram["buckets"]["+Inf"], 2)
+
+    def test_prometheus_format(self):
+        """Test that the Prometheus text format declares types and renders labels."""
+        metrics = Metrics()
+        metrics.increment("http_requests_total", kind="page", status="200")
+        metrics.set_gauge("queue_depth", 4, queue="frontier")
+        metrics.observe("http_request_seconds", 0.1, host="example.com")
+        text = metrics.to_prometheus()
+        self.assertIn("# TYPE metadetective_http_requests_total counter", text)
+        self.assertIn('metadetective_http_requests_total{kind="page",status="200"} 1', text)
+        self.assertIn('metadetective_queue_depth{queue="frontier"} 4', text)
+        self.assertIn('metadetective_http_request_seconds_bucket{host="example.com",le="+Inf"} 1', text)
+        self.assertIn('metadetective_http_request_seconds_count{host="example.com"} 1', text)
+
+    def test_prometheus_label_escaping(self):
+        """Test that backslashes, quotes and newlines are escaped in each label value."""
+        metrics = Metrics()
+        metrics.increment("files_total", path='C:\\a "b"\nc', kind="pdf")
+        self.assertIn('metadetective_files_total{kind="pdf",path="C:\\\\a \\"b\\"\\nc"} 1', metrics.to_prometheus())
+
+    def test_write_json(self):
+        """Test that the metrics file holds the JSON snapshot."""
+        metrics = Metrics()
+        metrics.increment("files_total")
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "metrics.json")
+            metrics.write(path)
+            with open(path) as f:
+                self.assertEqual(json.load(f)["counters"][0]["value"], 1)
+
+    @patch("src.MetaDetective.MetaDetective.METRICS", new_callable=Metrics)
+    @patch("urllib.request.urlopen")
+    def test_open_url_records_status_and_latency(self, mock_urlopen, mock_metrics):
+        """Test that requests are counted by status and timed per host."""
+        mock_urlopen.return_value = make_http_response(b"")
+        open_url("http://example.com/page", "page")
+        mock_urlopen.side_effect = urllib.error.HTTPError("http://example.com/missing", 404, "Not Found", {}, None)
+        with self.assertRaises(urllib.error.HTTPError):
+            open_url("http://example.com/missing", "page")
+
+        counters = {tuple(sorted(c["labels"].items())): c["value"] for c in mock_metrics.snapshot()["counters"]}
+        self.assertEqual(counters[(("kind", "page"), ("status", "200"))], 1)
+        self.assertEqual(counters[(("kind", "page"), ("status", "404"))], 1)
+        self.assertEqual(mock_metrics.histogram_total("http_request_seconds")[0], 2)
+
+
+class TestProfiler(unittest.TestCase):
+
+    def test_disabled_stages_are_not_recorded(self):
+        """Test that stages cost nothing and record nothing until the profiler is started."""
+        profiler = Profiler()
+        with profiler.stage("extraction"):
+            pass
+        self.assertEqual(profiler.stages, {})
+
+    @patch("src.MetaDetective.MetaDetective.METRICS", new_callable=Metrics)
+    def test_stages_add_up(self, mock_metrics):
+        """Test that each stage accumulates its calls and time, also in the metrics."""
+        profiler = Profiler()
+        profiler.start([])
+        for _ in range(3):
+            with profiler.stage("rendering"):
+                pass
+        with profiler.stage("export"):
+            pass
+        self.assertEqual(profiler.stages["rendering"][0], 3)
+        self.assertEqual(profiler.stages["export"][0], 1)
+        self.assertEqual(mock_metrics.histogram_total("stage_seconds")[0], 4)
+        self.assertIn("rendering", profiler.report())
+
+    @patch("sys.stderr", new_callable=StringIO)
+    def test_finish_writes_breakdown_and_pstats(self, mock_stderr):
+        """Test that the breakdown and the merged cProfile data of the worker threads are written."""
+        profiler = Profiler()
+        profiler.start(["cprofile"])
+        with profiler.stage("discovery"):
+            sorted(range(1000))
+        worker = profiler.wrap(lambda: sum(range(1000)))
+        worker()
+
+        with tempfile.TemporaryDirectory() as directory:
+            prefix = os.path.join(directory, "profile")
+            profiler.finish(prefix)
+            with open(prefix + ".txt") as f:
+                self.assertIn("discovery", f.read())
+            self.assertGreater(len(pstats.Stats(prefix + ".pstats").stats), 0)
+        self.assertIn("Profile written to", mock_stderr.getvalue())
+
+
+class TerminalStream(StringIO):
+    """StringIO standing for an interactive terminal."""
+
+    def isatty(self):
+        return True
+
+
+class TestProgressReporter(unittest.TestCase):
+
+    @patch("sys.stdout", new_callable=StringIO)
+    def test_inactive_without_terminal(self, mock_stdout):
+        """Test that the reporter switches itself off when stdout is not a TTY and messages print as usual."""
+        progress = ProgressReporter()
+        progress.start(total=10)
+        progress.update(files=1)
+        progress.info("INFO: Accessing http://example.com")
+        self.assertFalse(progress.active)
+        self.assertEqual(progress.files, 0)
+        self.assertEqual(mock_stdout.getvalue(), "INFO: Accessing http://example.com\n")
+
+    def test_render_with_total(self):
+        """Test that the line shows counts, rates and an ETA derived from the expected total."""
+        stream = TerminalStream()
+        progress = ProgressReporter(interval=60)
+        progress.start(total=10, stream=stream)
+        progress.started -= 2
+        progress.update(files=4, nbytes=4 * 1024 * 1024)
+        line = progress.render()
+        progress.stop()
+        self.assertIn("4/10 files", line)
+        self.assertIn("2.0 files/s", line)
+        self.assertIn("2.00 MiB/s", line)
+        self.assertIn("ETA 0:00:03", line)
+
+    def test_render_crawl_queue(self):
+        """Test that crawls report pages and queue depth, with an ETA derived from the page rate."""
+        stream = TerminalStream()
+        progress = ProgressReporter(interval=60)
+        progress.start(queue_depth=lambda: 6, stream=stream)
+        progress.started -= 3
+        progress.update(pages=3, files=2)
+        line = progress.render()
+        progress.stop()
+        self.assertIn("3 pages", line)
+        self.assertIn("queued 6", line)
+        self.assertIn("ETA 0:00:06", line)
+
+    def test_messages_while_active(self):
+        """Test that per-item messages are dropped and others are printed above the progress line."""
+        stream = TerminalStream()
+        progress = ProgressReporter(interval=60)
+        progress.start(stream=stream)
+        progress.info("INFO: Downloaded file")
+        progress.log("ERROR: Failed to download")
+        progress.stop()
+        output = stream.getvalue()
+        self.assertNotIn("Downloaded", output)
+        self.assertIn("\r\033[KERROR: Failed to download\n", output)
+        self.assertTrue(output.endswith("\n"))
+        self.assertFalse(progress.active)
+
+
+class TestProgressHandler(unittest.TestCase):
+
+    @patch("sys.stdout", new_callable=StringIO)
+    def test_prints_level_and_message(self, mock_stdout):
+        """Test that log records are printed as "LEVEL: message" on the command line."""
+        logger = logging.getLogger("MetaDetective.test")
+        handler = progress_handler()()
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+        logger.setLevel(logging.INFO)
+        logger.info("Accessing http://example.com")
+        logger.error("Failed to download http://example.com/a.pdf")
+        self.assertEqual(mock_stdout.getvalue(), "INFO: Accessing http://example.com\n"
+                                                 "ERROR: Failed to download http://example.com/a.pdf\n")
+
+
+FAKE_STAY_OPEN_EXIFTOOL = '''import os, sys, time
+args = []
+for line in sys.stdin:
+    line = line.rstrip("\\n")
+    if line == "-execute":
+        if "slow" in args[-1]:
+            time.sleep(30)
+        if "missing" in args[-1]:
+            print("Error: File not found - " + args[-1])
+        else:
+            print("File Name                       : " + os.path.basename(args[-1]))
+            print("Author                          : pid " + str(os.getpid()))
+        print("{ready}", flush=True)
+        args = []
+    elif args == ["-stay_open"] and line == "False":
+        break
+    else:
+        args.append(line)
+'''
+
+
+class TestExifTool(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.executable = os.path.join(self.directory.name, "exiftool")
+        with open(self.executable, "w") as f:
+            f.write(f"#!{sys.executable}\n" + FAKE_STAY_OPEN_EXIFTOOL)
+        os.chmod(self.executable, 0o755)
+
+    def test_process_kept_across_files(self):
+        """Test that one exiftool process answers every file, and is restarted if it dies."""
+        exiftool = ExifTool(self.executable)
+        self.addCleanup(exiftool.close)
+        first = get_metadata("/data/report.pdf.txt", FIELDS, exiftool)
+        second = get_metadata("/data/notes.txt", FIELDS, exiftool)
+        self.assertEqual(first["File Name"], "report.pdf.txt")
+        self.assertEqual(second["File Name"], "notes.txt")
+        self.assertEqual(first["Author"], second["Author"])
+
+        exiftool.process.kill()
+        exiftool.process.wait()
+        self.assertNotEqual(get_metadata("/data/notes.txt", FIELDS, exiftool)["Author"], first["Author"])
+
+    def test_bytes_through_temporary_file(self):
+        """Test that in-memory content is analyzed by the running process, under its own name."""
+        exiftool = ExifTool(self.executable)
+        self.addCleanup(exiftool.close)
+        metadata = get_metadata_from_bytes(b"data", FIELDS, "upload.txt", exiftool)
+        self.assertEqual(metadata["File Name"], "upload.txt")
+        self.assertEqual(metadata["Author"], get_metadata("/data/notes.txt", FIELDS, exiftool)["Author"])
+
+    @patch("src.MetaDetective.MetaDetective.FILE_TIMEOUT", 0.5)
+    def test_timeout_restarts_process(self):
+        """Test that a file exceeding its time budget is quarantined, and the next one analyzed by a new process."""
+        QUARANTINE.clear()
+        self.addCleanup(QUARANTINE.clear)
+        exiftool = ExifTool(self.executable)
+        self.addCleanup(exiftool.close)
+        first = get_metadata("/data/notes.txt", FIELDS, exiftool)
+        with self.assertLogs("MetaDetective", "WARNING"):
+            self.assertEqual(get_metadata("/data/slow.txt", FIELDS, exiftool), {})
+        self.assertEqual(QUARANTINE.items(), [("/data/slow.txt", "exiftool did not answer within 0.5 seconds")])
+        self.assertNotEqual(get_metadata("/data/notes.txt", FIELDS, exiftool)["Author"], first["Author"])
+
+    def test_errors_logged(self):
+        """Test that the errors exiftool prints for a file are logged, as when it runs once per file."""
+        exiftool = ExifTool(self.executable)
+        self.addCleanup(exiftool.close)
+        with self.assertLogs("MetaDetective", "ERROR") as logs:
+            self.assertEqual(get_metadata("/data/missing.txt", FIELDS, exiftool), {})
+        self.assertEqual(logs.output, ["ERROR:MetaDetective:Error executing exiftool: File not found - /data/missing.txt"])
+        self.assertEqual(get_metadata("/data/notes.txt", FIELDS, exiftool)["File Name"], "notes.txt")
+
+    def test_close(self):
+        """Test that closing stops the process."""
+        exiftool = ExifTool(self.executable)
+        exiftool.execute("/data/notes.txt")
+        process = exiftool.process
+        exiftool.close()
+        self.assertIsNotNone(process.poll())
+        self.assertIsNone(exiftool.process)
+
+
+class TestMetadataService(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "a.pdf")
+        with open(self.path, "wb") as f:
+            f.write(b"data")
+        self.service = MetadataService(workers=2, root=self.directory.name, ignore_patterns=["^admin$"])
+        self.addCleanup(self.service.close)
+        self.addCleanup(setattr, QUARANTINE, "max_entries", None)
+
+    @patch("src.MetaDetective.MetaDetective.lookup_address", return_value="Berlin, Germany")
+    @patch("src.MetaDetective.MetaDetective.get_metadata")
+    def test_lookup_path(self, mock_get_metadata, mock_lookup_address):
+        """Test that lookups report the relevant fields, with the address, without the ignored values."""
+        mock_get_metadata.return_value = {"File Name": "a.pdf", "Author": "admin", "Creator": "Alice",
+                                          "File Size": "4 bytes", "Formatted GPS Position": "52.5200, 13.4050"}
+        metadata = self.service.lookup_path(self.path)
+        self.assertEqual(metadata["Creator"], "Alice")
+        self.assertEqual(metadata["Address"], "Berlin, Germany")
+        self.assertNotIn("Author", metadata)
+        self.assertNotIn("File Size", metadata)
+
+    @patch("src.MetaDetective.MetaDetective.get_metadata")
+    def test_lookups_not_interned(self, mock_get_metadata):
+        """Test that lookups leave the string table and the quarantine of the long-running process bounded."""
+        strings, layouts = len(STRING_TABLE.strings), len(STRING_TABLE.layouts)
+        for index in range(20):
+            mock_get_metadata.return_value = {"File Name": f"a{index}.pdf", f"Field {index}": f"Author {index}"}
+            self.service.lookup_path(self.path)
+        self.assertEqual((len(STRING_TABLE.strings), len(STRING_TABLE.layouts)), (strings, layouts))
+        self.assertEqual(QUARANTINE.max_entries, SERVE_QUARANTINE_SIZE)
+
+    def test_lookup_path_outside_root(self):
+        """Test that files outside of the root directory, or missing, are refused."""
+        with self.assertRaises(PermissionError):
+            self.service.lookup_path(os.path.join(self.directory.name, "..", "a.pdf"))
+        with self.assertRaises(FileNotFoundError):
+            self.service.lookup_path(os.path.join(self.directory.name, "b.pdf"))
+
+    @patch("src.MetaDetective.MetaDetective.get_metadata")
+    def test_server(self, mock_get_metadata):
+        """Test the HTTP endpoint, and that no more requests than workers are handled at the same time."""
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def slow_metadata(path, fields, exiftool):
+            with lock:
+                running.append(path)
+                peak.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(path)
+            return {"File Name": os.path.basename(path), "Author": "Alice"}
+
+        mock_get_metadata.side_effect = slow_metadata
+        server = make_server(("127.0.0.1", 0), self.service, workers=2)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = f"http://127.0.0.1:{server.server_address[1]}/metadata"
+
+        answers = []
+        clients = [threading.Thread(target=lambda: answers.append(json.load(urllib.request.urlopen(f"{url}?path={self.path}"))))
+                   for _ in range(6)]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        self.assertEqual(answers, [{"File Name": "a.pdf", "Author": "Alice"}] * 6)
+        self.assertLessEqual(max(peak), 2)
+
+        for path, code in [("/etc/passwd", 403), (self.path + ".missing", 404)]:
+            with self.assertRaises(urllib.error.HTTPError) as cm:
+                urllib.request.urlopen(f"{url}?path={path}")
+            self.assertEqual(cm.exception.code, code)
+
+        with patch("src.MetaDetective.MetaDetective.get_metadata_from_bytes", return_value={"File Name": "b.docx", "Author": "Bob"}) as mock_bytes:
+            answer = json.load(urllib.request.urlopen(urllib.request.Request(f"{url}?name=../b.docx", data=b"content")))
+        self.assertEqual(answer, {"File Name": "b.docx", "Author": "Bob"})
+        self.assertEqual(mock_bytes.call_args[0][:3], (b"content", FIELDS, "b.docx"))
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class TestEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        for name in ["a.pdf", "b.docx"]:
+            with open(os.path.join(self.directory.name, name), "wb") as f:
+                f.write(b"data")
+
+    @patch("src.MetaDetective.MetaDetective.get_metadata")
+    def test_analyze(self, mock_get_metadata):
+        """Test that files and directories are analyzed with the engine's exiftool, without printing."""
+        mock_get_metadata.side_effect = lambda path, fields, exiftool: {"File Name": os.path.basename(path), "Author": "Alice"}
+        strings = len(STRING_TABLE.strings)
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout, Engine(types=["pdf"]) as engine:
+            results = list(engine.analyze([self.directory.name, os.path.join(self.directory.name, "b.docx")]))
+
+        self.assertEqual([(os.path.basename(path), metadata["File Name"]) for path, metadata in results],
+                         [("a.pdf", "a.pdf"), ("b.docx", "b.docx")])
+        self.assertIs(type(results[0][1]), dict)
+        self.assertEqual(len(STRING_TABLE.strings), strings)
+        self.assertIs(mock_get_metadata.call_args[0][2], engine.exiftool)
+        self.assertEqual(mock_stdout.getvalue(), "")
+
+    def test_analyze_empty_directory(self):
+        """Test that directories without files are skipped with a warning."""
+        empty = os.path.join(self.directory.name, "empty")
+        os.mkdir(empty)
+        with self.assertLogs("MetaDetective", level="WARNING") as logs, Engine() as engine:
+            self.assertEqual(list(engine.analyze([empty])), [])
+        self.assertIn("No files found in", logs.output[0])
+
+    @patch("src.MetaDetective.MetaDetective.fetch_metadata_from_url")
+    def test_crawl(self, mock_fetch):
+        """Test that crawling yields the pages, the files found and their metadata."""
+        mock_fetch.side_effect = lambda url, fields: {"File Name": url.rsplit("/", 1)[-1], "Author": "Alice"}
+        with open(os.path.join(self.directory.name, "index.html"), "w") as f:
+            f.write('<a href="a.pdf">A</a> <a href="b.docx">B</a>')
+        server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(QuietHandler, directory=self.directory.name))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = f"http://127.0.0.1:{server.server_address[1]}/index.html"
+
+        with Engine() as engine:
+            events = list(engine.crawl(url, rate=1000))
+
+        self.assertEqual(events[0], ("page", url, None))
+        self.assertEqual(sorted(source for kind, source, _ in events if kind == "file"),
+                         [url.replace("index.html", "a.pdf"), url.replace("index.html", "b.docx")])
+        metadata = [metadata for kind, _, metadata in events if kind == "metadata"]
+        self.assertEqual(sorted(m["File Name"] for m in metadata), ["a.pdf", "b.docx"])
+        self.assertIs(type(metadata[0]), dict)
+
+
+class TestLookupAddress(unittest.TestCase):
+
+    @patch("src.MetaDetective.MetaDetective.GEOCODE_CACHE", new_callable=dict)
+    @patch("src.MetaDetective.MetaDetective.get_address_from_coords", return_value="Berlin, Germany")
+    def test_cached(self, mock_get_address, mock_cache):
+        """Test that identical coordinates are only looked up once."""
+        self.assertEqual(lookup_address("52.5200", "13.4050"), "Berlin, Germany")
+        self.assertEqual(lookup_address("52.5200", "13.4050"), "Berlin, Germany")
+        mock_get_address.assert_called_once_with("52.5200", "13.4050")
+
+    @patch("src.MetaDetective.MetaDetective.GEOCODE_CACHE", new_callable=dict)
+    @patch("src.MetaDetective.MetaDetective.get_address_from_coords")
+    def test_failures_not_cached(self, mock_get_address, mock_cache):
+        """Test that failed lookups are retried."""
+        mock_get_address.side_effect = [http.client.HTTPException("HTTP error"), "Berlin, Germany"]
+        with self.assertRaises(http.client.HTTPException):
+            lookup_address("52.5200", "13.4050")
+        self.assertEqual(lookup_address("52.5200", "13.4050"), "Berlin, Germany")
+
+    @patch("src.MetaDetective.MetaDetective.GEOCODE_CACHE_SIZE", 2)
+    @patch("src.MetaDetective.MetaDetective.GEOCODE_CACHE", new_callable=dict)
+    @patch("src.MetaDetective.MetaDetective.get_address_from_coords", side_effect=lambda lat, lon: f"{lat}, {lon}")
+    def test_cache_size(self, mock_get_address, mock_cache):
+        """Test that the cache keeps the most recently used addresses only."""
+        for lat in ("1", "2", "1", "3"):
+            lookup_address(lat, "0")
+        self.assertEqual(list(mock_cache), [("1", "0"), ("3", "0")])
+        self.assertEqual(mock_get_address.call_count, 3)
+
+
 if __name__ == '__main__':
     unittest.main()